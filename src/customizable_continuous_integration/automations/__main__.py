@@ -7,20 +7,41 @@ Revision History:
 ------------------------------------------------------------------------------
   27/08/2024   Ryan, Gao       Initial creation
   28/03/2025   Ryan, Gao       Add default help command
+  19/10/2026   Ryan, Gao       Add global profile option
+  19/10/2026   Ryan, Gao       Profile the command import
 """
 
+import os
 import pathlib
 import sys
 
 from customizable_continuous_integration.automations.commands.constants import retrieve_cli_command
+from customizable_continuous_integration.common_libs.profiling import PROFILE_OUTPUT_ENV, profiling
+
+PROFILE_OPTION = "--profile"
+
+
+def pop_global_options(argv: list[str]) -> list[str]:
+    """Take the global options preceding the sub-command out of the arguments, return the remaining arguments."""
+    argv = list(argv)
+    while argv and (argv[0] == PROFILE_OPTION or argv[0].startswith(f"{PROFILE_OPTION}=")):
+        option = argv.pop(0)
+        if option == PROFILE_OPTION:
+            profile_output = argv.pop(0) if argv else ""
+        else:
+            profile_output = option.split("=", 1)[1]
+        # Set into the environment to be inherited by the worker processes
+        os.environ[PROFILE_OUTPUT_ENV] = profile_output
+    return argv
 
 
 def main() -> None:
-    cli_command = retrieve_cli_command(sys.argv[1]) if len(sys.argv) > 1 else retrieve_cli_command("help")
-    unparsed_args = []
-    if len(sys.argv) > 2:
-        unparsed_args = sys.argv[2:]
-    cli_command(unparsed_args)
+    argv = pop_global_options(sys.argv[1:])
+    command_name = argv[0] if argv else "help"
+    # The command module is imported on retrieving the command, so the import is profiled with the command
+    with profiling(f"ci_cli-{command_name}"):
+        cli_command = retrieve_cli_command(command_name)
+        cli_command(argv[1:])
     exit(0)
 
 
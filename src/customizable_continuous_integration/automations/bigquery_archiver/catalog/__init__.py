@@ -0,0 +1 @@
+"""This package hosts the archive catalog index of bigquery archiver"""
@@ -0,0 +1,351 @@
+"""This module defines the archive catalog index kept at the root of an archive gcs prefix
+
+The catalog is made of an append-only log with one record object per archive, plus a compacted SQLite snapshot.
+Compaction folds the log records into the snapshot and deletes them from the log afterwards, so lookups only read
+the snapshot and the few log records appended since the last compaction.
+The snapshot is rewritten under a lock object created exclusively, i.e. with `ifGenerationMatch=0` on GCS, so archive
+runs sharing a prefix do not overwrite the records compacted by each other. Log records are only deleted once a reread
+of the snapshot confirms they are in it.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Build archive records from entity summary records
+  19/10/2026   Ryan, Gao       Delete compacted log records
+  19/10/2026   Ryan, Gao       Rewrite the snapshot under a lock and delete only confirmed log records
+"""
+
+import contextlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import typing
+
+import fsspec
+import pydantic
+from typing_extensions import Self
+
+from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigqueryBaseArchiveEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.dataset import BigqueryArchivedDatasetEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.serialization import (
+    DEFAULT_MANIFEST_CODEC,
+    deserialize_entity,
+    serialize_entity,
+)
+from customizable_continuous_integration.automations.bigquery_archiver.entity.table import BigqueryArchiveTableEntity
+
+ARCHIVE_TS_SELECTOR_LATEST = "latest"
+DEFAULT_CATALOG_LOCK_STALE_SECONDS = 600
+CATALOG_LOCK_POLL_SECONDS = 1
+
+
+class ArchiveCatalogEntityRecord(pydantic.BaseModel):
+    entity_type: str
+    identity: str
+    data_archive_format: str = ""
+    data_compression: str = ""
+    size_bytes: int = 0
+
+    @classmethod
+    def from_entity(cls, entity: BigqueryBaseArchiveEntity) -> Self:
+        """Summarize an archived entity, with the size of the exported data of tables."""
+        if not isinstance(entity, BigqueryArchiveTableEntity):
+            return cls(entity_type=entity.entity_type, identity=entity.identity)
+        fs, data_path = fsspec.core.url_to_fs(entity.data_serialized_path)
+        return cls(
+            entity_type=entity.entity_type,
+            identity=entity.identity,
+            data_archive_format=entity.data_archive_format,
+            data_compression=entity.data_compression,
+            size_bytes=fs.du(data_path) if fs.exists(data_path) else 0,
+        )
+
+
+class ArchiveCatalogRecord(pydantic.BaseModel):
+    project_id: str
+    dataset: str
+    archive_ts: str
+    archive_prefix: str
+    manifest_path: str
+    manifest_codec: str = DEFAULT_MANIFEST_CODEC
+    entities: list[ArchiveCatalogEntityRecord] = []
+
+    @property
+    def archive_key(self) -> str:
+        return f"{self.project_id}.{self.dataset}.{self.archive_ts}"
+
+    @classmethod
+    def from_dataset_entity(cls, dataset_entity: BigqueryArchivedDatasetEntity, manifest_codec: str = DEFAULT_MANIFEST_CODEC) -> Self:
+        entities = [
+            ArchiveCatalogEntityRecord.from_entity(e)
+            for e in (
+                dataset_entity.tables
+                + dataset_entity.external_tables
+                + dataset_entity.views
+                + dataset_entity.materialized_views
+                + dataset_entity.user_define_functions
+                + dataset_entity.stored_procedures
+            )
+        ]
+        return cls.from_entity_records(dataset_entity, entities, manifest_codec)
+
+    @classmethod
+    def from_entity_records(
+        cls, dataset_entity: BigqueryArchivedDatasetEntity, entities: list[ArchiveCatalogEntityRecord], manifest_codec: str = DEFAULT_MANIFEST_CODEC
+    ) -> Self:
+        return cls(
+            project_id=dataset_entity.project_id,
+            dataset=dataset_entity.identity,
+            archive_ts=dataset_entity.archived_datetime_str,
+            archive_prefix=dataset_entity.archive_prefix,
+            manifest_path=dataset_entity.metadata_serialized_path,
+            manifest_codec=manifest_codec,
+            entities=entities,
+        )
+
+
+class BigqueryArchiveCatalog(object):
+    CATALOG_DIRNAME = "_catalog"
+    LOG_DIRNAME = "log"
+    SNAPSHOT_FILENAME = "snapshot.sqlite"
+    LOCK_FILENAME = "snapshot.lock"
+
+    def __init__(self, gcs_prefix: str, logger: logging.Logger = None, lock_stale_seconds: float = DEFAULT_CATALOG_LOCK_STALE_SECONDS):
+        self.gcs_prefix = gcs_prefix.rstrip("/")
+        self.lock_stale_seconds = lock_stale_seconds
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+        self._fs, _ = fsspec.core.url_to_fs(self.gcs_prefix)
+
+    @property
+    def catalog_prefix(self) -> str:
+        return f"{self.gcs_prefix}/{self.CATALOG_DIRNAME}"
+
+    @property
+    def log_prefix(self) -> str:
+        return f"{self.catalog_prefix}/{self.LOG_DIRNAME}"
+
+    @property
+    def snapshot_path(self) -> str:
+        return f"{self.catalog_prefix}/{self.SNAPSHOT_FILENAME}"
+
+    @property
+    def lock_path(self) -> str:
+        return f"{self.catalog_prefix}/{self.LOCK_FILENAME}"
+
+    def log_record_path(self, archive_key: str) -> str:
+        return f"{self.log_prefix}/{archive_key}.json"
+
+    def append(self, record: ArchiveCatalogRecord) -> str:
+        """Append an archive record to the catalog log and return its path."""
+        path = self.log_record_path(record.archive_key)
+        with fsspec.open(path, "wb") as f:
+            f.write(serialize_entity(record))
+        self.logger.info(f"Appended archive {record.archive_key} to the catalog log {path}")
+        return path
+
+    def _list_log_keys(self, project_id: str = None, dataset: str = None) -> list[str]:
+        _, log_path = fsspec.core.url_to_fs(self.log_prefix)
+        if not self._fs.exists(log_path):
+            return []
+        name_prefix = ".".join([p for p in (project_id, dataset) if p])
+        keys = []
+        for p in self._fs.ls(log_path, detail=False):
+            key = os.path.basename(p)[: -len(".json")]
+            if not name_prefix or key.startswith(f"{name_prefix}."):
+                keys.append(key)
+        return keys
+
+    def _read_log_record(self, archive_key: str) -> ArchiveCatalogRecord:
+        with fsspec.open(self.log_record_path(archive_key), "rb") as f:
+            return deserialize_entity(ArchiveCatalogRecord, f.read())
+
+    def _open_snapshot(self) -> sqlite3.Connection:
+        snapshot_fd, snapshot_file = tempfile.mkstemp(suffix=".sqlite")
+        os.close(snapshot_fd)
+        _, snapshot_path = fsspec.core.url_to_fs(self.snapshot_path)
+        if self._fs.exists(snapshot_path):
+            self._fs.get_file(snapshot_path, snapshot_file)
+        conn = sqlite3.connect(snapshot_file)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS archives (archive_key TEXT PRIMARY KEY, project_id TEXT, dataset TEXT, archive_ts TEXT, record TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entities (archive_key TEXT, entity_type TEXT, identity TEXT, data_archive_format TEXT, "
+            "data_compression TEXT, size_bytes INTEGER)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS archives_dataset_idx ON archives (project_id, dataset, archive_ts)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entities_identity_idx ON entities (identity)")
+        return conn
+
+    @contextlib.contextmanager
+    def _snapshot_lock(self) -> typing.Iterator[None]:
+        """Hold the lock object of the snapshot while it is read, modified and rewritten.
+
+        The lock object is opened in the exclusive creation mode, which fails while another holder has it. A lock older
+        than the stale timeout is left by a crashed holder and is broken.
+        """
+        _, lock_path = fsspec.core.url_to_fs(self.lock_path)
+        owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        while True:
+            try:
+                with self._fs.open(lock_path, "xb") as f:
+                    f.write(json.dumps({"owner": owner, "acquired_at": time.time()}).encode("utf-8"))
+                break
+            except FileExistsError:
+                try:
+                    lock = json.loads(self._fs.cat_file(lock_path))
+                except FileNotFoundError:
+                    continue
+                except ValueError:
+                    # The lock object is being written by its holder
+                    time.sleep(CATALOG_LOCK_POLL_SECONDS)
+                    continue
+                if time.time() - lock["acquired_at"] > self.lock_stale_seconds:
+                    self.logger.warning(f"Break the stale catalog lock {self.lock_path} of {lock['owner']}")
+                    self._fs.rm(lock_path)
+                    continue
+                time.sleep(CATALOG_LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            try:
+                if json.loads(self._fs.cat_file(lock_path))["owner"] == owner:
+                    self._fs.rm(lock_path)
+            except (FileNotFoundError, ValueError):
+                pass
+
+    def _snapshot_keys(self) -> set[str]:
+        conn = self._open_snapshot()
+        try:
+            return {r[0] for r in conn.execute("SELECT archive_key FROM archives")}
+        finally:
+            self._close_snapshot(conn)
+
+    def _close_snapshot(self, conn: sqlite3.Connection) -> None:
+        snapshot_file = conn.execute("PRAGMA database_list").fetchone()[2]
+        conn.close()
+        os.remove(snapshot_file)
+
+    def _query_snapshot(self, conn: sqlite3.Connection, sql: str, params: tuple) -> list[ArchiveCatalogRecord]:
+        return [ArchiveCatalogRecord.model_validate_json(r[0]) for r in conn.execute(sql, params)]
+
+    def compact(self) -> int:
+        """Fold the log records which are not yet in the snapshot into a new snapshot, then delete them from the log.
+
+        The snapshot is rewritten under the catalog lock, and the log records are only deleted once a reread of the
+        snapshot confirms them, a failed compaction leaves them to the next one. Log records left behind by such
+        failures are deleted once found in the snapshot.
+        Return:
+            int: The amount of log records compacted
+        """
+        with self._snapshot_lock():
+            conn = self._open_snapshot()
+            try:
+                compacted_keys = {r[0] for r in conn.execute("SELECT archive_key FROM archives")}
+                log_keys = self._list_log_keys()
+                pending_keys = [k for k in log_keys if k not in compacted_keys]
+                for key in pending_keys:
+                    record = self._read_log_record(key)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO archives VALUES (?, ?, ?, ?, ?)",
+                        (record.archive_key, record.project_id, record.dataset, record.archive_ts, record.model_dump_json()),
+                    )
+                    conn.execute("DELETE FROM entities WHERE archive_key = ?", (record.archive_key,))
+                    conn.executemany(
+                        "INSERT INTO entities VALUES (?, ?, ?, ?, ?, ?)",
+                        [
+                            (record.archive_key, e.entity_type, e.identity, e.data_archive_format, e.data_compression, e.size_bytes)
+                            for e in record.entities
+                        ],
+                    )
+                conn.commit()
+                if pending_keys:
+                    _, snapshot_path = fsspec.core.url_to_fs(self.snapshot_path)
+                    self._fs.put_file(conn.execute("PRAGMA database_list").fetchone()[2], snapshot_path)
+                    self.logger.info(f"Compacted {len(pending_keys)} archive records into the catalog snapshot {self.snapshot_path}")
+            finally:
+                self._close_snapshot(conn)
+            confirmed_keys = self._snapshot_keys() if pending_keys else compacted_keys
+            deleted_keys = [k for k in log_keys if k in confirmed_keys]
+            if deleted_keys:
+                self._fs.rm([fsspec.core.url_to_fs(self.log_record_path(k))[1] for k in deleted_keys])
+        if len(deleted_keys) < len(log_keys):
+            self.logger.warning(f"Kept {len(log_keys) - len(deleted_keys)} log records not found in the catalog snapshot {self.snapshot_path}")
+        return len(pending_keys)
+
+    def remove(self, archive_keys: list[str]) -> int:
+        """Remove archive records from both the log and the snapshot.
+
+        Return:
+            int: The amount of archive records removed
+        """
+        if not archive_keys:
+            return 0
+        with self._snapshot_lock():
+            for key in archive_keys:
+                _, log_record_path = fsspec.core.url_to_fs(self.log_record_path(key))
+                if self._fs.exists(log_record_path):
+                    self._fs.rm(log_record_path)
+            conn = self._open_snapshot()
+            try:
+                conn.executemany("DELETE FROM archives WHERE archive_key = ?", [(k,) for k in archive_keys])
+                conn.executemany("DELETE FROM entities WHERE archive_key = ?", [(k,) for k in archive_keys])
+                conn.commit()
+                _, snapshot_path = fsspec.core.url_to_fs(self.snapshot_path)
+                self._fs.put_file(conn.execute("PRAGMA database_list").fetchone()[2], snapshot_path)
+            finally:
+                self._close_snapshot(conn)
+        self.logger.info(f"Removed {len(archive_keys)} archive records from the catalog {self.catalog_prefix}")
+        return len(archive_keys)
+
+    def load_records(self, project_id: str = None, dataset: str = None) -> list[ArchiveCatalogRecord]:
+        """Return archive records from the snapshot and the log records not compacted yet, ordered by archive timestamp."""
+        conn = self._open_snapshot()
+        try:
+            records = {
+                r.archive_key: r
+                for r in self._query_snapshot(
+                    conn,
+                    "SELECT record FROM archives WHERE (? IS NULL OR project_id = ?) AND (? IS NULL OR dataset = ?)",
+                    (project_id, project_id, dataset, dataset),
+                )
+            }
+        finally:
+            self._close_snapshot(conn)
+        for key in self._list_log_keys(project_id, dataset):
+            if key not in records:
+                records[key] = self._read_log_record(key)
+        return sorted(
+            [r for r in records.values() if (not project_id or r.project_id == project_id) and (not dataset or r.dataset == dataset)],
+            key=lambda r: r.archive_ts,
+        )
+
+    def resolve_archive(self, project_id: str, dataset: str, archive_ts_selector: str = ARCHIVE_TS_SELECTOR_LATEST) -> ArchiveCatalogRecord | None:
+        """Resolve an archive of a dataset by the timestamp selector.
+
+        Args:
+            project_id (str): The source GCP project id of the archived dataset
+            dataset (str): The source dataset name of the archived dataset
+            archive_ts_selector (str): `latest`, a full `%Y%m%d%H%M%S` timestamp or its leading part, e.g. `20250410`
+        Return:
+            ArchiveCatalogRecord: The latest archive matching the selector, or None if nothing matches
+        """
+        records = self.load_records(project_id, dataset)
+        archive_ts_selector = str(archive_ts_selector or ARCHIVE_TS_SELECTOR_LATEST)
+        if archive_ts_selector.lower() != ARCHIVE_TS_SELECTOR_LATEST:
+            records = [r for r in records if r.archive_ts.startswith(archive_ts_selector)]
+        return records[-1] if records else None
+
+    def find_archives_with_entity(self, identity: str, project_id: str = None, dataset: str = None) -> list[ArchiveCatalogRecord]:
+        """Return all archives which contain an entity of the given identity."""
+        return [r for r in self.load_records(project_id, dataset) if any(e.identity == identity for e in r.entities)]
@@ -9,6 +9,8 @@ Revision History:
   03/03/2025   Ryan, Gao       Add dependencies property
   23/03/2025   Ryan, Gao       Add DAGNodeInterface
   02/04/2025   Ryan, Gao       Add archiver version for backwards compatibility
+  19/10/2026   Ryan, Gao       Add restore labels and restore DDL interface
+  19/10/2026   Ryan, Gao       Add in-place overwrite switch
 """
 
 import datetime
@@ -119,3 +121,17 @@ class BigqueryBaseArchiveEntity(pydantic.BaseModel, DAGNodeInterface):
 
     def restore_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, _config: dict = None) -> typing.Any:
         raise NotImplementedError("Please implement me to fetch myself")
+
+    def restore_labels(self, restore_config: dict = None) -> dict[str, str]:
+        labels = dict(self.bigquery_metadata.labels)
+        if (restore_config or {}).get("attach_archive_ts_to_label", True):
+            labels["archive_ts"] = self.archived_datetime_str
+        return labels
+
+    def overwrite_in_place(self, restore_config: dict = None) -> bool:
+        """Whether existing objects are replaced one by one instead of being deleted before restoring."""
+        restore_config = restore_config or {}
+        return restore_config.get("overwrite_existing", False) and restore_config.get("overwrite_in_place", False)
+
+    def generate_restore_ddl(self, restore_config: dict = None) -> str:
+        raise NotImplementedError("Please implement me to generate my restore DDL")
@@ -7,12 +7,18 @@ Revision History:
 ------------------------------------------------------------------------------
   08/02/2025   Ryan, Gao       Initial creation
   11/04/2025   Ryan, Gao       Add range partitioning in BigqueryPartitionConfig
+  19/10/2026   Ryan, Gao       Intern project and dataset names; Copy metadata without revalidation
 """
 
+import sys
+import typing
+
 import google.cloud.bigquery
 import pydantic
 from typing_extensions import Self
 
+MetadataType = typing.TypeVar("MetadataType", bound="BigqueryBaseMetadata")
+
 
 class BigqueryPartitionConfig(pydantic.BaseModel):
     partition_type: str
@@ -47,11 +53,22 @@ class BigqueryBaseMetadata(pydantic.BaseModel):
     labels: dict[str, str] = {}
     tags: dict[str, str] = {}
 
+    @pydantic.field_validator("project_id", "dataset")
+    @classmethod
+    def intern_name(cls, value: str) -> str:
+        # Every entity of a dataset repeats the same project and dataset names
+        return sys.intern(value)
+
     @classmethod
     def from_dict(cls, metadata_dict: dict) -> Self:
         d = {k: v for k, v in metadata_dict.items() if k in BigqueryBaseMetadata.model_fields}
         return BigqueryBaseMetadata(**d)
 
+    def to_metadata(self, metadata_cls: type[MetadataType]) -> MetadataType:
+        """Copy the validated fields into another metadata class without dumping and revalidating them."""
+        d = {k: dict(v) if isinstance(v, dict) else v for k, v in self.__dict__.items() if k in metadata_cls.model_fields}
+        return metadata_cls.model_construct(_fields_set=set(self.model_fields_set), **d)
+
 
 class BigqueryDatasetMetadata(BigqueryBaseMetadata): ...
 
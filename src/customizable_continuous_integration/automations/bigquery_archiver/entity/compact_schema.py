@@ -0,0 +1,125 @@
+"""This module defines the compact in-memory representation of Bigquery schemas
+
+Entities with wide schemas hold one record per column, so columns are kept as named tuples instead of pydantic models.
+Their names, types and modes are interned, so the same strings repeated over columns and tables are held once. The
+pydantic entities keep the schema in this representation and still read and write the same manifest fields as
+`BigquerySchemaFieldEntity`, which remains the on-disk contract.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import functools
+import sys
+import typing
+
+import google.cloud.bigquery
+import pydantic
+
+DEFAULT_SCHEMA_FIELD_MODE = "NULLABLE"
+BIGQUERY_SCHEMA_FIELD_CACHE_SIZE = 8192
+
+
+class CompactSchemaField(typing.NamedTuple):
+    name: str
+    type: str
+    mode: str = DEFAULT_SCHEMA_FIELD_MODE
+    description: str | None = None
+    default_value_expression: str | None = None
+    fields: typing.Optional[tuple["CompactSchemaField", ...]] = None
+    is_nullable: bool = True
+
+    @classmethod
+    def from_dict(cls, data_dict: dict) -> "CompactSchemaField":
+        """Build a field from its manifest form or the API representation of a Bigquery schema field."""
+        sub_fields = data_dict.get("fields")
+        # `_make` skips the argument parsing of the generated `__new__`, which counts for every column
+        return cls._make(
+            (
+                sys.intern(data_dict["name"]),
+                sys.intern(data_dict["type"]),
+                sys.intern(data_dict.get("mode") or DEFAULT_SCHEMA_FIELD_MODE),
+                data_dict.get("description"),
+                data_dict.get("default_value_expression", data_dict.get("defaultValueExpression")),
+                tuple(cls.from_dict(f) for f in sub_fields) if sub_fields else None,
+                data_dict.get("is_nullable", True),
+            )
+        )
+
+    @classmethod
+    def from_bigquery_schema_field(cls, field: google.cloud.bigquery.SchemaField) -> "CompactSchemaField":
+        return cls._make(
+            (
+                sys.intern(field.name),
+                sys.intern(field.field_type),
+                sys.intern(field.mode or DEFAULT_SCHEMA_FIELD_MODE),
+                field.description,
+                field.default_value_expression,
+                tuple(cls.from_bigquery_schema_field(f) for f in field.fields) if field.fields else None,
+                True,
+            )
+        )
+
+    @classmethod
+    def from_value(cls, value: typing.Any) -> "CompactSchemaField":
+        if isinstance(value, CompactSchemaField):
+            return value
+        if isinstance(value, dict):
+            return cls.from_dict(value)
+        if isinstance(value, google.cloud.bigquery.SchemaField):
+            return cls.from_bigquery_schema_field(value)
+        if isinstance(value, pydantic.BaseModel):
+            return cls.from_dict(value.model_dump())
+        raise ValueError(f"Unsupported schema field {value!r}")
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        """Return the manifest form, the same as the dump of `BigquerySchemaFieldEntity`."""
+        return {
+            "name": self.name,
+            "type": self.type,
+            "mode": self.mode,
+            "description": self.description,
+            "default_value_expression": self.default_value_expression,
+            "fields": [f.to_dict() for f in self.fields] if self.fields else None,
+            "is_nullable": self.is_nullable,
+        }
+
+    def to_bigquery_schema_field(self) -> google.cloud.bigquery.SchemaField:
+        return to_bigquery_schema_field(self)
+
+
+@functools.lru_cache(maxsize=BIGQUERY_SCHEMA_FIELD_CACHE_SIZE)
+def to_bigquery_schema_field(field: CompactSchemaField) -> google.cloud.bigquery.SchemaField:
+    """Convert a field into a Bigquery schema field, the fields shared by tables are converted once and reused."""
+    return google.cloud.bigquery.SchemaField(
+        field.name,
+        field.type,
+        mode=field.mode,
+        description=field.description,
+        default_value_expression=field.default_value_expression,
+        fields=[f.to_bigquery_schema_field() for f in field.fields] if field.fields else [],
+    )
+
+
+def to_compact_schema(value: typing.Any) -> tuple[CompactSchemaField, ...]:
+    if value is None:
+        return ()
+    if isinstance(value, (str, bytes, dict)) or not isinstance(value, typing.Iterable):
+        raise ValueError(f"A schema should be a list of fields, not {type(value).__name__}")
+    return tuple(CompactSchemaField.from_value(v) for v in value)
+
+
+def dump_compact_schema(schema: tuple[CompactSchemaField, ...]) -> list[dict[str, typing.Any]]:
+    return [f.to_dict() for f in schema]
+
+
+# The schema field type of entities, validated straight into compact fields without building intermediate models
+CompactSchema = typing.Annotated[
+    tuple[CompactSchemaField, ...],
+    pydantic.PlainValidator(to_compact_schema),
+    pydantic.PlainSerializer(dump_compact_schema),
+]
@@ -0,0 +1,162 @@
+"""This module defines the compaction of exported table data files
+
+Bigquery shards table exports by itself, which leaves small tables with many tiny files. The compactor merges the
+small files of an export toward a target file size:
+  - CSV files are concatenated, by GCS compose on GCS without downloading them
+  - AVRO files are rewritten block by block into bigger files, which requires `fastavro` installed
+  - PARQUET files are rewritten into bigger files of bigger row groups, which requires `pyarrow` installed
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Return data file names relative to the data path
+"""
+
+import logging
+import shutil
+import typing
+
+import fsspec
+import google.cloud.bigquery.job
+
+DEFAULT_COMPACTION_TARGET_BYTES = 256 * 1024 * 1024
+DEFAULT_PARQUET_ROW_GROUP_ROWS = 1024 * 1024
+GCS_COMPOSE_MAX_SOURCES = 32
+COMPACTED_FILE_PREFIX = "compacted"
+
+
+def _import_fastavro() -> typing.Any:
+    try:
+        import fastavro
+    except ImportError as e:
+        raise ImportError("Compacting AVRO exports requires the `fastavro` package installed") from e
+    return fastavro
+
+
+def _import_pyarrow_parquet() -> typing.Any:
+    try:
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Compacting PARQUET exports requires the `pyarrow` package installed") from e
+    return pyarrow.parquet
+
+
+def plan_compaction(files: list[tuple[str, int]], target_bytes: int) -> list[list[str]]:
+    """Group files in order into groups of at most the target size, a file at or above the target stays alone.
+
+    Args:
+        files (list): The file paths with their sizes in bytes
+        target_bytes (int): The target size of the compacted files
+    Return:
+        list: The file groups, a group of a single file is kept as is
+    """
+    groups, group, group_bytes = [], [], 0
+    for path, size in files:
+        if group and group_bytes + size > target_bytes:
+            groups.append(group)
+            group, group_bytes = [], 0
+        group.append(path)
+        group_bytes += size
+    if group:
+        groups.append(group)
+    return groups
+
+
+class BigqueryExportCompactor(object):
+    def __init__(self, data_path: str, target_bytes: int = DEFAULT_COMPACTION_TARGET_BYTES, logger: logging.Logger = None) -> None:
+        self.fs, self.data_path = fsspec.core.url_to_fs(data_path)
+        self.target_bytes = target_bytes
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+
+    def list_files(self) -> list[tuple[str, int]]:
+        """Return the data files with their sizes, ordered by their paths."""
+        if not self.fs.exists(self.data_path):
+            return []
+        return sorted((i["name"], i["size"]) for i in self.fs.ls(self.data_path, detail=True) if i["type"] == "file")
+
+    def file_names(self) -> list[str]:
+        """Return the names of the data files relative to the data path, which stay valid when the archive is moved."""
+        return [p[len(self.data_path.rstrip("/")) + 1 :] for p, _ in self.list_files()]
+
+    def concatenate(self, destination: str, sources: list[str]) -> None:
+        """Concatenate files, by rounds of GCS compose when the file system supports it."""
+        if hasattr(self.fs, "merge"):
+            self.fs.merge(destination, sources[:GCS_COMPOSE_MAX_SOURCES])
+            for idx in range(GCS_COMPOSE_MAX_SOURCES, len(sources), GCS_COMPOSE_MAX_SOURCES - 1):
+                self.fs.merge(destination, [destination] + sources[idx : idx + GCS_COMPOSE_MAX_SOURCES - 1])
+            return
+        with self.fs.open(destination, "wb") as out:
+            for source in sources:
+                with self.fs.open(source, "rb") as f:
+                    shutil.copyfileobj(f, out)
+
+    def rewrite_avro(self, destination: str, sources: list[str]) -> None:
+        """Copy the blocks of AVRO files into a file with the schema and codec of the first one."""
+        fastavro = _import_fastavro()
+        with self.fs.open(destination, "wb") as out:
+            writer = None
+            for source in sources:
+                with self.fs.open(source, "rb") as f:
+                    reader = fastavro.block_reader(f)
+                    if writer is None:
+                        writer = fastavro.write.Writer(out, reader.writer_schema, codec=reader.metadata.get("avro.codec", "null"))
+                    for block in reader:
+                        writer.write_block(block)
+            if writer is not None:
+                writer.flush()
+
+    def rewrite_parquet(self, destination: str, sources: list[str], compression: str) -> None:
+        """Rewrite PARQUET files into a file of row groups of up to the default row group rows."""
+        pq = _import_pyarrow_parquet()
+        import pyarrow
+
+        with self.fs.open(destination, "wb") as out:
+            writer = None
+            batches, batch_rows = [], 0
+            for source in sources:
+                with self.fs.open(source, "rb") as f:
+                    for batch in pq.ParquetFile(f).iter_batches():
+                        if writer is None:
+                            writer = pq.ParquetWriter(out, batch.schema, compression=compression)
+                        batches.append(batch)
+                        batch_rows += batch.num_rows
+                        if batch_rows >= DEFAULT_PARQUET_ROW_GROUP_ROWS:
+                            writer.write_table(pyarrow.Table.from_batches(batches), row_group_size=batch_rows)
+                            batches, batch_rows = [], 0
+            if writer is not None:
+                if batches:
+                    writer.write_table(pyarrow.Table.from_batches(batches), row_group_size=batch_rows)
+                writer.close()
+
+    def compact(self, data_format: str, compression: str = None) -> list[str]:
+        """Compact the small files of the export and return the names of the resulting files.
+
+        Args:
+            data_format (str): The Bigquery destination format of the export
+            compression (str): The Bigquery compression of the export
+        Return:
+            list: The names of the data files after compaction, relative to the data path
+        """
+        files = self.list_files()
+        groups = [g for g in plan_compaction(files, self.target_bytes) if len(g) > 1]
+        for idx, group in enumerate(groups):
+            destination = f"{self.data_path}/{COMPACTED_FILE_PREFIX}-{idx:06d}"
+            if data_format == google.cloud.bigquery.job.DestinationFormat.CSV:
+                self.concatenate(destination, group)
+            elif data_format == google.cloud.bigquery.job.DestinationFormat.AVRO:
+                self.rewrite_avro(destination, group)
+            elif data_format == google.cloud.bigquery.job.DestinationFormat.PARQUET:
+                self.rewrite_parquet(destination, group, (compression or "none").lower())
+            else:
+                self.logger.warning(f"Skip compacting files of unsupported format {data_format} under {self.data_path}")
+                break
+            # The sources are only removed after the compacted file is completely written
+            self.fs.rm(group)
+        if groups:
+            self.logger.info(f"Compacted {sum(len(g) for g in groups)} of {len(files)} files under {self.data_path}")
+        return self.file_names()
@@ -9,13 +9,17 @@ Revision History:
   03/04/2025   Ryan, Gao       Set project in dataset gcs_prefix
   10/04/2025   Ryan, Gao       Add archive timestamp labels; Add skip_restore
   13/04/2025   Ryan, Gao       Support configurable statement replacements
+  19/10/2026   Ryan, Gao       Support compact and binary manifest codecs
+  19/10/2026   Ryan, Gao       Create the restored dataset with its metadata in one call
+  19/10/2026   Ryan, Gao       Keep the existing dataset in in-place overwrite
+  19/10/2026   Ryan, Gao       Copy metadata of generated entities without revalidation
+  19/10/2026   Ryan, Gao       Record restore metadata updates in timelines
+  19/10/2026   Ryan, Gao       Replace stale metadata of any existing restored dataset
 """
 
 import datetime
-import json
 import typing
 
-import fsspec
 import google.cloud.bigquery.table
 from typing_extensions import Self
 
@@ -32,11 +36,18 @@ from customizable_continuous_integration.automations.bigquery_archiver.entity.ro
     BigqueryArchiveFunctionEntity,
     BigqueryArchiveStoredProcedureEntity,
 )
+from customizable_continuous_integration.automations.bigquery_archiver.entity.serialization import (
+    DEFAULT_MANIFEST_CODEC,
+    detect_manifest_codec,
+    read_entity,
+    write_entity,
+)
 from customizable_continuous_integration.automations.bigquery_archiver.entity.table import BigqueryArchiveTableEntity
 from customizable_continuous_integration.automations.bigquery_archiver.entity.view import (
     BigqueryArchiveMaterializedViewEntity,
     BigqueryArchiveViewEntity,
 )
+from customizable_continuous_integration.common_libs.timeline import timeline_span
 
 
 class BigqueryArchivedDatasetEntity(BigqueryBaseArchiveEntity):
@@ -78,41 +89,36 @@ class BigqueryArchivedDatasetEntity(BigqueryBaseArchiveEntity):
     def generate_bigquery_archived_table(
         self, bigquery_item: google.cloud.bigquery.table.TableListItem, base_metadata: BigqueryBaseMetadata, **kwargs
     ) -> BigqueryArchiveTableEntity:
-        d = base_metadata.model_dump()
         extra_fields = {k: v for k, v in kwargs.items() if k in BigqueryArchiveTableEntity.model_fields}
-        extra_fields.update({"bigquery_metadata": BigqueryTableMetadata.from_dict(d)})
+        extra_fields.update({"bigquery_metadata": base_metadata.to_metadata(BigqueryTableMetadata)})
         return BigqueryArchiveTableEntity(**extra_fields)
 
     def generate_bigquery_archived_view(
         self, bigquery_item: google.cloud.bigquery.table.TableListItem, base_metadata: BigqueryBaseMetadata, defining_query: str, **kwargs
     ) -> BigqueryArchiveViewEntity:
-        d = base_metadata.model_dump()
         extra_fields = {k: v for k, v in kwargs.items() if k in BigqueryArchiveViewEntity.model_fields}
-        extra_fields.update({"bigquery_metadata": BigqueryViewMetadata.from_dict(d), "defining_query": defining_query})
+        extra_fields.update({"bigquery_metadata": base_metadata.to_metadata(BigqueryViewMetadata), "defining_query": defining_query})
         return BigqueryArchiveViewEntity(**extra_fields)
 
     def generate_bigquery_archived_materialized_view(
         self, bigquery_item: google.cloud.bigquery.table.TableListItem, base_metadata: BigqueryBaseMetadata, defining_query: str, **kwargs
     ) -> BigqueryArchiveMaterializedViewEntity:
-        d = base_metadata.model_dump()
         extra_fields = {k: v for k, v in kwargs.items() if k in BigqueryArchiveViewEntity.model_fields}
-        extra_fields.update({"bigquery_metadata": BigqueryViewMetadata.from_dict(d), "mview_query": defining_query})
+        extra_fields.update({"bigquery_metadata": base_metadata.to_metadata(BigqueryViewMetadata), "mview_query": defining_query})
         return BigqueryArchiveMaterializedViewEntity(**extra_fields)
 
     def generate_bigquery_archived_function(
         self, bigquery_item: google.cloud.bigquery.routine.Routine, base_metadata: BigqueryBaseMetadata, **kwargs
     ) -> BigqueryArchiveFunctionEntity:
-        d = base_metadata.model_dump()
         extra_fields = {k: v for k, v in kwargs.items() if k in BigqueryArchiveFunctionEntity.model_fields}
-        extra_fields.update({"bigquery_metadata": BigqueryBaseMetadata.from_dict(d)})
+        extra_fields.update({"bigquery_metadata": base_metadata.to_metadata(BigqueryBaseMetadata)})
         return BigqueryArchiveFunctionEntity(**extra_fields)
 
     def generate_bigquery_archived_stored_procedure(
         self, bigquery_item: google.cloud.bigquery.table.TableListItem, base_metadata: BigqueryBaseMetadata, **kwargs
     ) -> BigqueryArchiveViewEntity:
-        d = base_metadata.model_dump()
         extra_fields = {k: v for k, v in kwargs.items() if k in BigqueryArchiveFunctionEntity.model_fields}
-        extra_fields.update({"bigquery_metadata": BigqueryBaseMetadata.from_dict(d)})
+        extra_fields.update({"bigquery_metadata": base_metadata.to_metadata(BigqueryBaseMetadata)})
         return BigqueryArchiveStoredProcedureEntity(**extra_fields)
 
     def generate_bigquery_archived_external_table(
@@ -126,9 +132,8 @@ class BigqueryArchivedDatasetEntity(BigqueryBaseArchiveEntity):
                 partition_expiration_ms=bigquery_item.time_partitioning.expiration_ms or 0,
                 partition_require_filter=bigquery_item.time_partitioning.require_partition_filter or False,
             )
-        d = base_metadata.model_dump()
         extra_fields = {k: v for k, v in kwargs.items() if k in BigqueryArchiveTableEntity.model_fields}
-        extra_fields.update({"bigquery_metadata": BigqueryTableMetadata.from_dict(d), "partition_config": partition_config})
+        extra_fields.update({"bigquery_metadata": base_metadata.to_metadata(BigqueryTableMetadata), "partition_config": partition_config})
         return BigqueryArchiveGenericExternalTableEntity(**extra_fields)
 
     def generate_bigquery_archived_entity_from_table_item(
@@ -142,7 +147,7 @@ class BigqueryArchivedDatasetEntity(BigqueryBaseArchiveEntity):
         | BigqueryArchiveGenericExternalTableEntity
         | None
     ):
-        metadata_obj = BigqueryBaseMetadata.from_dict(self.bigquery_metadata.model_dump())
+        metadata_obj = self.bigquery_metadata.to_metadata(BigqueryBaseMetadata)
         metadata_obj.identity = bigquery_item.table_id if hasattr(bigquery_item, "table_id") else bigquery_item.routine_id
         metadata_obj.labels = bigquery_item.labels if hasattr(bigquery_item, "table_id") else {}
         if type(bigquery_item) is google.cloud.bigquery.routine.Routine:
@@ -264,11 +269,10 @@ class BigqueryArchivedDatasetEntity(BigqueryBaseArchiveEntity):
         return None
 
     def load_self(self, bigquery_client: google.cloud.bigquery.client.Client = None) -> Self:
-        with fsspec.open(self.metadata_serialized_path, "r") as f:
-            loaded_model = self.model_validate(json.load(f))
-            for k in loaded_model.model_fields:
-                if k in BigqueryArchivedDatasetEntity.model_fields:
-                    setattr(self, k, getattr(loaded_model, k))
+        loaded_model = read_entity(type(self), self.metadata_serialized_path, detect_manifest_codec(self.metadata_serialized_path))
+        for k in loaded_model.model_fields:
+            if k in BigqueryArchivedDatasetEntity.model_fields:
+                setattr(self, k, getattr(loaded_model, k))
 
     def fetch_self(self, bigquery_client: google.cloud.bigquery.client.Client = None) -> typing.Any:
         if not bigquery_client:
@@ -278,9 +282,12 @@ class BigqueryArchivedDatasetEntity(BigqueryBaseArchiveEntity):
         self.bigquery_metadata.labels = dataset.labels
 
     def archive_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, archive_config: dict = None) -> typing.Any:
+        if not archive_config:
+            archive_config = {}
         self.is_archived = True
-        with fsspec.open(self.metadata_serialized_path, "w") as f:
-            f.write(self.model_dump_json(indent=2))
+        self.actual_archive_metadata_path = write_entity(
+            self, self.metadata_serialized_path, archive_config.get("manifest_codec", DEFAULT_MANIFEST_CODEC)
+        )
 
     def restore_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, restore_config: dict = None) -> typing.Any:
         if not bigquery_client:
@@ -293,11 +300,17 @@ class BigqueryArchivedDatasetEntity(BigqueryBaseArchiveEntity):
         if restore_config.get("skip_restore", {}).get(self.identity, False):
             print(f"Skip restoring {self.entity_type} {fully_qualified_identity}")
             return
-        if restore_config.get("overwrite_existing", False):
+        if restore_config.get("overwrite_existing", False) and not self.overwrite_in_place(restore_config):
             bigquery_client.delete_dataset(fully_qualified_identity, delete_contents=True, not_found_ok=True)
-        dataset = bigquery_client.create_dataset(fully_qualified_identity, exists_ok=True)
+        restore_labels = self.restore_labels(restore_config)
+        dataset = google.cloud.bigquery.Dataset(fully_qualified_identity)
         dataset.description = self.bigquery_metadata.description
-        dataset.labels = self.bigquery_metadata.labels
-        if restore_config.get("attach_archive_ts_to_label", True):
-            dataset.labels["archive_ts"] = self.archived_datetime_str
-        bigquery_client.update_dataset(dataset, ["description", "labels"])
+        dataset.labels = restore_labels
+        with timeline_span("metadata-update", "metadata", dataset=fully_qualified_identity):
+            dataset = bigquery_client.create_dataset(dataset, exists_ok=True)
+        if dataset.description != self.bigquery_metadata.description or dataset.labels != restore_labels:
+            # An existing dataset keeps its other settings and contents, only its metadata is replaced, stale labels removed
+            dataset.description = self.bigquery_metadata.description
+            dataset.labels = {**{k: None for k in dataset.labels if k not in restore_labels}, **restore_labels}
+            with timeline_span("metadata-update", "metadata", dataset=fully_qualified_identity):
+                dataset = bigquery_client.update_dataset(dataset, ["description", "labels"])
@@ -0,0 +1,59 @@
+"""This module defines helpers to render Bigquery DDL statements of archived entities
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import json
+import typing
+
+
+def bigquery_string_literal(value: str) -> str:
+    """Render a python string as a double-quoted Bigquery string literal."""
+    return json.dumps(value or "", ensure_ascii=False)
+
+
+def bigquery_option_value(value: typing.Any) -> str:
+    """Render a python value as a Bigquery DDL option value.
+
+    Booleans and numbers are rendered as is, dictionaries as label-like arrays of tuples and lists as arrays of strings.
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, dict):
+        return f"[{', '.join([f'({bigquery_string_literal(k)}, {bigquery_string_literal(v)})' for k, v in value.items()])}]"
+    if isinstance(value, (list, tuple)):
+        return f"[{', '.join([bigquery_string_literal(v) for v in value])}]"
+    return bigquery_string_literal(value)
+
+
+def bigquery_options_clause(options: dict[str, typing.Any]) -> str:
+    """Render an `OPTIONS(...)` clause skipping the options of None value, or an empty string if nothing left."""
+    rendered = [f"{k}={bigquery_option_value(v)}" for k, v in options.items() if v is not None]
+    return f"OPTIONS({', '.join(rendered)})" if rendered else ""
+
+
+def bigquery_create_clause(object_kind: str, fully_qualified_identity: str, overwrite_existing: bool) -> str:
+    """Render the idempotent head of a CREATE statement.
+
+    Args:
+        object_kind (str): The DDL object kind, e.g. `VIEW`, `MATERIALIZED VIEW`, `FUNCTION` or `PROCEDURE`
+        fully_qualified_identity (str): The `project.dataset.name` of the object
+        overwrite_existing (bool): `CREATE OR REPLACE` when true, otherwise `CREATE ... IF NOT EXISTS`
+    Return:
+        str: The head of the CREATE statement
+    """
+    if overwrite_existing:
+        return f"CREATE OR REPLACE {object_kind} `{fully_qualified_identity}`"
+    return f"CREATE {object_kind} IF NOT EXISTS `{fully_qualified_identity}`"
+
+
+def bigquery_multi_statement_script(statements: list[str]) -> str:
+    """Join DDL statements into a multi-statement script, putting separators on their own lines to survive trailing comments."""
+    return "\n;\n".join([s.strip().rstrip(";") for s in statements])
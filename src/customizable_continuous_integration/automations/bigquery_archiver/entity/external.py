@@ -6,24 +6,28 @@ Revision History:
   Date         Author		   Comments
 ------------------------------------------------------------------------------
   11/04/2025   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Write compact manifests and validate them from bytes
+  19/10/2026   Ryan, Gao       Keep schema fields in the compact schema representation
+  19/10/2026   Ryan, Gao       Record restore metadata updates in timelines
 """
 
 import base64
-import json
 import pickle
 import typing
 
-import fsspec
 import google.cloud.bigquery.table
 from typing_extensions import Self
 
-from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigqueryBaseArchiveEntity, BigquerySchemaFieldEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigqueryBaseArchiveEntity
 from customizable_continuous_integration.automations.bigquery_archiver.entity.bigquery_metadata import BigqueryPartitionConfig, BigqueryTableMetadata
+from customizable_continuous_integration.automations.bigquery_archiver.entity.compact_schema import CompactSchema, to_compact_schema
+from customizable_continuous_integration.automations.bigquery_archiver.entity.serialization import read_entity, write_entity
+from customizable_continuous_integration.common_libs.timeline import timeline_span
 
 
 class BigqueryArchiveGenericExternalTableEntity(BigqueryBaseArchiveEntity):
     bigquery_metadata: BigqueryTableMetadata
-    schema_fields: list[BigquerySchemaFieldEntity] = []
+    schema_fields: CompactSchema = ()
     data_archive_format: str = google.cloud.bigquery.job.DestinationFormat.AVRO
     data_compression: str = google.cloud.bigquery.job.Compression.DEFLATE
     partition_config: BigqueryPartitionConfig | None = None
@@ -46,7 +50,7 @@ class BigqueryArchiveGenericExternalTableEntity(BigqueryBaseArchiveEntity):
         if not bigquery_client:
             bigquery_client = google.cloud.bigquery.Client(project=self.project_id)
         external_table = bigquery_client.get_table(self.fully_qualified_identity)
-        self.schema_fields = [BigquerySchemaFieldEntity.from_dict(f.to_api_repr()) for f in external_table.schema]
+        self.schema_fields = to_compact_schema(external_table.schema)
         self.bigquery_metadata.description = external_table.description
         self.b64encoded_external_data_configuration = base64.standard_b64encode(pickle.dumps(external_table.external_data_configuration))
         partition_config = None
@@ -77,15 +81,13 @@ class BigqueryArchiveGenericExternalTableEntity(BigqueryBaseArchiveEntity):
         self.is_archived = True
         self.actual_archive_metadata_path = self.metadata_serialized_path
         self.actual_archive_data_path = self.data_serialized_path
-        with fsspec.open(self.metadata_serialized_path, "w") as f:
-            f.write(self.model_dump_json(indent=2, exclude={"_external_data_configuration"}))
+        write_entity(self, self.metadata_serialized_path, exclude={"_external_data_configuration"})
 
     def load_self(self, bigquery_client: google.cloud.bigquery.client.Client = None) -> Self:
-        with fsspec.open(self.metadata_serialized_path, "r") as f:
-            loaded_model = self.model_validate(json.load(f))
-            for k in loaded_model.model_fields:
-                if k in BigqueryArchiveGenericExternalTableEntity.model_fields:
-                    setattr(self, k, getattr(loaded_model, k))
+        loaded_model = read_entity(type(self), self.metadata_serialized_path)
+        for k in loaded_model.model_fields:
+            if k in BigqueryArchiveGenericExternalTableEntity.model_fields:
+                setattr(self, k, getattr(loaded_model, k))
         self._external_data_configuration = pickle.loads(base64.standard_b64decode(self.b64encoded_external_data_configuration))
 
     def restore_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, restore_config: dict = None) -> typing.Any:
@@ -119,5 +121,6 @@ class BigqueryArchiveGenericExternalTableEntity(BigqueryBaseArchiveEntity):
         )
         if restore_config.get("attach_archive_ts_to_label", True):
             target_table.labels["archive_ts"] = self.archived_datetime_str
-        table = bigquery_client.create_table(target_table)
+        with timeline_span("metadata-update", "metadata", table=target_table.table_id):
+            table = bigquery_client.create_table(target_table)
         return table
@@ -8,15 +8,21 @@ Revision History:
   23/02/2025   Ryan, Gao       Initial creation
   10/04/2025   Ryan, Gao       Add description field in the restore method; Add skip_restore
   12/06/2025   Ryan, Gao       Add js function with STRUCT return type support
+  19/10/2026   Ryan, Gao       Write compact manifests and validate them from bytes
+  19/10/2026   Ryan, Gao       Add restore DDL generation for batched restore
+  19/10/2026   Ryan, Gao       Restore functions and procedures by a single DDL job
+  19/10/2026   Ryan, Gao       Record restore job waits in timelines
 """
 
 import typing
 
-import fsspec
 import google.cloud.bigquery.table
 
 from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigqueryBaseArchiveEntity, BigquerySchemaFieldEntity
 from customizable_continuous_integration.automations.bigquery_archiver.entity.bigquery_metadata import BigqueryBaseMetadata
+from customizable_continuous_integration.automations.bigquery_archiver.entity.ddl import bigquery_create_clause, bigquery_options_clause
+from customizable_continuous_integration.automations.bigquery_archiver.entity.serialization import write_entity
+from customizable_continuous_integration.common_libs.timeline import timeline_span
 
 
 class BigqueryArchiveFunctionEntity(BigqueryBaseArchiveEntity):
@@ -53,8 +59,7 @@ class BigqueryArchiveFunctionEntity(BigqueryBaseArchiveEntity):
     def archive_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, archive_config: dict = None) -> typing.Any:
         self.is_archived = True
         self.actual_archive_metadata_path = self.metadata_serialized_path
-        with fsspec.open(self.metadata_serialized_path, "w") as f:
-            f.write(self.model_dump_json(indent=2))
+        write_entity(self, self.metadata_serialized_path)
 
     def restore_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, restore_config: dict = None) -> typing.Any:
         if not bigquery_client:
@@ -67,22 +72,34 @@ class BigqueryArchiveFunctionEntity(BigqueryBaseArchiveEntity):
         if restore_config.get("skip_restore", {}).get(self.identity, False):
             print(f"Skip restoring {self.entity_type} {fully_qualified_identity}")
             return
-        if restore_config.get("overwrite_existing", False):
-            bigquery_client.delete_routine(fully_qualified_identity, not_found_ok=True)
+        job = bigquery_client.query(
+            self.generate_restore_ddl(restore_config),
+            job_id_prefix=f"restore_{self.bigquery_metadata.dataset}_{self.identity}_{self.archived_datetime_str}",
+        )
+        with timeline_span("job-wait", "job", job_id=job.job_id):
+            job.result()
+        return job
+
+    def generate_restore_ddl(self, restore_config: dict = None) -> str:
+        if not restore_config:
+            restore_config = {}
+        create_clause = bigquery_create_clause("FUNCTION", self.fully_qualified_identity, restore_config.get("overwrite_existing", False))
+        arguments_clause = ", ".join([f"{arg['name']} {arg['data_type']}" for arg in self.arguments])
+        returns_clause = f"RETURNS {self.return_type}" if self.return_type else ""
+        if self.language == "SQL":
+            options_clause = bigquery_options_clause({"description": self.bigquery_metadata.description})
+            return f"""{create_clause}({arguments_clause})
+                   {returns_clause}
+                   AS ({self.body})
+                   {options_clause}"""
         language_clause = {"JAVASCRIPT": "LANGUAGE js", "PYTHON": "LANGUAGE python"}.get(self.language, "")
-        left_syntax_delimiter = "r\"\"\"" if self.language != "SQL" else "("
-        right_syntax_delimiter = "\"\"\"" if self.language != "SQL" else ")"
-        stmt = f"""CREATE FUNCTION `{fully_qualified_identity}`({", ".join([f"{arg['name']} {arg['data_type']}" for arg in self.arguments])})
-                   RETURNS {self.return_type}
+        options_clause = bigquery_options_clause({"description": self.bigquery_metadata.description, "library": self.imported_libraries or None})
+        body_delimiter = '"""'
+        return f"""{create_clause}({arguments_clause})
+                   {returns_clause}
                    {language_clause}
-                   AS {left_syntax_delimiter}{self.body}{right_syntax_delimiter}
-                """
-        job = bigquery_client.query(stmt)
-        job.result()
-        routine = bigquery_client.get_routine(fully_qualified_identity)
-        routine.description = self.bigquery_metadata.description
-        routine = bigquery_client.update_routine(routine, ["description", "type_", "body", "arguments", "language", "return_type"])
-        return routine
+                   {options_clause}
+                   AS r{body_delimiter}{self.body}{body_delimiter}"""
 
     def modify_self_query(self, modify_config: dict) -> typing.Any:
         replacement_mapping = modify_config.get("replacement_mapping", {})
@@ -119,8 +136,7 @@ class BigqueryArchiveStoredProcedureEntity(BigqueryBaseArchiveEntity):
     def archive_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, archive_config: dict = None) -> typing.Any:
         self.is_archived = True
         self.actual_archive_metadata_path = self.metadata_serialized_path
-        with fsspec.open(self.metadata_serialized_path, "w") as f:
-            f.write(self.model_dump_json(indent=2))
+        write_entity(self, self.metadata_serialized_path)
 
     def restore_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, restore_config: dict = None) -> typing.Any:
         if not bigquery_client:
@@ -133,17 +149,22 @@ class BigqueryArchiveStoredProcedureEntity(BigqueryBaseArchiveEntity):
         if restore_config.get("skip_restore", {}).get(self.identity, False):
             print(f"Skip restoring {self.entity_type} {fully_qualified_identity}")
             return
-        if restore_config.get("overwrite_existing", False):
-            bigquery_client.delete_routine(fully_qualified_identity, not_found_ok=True)
-        stmt = f"""CREATE PROCEDURE `{fully_qualified_identity}`({", ".join([f"{arg['name']} {arg['data_type']}" for arg in self.arguments])})
-                   {self.body}
-                """
-        job = bigquery_client.query(stmt)
-        job.result()
-        routine = bigquery_client.get_routine(fully_qualified_identity)
-        routine.description = self.bigquery_metadata.description
-        routine = bigquery_client.update_routine(routine, ["description", "type_", "body", "arguments", "language", "return_type"])
-        return routine
+        job = bigquery_client.query(
+            self.generate_restore_ddl(restore_config),
+            job_id_prefix=f"restore_{self.bigquery_metadata.dataset}_{self.identity}_{self.archived_datetime_str}",
+        )
+        with timeline_span("job-wait", "job", job_id=job.job_id):
+            job.result()
+        return job
+
+    def generate_restore_ddl(self, restore_config: dict = None) -> str:
+        if not restore_config:
+            restore_config = {}
+        create_clause = bigquery_create_clause("PROCEDURE", self.fully_qualified_identity, restore_config.get("overwrite_existing", False))
+        options_clause = bigquery_options_clause({"description": self.bigquery_metadata.description})
+        return f"""{create_clause}({", ".join([f"{arg['name']} {arg['data_type']}" for arg in self.arguments])})
+                   {options_clause}
+                   {self.body}"""
 
     def modify_self_query(self, modify_config: dict) -> typing.Any:
         replacement_mapping = modify_config.get("replacement_mapping", {})
@@ -0,0 +1,181 @@
+"""This module defines the serialization layer of archived entity manifests
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Add streamed manifest writer
+  19/10/2026   Ryan, Gao       Record manifest I/O in timelines
+"""
+
+import json
+import typing
+
+import fsspec
+import pydantic
+
+from customizable_continuous_integration.common_libs.timeline import timeline_span
+
+ModelType = typing.TypeVar("ModelType", bound=pydantic.BaseModel)
+
+MANIFEST_CODEC_JSON = "json"
+MANIFEST_CODEC_MSGPACK = "msgpack"
+MANIFEST_CODEC_MSGPACK_ZSTD = "msgpack+zstd"
+DEFAULT_MANIFEST_CODEC = MANIFEST_CODEC_JSON
+
+MANIFEST_CODEC_SUFFIXES = {
+    MANIFEST_CODEC_JSON: ".json",
+    MANIFEST_CODEC_MSGPACK: ".msgpack",
+    MANIFEST_CODEC_MSGPACK_ZSTD: ".msgpack.zst",
+}
+
+
+def _import_msgpack() -> typing.Any:
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError("The msgpack manifest codec requires the `msgpack` package installed") from e
+    return msgpack
+
+
+def _import_zstandard() -> typing.Any:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("The msgpack+zstd manifest codec requires the `zstandard` package installed") from e
+    return zstandard
+
+
+def validate_manifest_codec(codec: str) -> str:
+    codec = (codec or DEFAULT_MANIFEST_CODEC).lower()
+    if codec not in MANIFEST_CODEC_SUFFIXES:
+        raise ValueError(f"Unsupported manifest codec {codec}, available codecs: {list(MANIFEST_CODEC_SUFFIXES.keys())}")
+    return codec
+
+
+def manifest_codec_path(json_path: str, codec: str) -> str:
+    """Return the manifest path of a codec from its canonical json path.
+
+    Args:
+        json_path (str): The canonical manifest path ending with `.json`
+        codec (str): The manifest codec
+    Return:
+        str: The manifest path carrying the codec suffix
+    """
+    codec = validate_manifest_codec(codec)
+    stem = json_path[: -len(".json")] if json_path.endswith(".json") else json_path
+    return f"{stem}{MANIFEST_CODEC_SUFFIXES[codec]}"
+
+
+def serialize_entity(entity: pydantic.BaseModel, codec: str = DEFAULT_MANIFEST_CODEC, **dump_kwargs) -> bytes:
+    """Serialize an entity model into bytes without indentation.
+
+    Args:
+        entity (BaseModel): The pydantic entity to be serialized
+        codec (str): One of `json`, `msgpack` or `msgpack+zstd`
+        dump_kwargs: Extra keyword arguments passed to pydantic dump methods, e.g. `exclude`
+    Return:
+        bytes: The serialized payload
+    """
+    codec = validate_manifest_codec(codec)
+    if codec == MANIFEST_CODEC_JSON:
+        return entity.model_dump_json(**dump_kwargs).encode("utf-8")
+    payload = _import_msgpack().packb(entity.model_dump(mode="json", **dump_kwargs), use_bin_type=True)
+    if codec == MANIFEST_CODEC_MSGPACK_ZSTD:
+        payload = _import_zstandard().ZstdCompressor().compress(payload)
+    return payload
+
+
+def deserialize_entity(model_cls: type[ModelType], payload: bytes, codec: str = DEFAULT_MANIFEST_CODEC) -> ModelType:
+    """Validate an entity model from serialized bytes.
+
+    The json codec is validated by pydantic-core straight from bytes, so no intermediate python object tree is built.
+    Args:
+        model_cls (type): The pydantic model class to validate against
+        payload (bytes): The serialized payload
+        codec (str): One of `json`, `msgpack` or `msgpack+zstd`
+    Return:
+        BaseModel: The validated entity
+    """
+    codec = validate_manifest_codec(codec)
+    if codec == MANIFEST_CODEC_JSON:
+        return model_cls.model_validate_json(payload)
+    if codec == MANIFEST_CODEC_MSGPACK_ZSTD:
+        payload = _import_zstandard().ZstdDecompressor().decompressobj().decompress(payload)
+    return model_cls.model_validate(_import_msgpack().unpackb(payload, raw=False))
+
+
+def write_entity(entity: pydantic.BaseModel, path: str, codec: str = DEFAULT_MANIFEST_CODEC, **dump_kwargs) -> str:
+    """Write an entity model to a fsspec path and return the actual path written."""
+    actual_path = manifest_codec_path(path, codec)
+    with timeline_span("metadata-io", "io", path=actual_path), fsspec.open(actual_path, "wb") as f:
+        f.write(serialize_entity(entity, codec, **dump_kwargs))
+    return actual_path
+
+
+def write_streamed_entity(
+    entity: pydantic.BaseModel, path: str, codec: str, streamed_fields: dict[str, typing.Tuple[int, typing.Iterable[str]]]
+) -> str:
+    """Write an entity model whose list fields are streamed item by item, and return the actual path written.
+
+    The list fields are never held as a whole, so the manifest of any amount of entities is written in flat memory,
+    and it is read back by `read_entity` the same as the manifests written by `write_entity`.
+    Args:
+        entity (BaseModel): The pydantic entity carrying every field but the streamed ones
+        path (str): The canonical manifest path ending with `.json`
+        codec (str): One of `json`, `msgpack` or `msgpack+zstd`
+        streamed_fields (dict): The list fields with their item counts and iterables of serialized json items
+    Return:
+        str: The manifest path carrying the codec suffix
+    """
+    codec = validate_manifest_codec(codec)
+    actual_path = manifest_codec_path(path, codec)
+    exclude = set(streamed_fields.keys())
+    with timeline_span("metadata-io", "io", path=actual_path), fsspec.open(actual_path, "wb") as f:
+        if codec == MANIFEST_CODEC_JSON:
+            f.write(entity.model_dump_json(exclude=exclude)[:-1].encode("utf-8"))
+            for field_name, (_, items) in streamed_fields.items():
+                f.write(f',"{field_name}":['.encode("utf-8"))
+                for idx, item in enumerate(items):
+                    f.write(f"{',' if idx else ''}{item}".encode("utf-8"))
+                f.write(b"]")
+            f.write(b"}")
+            return actual_path
+        msgpack = _import_msgpack()
+        out = _import_zstandard().ZstdCompressor().stream_writer(f, closefd=False) if codec == MANIFEST_CODEC_MSGPACK_ZSTD else f
+        packer = msgpack.Packer(use_bin_type=True)
+        fields = entity.model_dump(mode="json", exclude=exclude)
+        out.write(packer.pack_map_header(len(fields) + len(streamed_fields)))
+        for k, v in fields.items():
+            out.write(packer.pack(k) + packer.pack(v))
+        for field_name, (count, items) in streamed_fields.items():
+            out.write(packer.pack(field_name) + packer.pack_array_header(count))
+            for item in items:
+                out.write(packer.pack(json.loads(item)))
+        if out is not f:
+            out.close()
+    return actual_path
+
+
+def read_entity(model_cls: type[ModelType], path: str, codec: str = DEFAULT_MANIFEST_CODEC) -> ModelType:
+    """Read an entity model from a fsspec path."""
+    with timeline_span("metadata-io", "io", path=path), fsspec.open(manifest_codec_path(path, codec), "rb") as f:
+        return deserialize_entity(model_cls, f.read(), codec)
+
+
+def detect_manifest_codec(json_path: str) -> str:
+    """Detect the codec of an existing manifest by probing the codec suffixes.
+
+    Args:
+        json_path (str): The canonical manifest path ending with `.json`
+    Return:
+        str: The detected codec, falling back to json when nothing else is found
+    """
+    fs, _ = fsspec.core.url_to_fs(json_path)
+    for codec in MANIFEST_CODEC_SUFFIXES:
+        _, candidate_path = fsspec.core.url_to_fs(manifest_codec_path(json_path, codec))
+        if fs.exists(candidate_path):
+            return codec
+    return DEFAULT_MANIFEST_CODEC
@@ -9,27 +9,72 @@ Revision History:
   04/04/2025   Ryan, Gao       Set DEFLATE as default compression
   10/04/2025   Ryan, Gao       Add archive timestamp labels; Add skip_restore; Add range partitioning
   16/04/2025   Ryan, Gao       AVRO DATETIME:https://cloud.google.com/bigquery/docs/exporting-data#avro_export_details
+  19/10/2026   Ryan, Gao       Write compact manifests and validate them from bytes
+  19/10/2026   Ryan, Gao       Fold restored table metadata into the load job or the staging CTAS
+  19/10/2026   Ryan, Gao       Overwrite in place by WRITE_TRUNCATE loads
+  19/10/2026   Ryan, Gao       Compact exported files and record them for restoring
+  19/10/2026   Ryan, Gao       Keep schema fields in the compact schema representation
+  19/10/2026   Ryan, Gao       Record job waits, data listing and metadata updates in timelines
+  19/10/2026   Ryan, Gao       Add mount restore over the archived data files and the materialization of mounted tables
+  19/10/2026   Ryan, Gao       Record data files relative to the data path
+  19/10/2026   Ryan, Gao       Leave destination table properties out of in-place loads
+  19/10/2026   Ryan, Gao       Remove stale labels of tables overwritten in place
 """
 
-import json
 import typing
-from copy import deepcopy
 
-import fsspec
 import google.cloud.bigquery.enums
 import google.cloud.bigquery.table
 from typing_extensions import Self
 
-from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigqueryBaseArchiveEntity, BigquerySchemaFieldEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigqueryBaseArchiveEntity
 from customizable_continuous_integration.automations.bigquery_archiver.entity.bigquery_metadata import BigqueryPartitionConfig, BigqueryTableMetadata
+from customizable_continuous_integration.automations.bigquery_archiver.entity.compact_schema import CompactSchema, to_compact_schema
+from customizable_continuous_integration.automations.bigquery_archiver.entity.compaction import (
+    DEFAULT_COMPACTION_TARGET_BYTES,
+    BigqueryExportCompactor,
+)
+from customizable_continuous_integration.automations.bigquery_archiver.entity.ddl import (
+    bigquery_create_clause,
+    bigquery_options_clause,
+    bigquery_string_literal,
+)
+from customizable_continuous_integration.automations.bigquery_archiver.entity.serialization import read_entity, write_entity
+from customizable_continuous_integration.common_libs.timeline import timeline_span
+
+# A load job accepts up to 10,000 source URIs, more data files are loaded by the wildcard URI
+BIGQUERY_LOAD_MAX_SOURCE_URIS = 10000
+
+TABLE_RESTORE_MODE_LOAD = "load"
+TABLE_RESTORE_MODE_MOUNT = "mount"
+# Marks the views over the archived data files, so only mounted tables are materialized
+MOUNTED_TABLE_LABEL = ("restore_mode", TABLE_RESTORE_MODE_MOUNT)
+
+
+def hive_partition_keys(data_files: list[str]) -> tuple[str, ...]:
+    """Return the hive partition keys of the data files laid out as `key1=value1/key2=value2/file` under the data path.
+
+    An empty tuple is returned when any data file is not under such directories, or the files do not share the same keys.
+    """
+    partition_keys = None
+    for data_file in data_files:
+        directories = data_file.split("/")[:-1]
+        if not directories or not all("=" in d and not d.startswith("=") for d in directories):
+            return ()
+        file_partition_keys = tuple(d.split("=", 1)[0] for d in directories)
+        if partition_keys is not None and file_partition_keys != partition_keys:
+            return ()
+        partition_keys = file_partition_keys
+    return partition_keys or ()
 
 
 class BigqueryArchiveTableEntity(BigqueryBaseArchiveEntity):
     bigquery_metadata: BigqueryTableMetadata
-    schema_fields: list[BigquerySchemaFieldEntity] = []
+    schema_fields: CompactSchema = ()
     data_archive_format: str = google.cloud.bigquery.job.DestinationFormat.AVRO
     data_compression: str = google.cloud.bigquery.job.Compression.DEFLATE
     partition_config: BigqueryPartitionConfig | None = None
+    data_files: list[str] = []
 
     @property
     def entity_type(self) -> str:
@@ -43,11 +88,16 @@ class BigqueryArchiveTableEntity(BigqueryBaseArchiveEntity):
     def data_serialized_path(self):
         return f"{self.gcs_prefix}/table={self.identity}/data"
 
+    @property
+    def data_file_uris(self) -> list[str]:
+        """The URIs of the data files, which are recorded relative to the data path to survive moving the archive."""
+        return [f"{self.data_serialized_path}/{f}" for f in self.data_files]
+
     def fetch_self(self, bigquery_client: google.cloud.bigquery.client.Client = None) -> typing.Any:
         if not bigquery_client:
             bigquery_client = google.cloud.bigquery.Client(project=self.project_id)
         table = bigquery_client.get_table(self.fully_qualified_identity)
-        self.schema_fields = [BigquerySchemaFieldEntity.from_dict(f.to_api_repr()) for f in table.schema]
+        self.schema_fields = to_compact_schema(table.schema)
         self.bigquery_metadata.description = table.description
         partition_config = None
         if table.time_partitioning:
@@ -100,96 +150,251 @@ class BigqueryArchiveTableEntity(BigqueryBaseArchiveEntity):
     def archive_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, archive_config: dict = None) -> typing.Any:
         if not bigquery_client:
             bigquery_client = google.cloud.bigquery.Client(project=self.project_id)
+        if not archive_config:
+            archive_config = {}
+        compact_data = archive_config.get("table_data_compaction", False)
         self.is_archived = True
         self.actual_archive_metadata_path = self.metadata_serialized_path
         self.actual_archive_data_path = self.data_serialized_path
 
-        with fsspec.open(self.metadata_serialized_path, "w") as f:
-            f.write(self.model_dump_json(indent=2))
+        write_entity(self, self.metadata_serialized_path)
+        extract_job_config = google.cloud.bigquery.job.ExtractJobConfig(
+            destination_format=self.data_archive_format, compression=self.data_compression, use_avro_logical_types=True
+        )
+        if compact_data and self.data_archive_format == google.cloud.bigquery.job.DestinationFormat.CSV:
+            # Headers of CSV files would be rows in the middle of the concatenated files
+            extract_job_config.print_header = False
         export_job = bigquery_client.extract_table(
             job_id_prefix=f"archive_{self.bigquery_metadata.dataset}_{self.identity}_{self.archived_datetime_str}",
             source=self.fully_qualified_identity,
             destination_uris=[f"{self.data_serialized_path}/*"],
-            job_config=google.cloud.bigquery.job.ExtractJobConfig(
-                destination_format=self.data_archive_format, compression=self.data_compression, use_avro_logical_types=True
-            ),
+            job_config=extract_job_config,
         )
-        ret = export_job.result()
+        with timeline_span("job-wait", "job", job_id=export_job.job_id):
+            ret = export_job.result()
+        compactor = BigqueryExportCompactor(
+            self.data_serialized_path, archive_config.get("table_data_compaction_target_bytes", DEFAULT_COMPACTION_TARGET_BYTES)
+        )
+        with timeline_span("data-compaction" if compact_data else "data-listing", "io", path=self.data_serialized_path):
+            self.data_files = compactor.compact(self.data_archive_format, self.data_compression) if compact_data else compactor.file_names()
+        write_entity(self, self.metadata_serialized_path)
         return ret
 
     def load_self(self, bigquery_client: google.cloud.bigquery.client.Client = None) -> Self:
-        with fsspec.open(self.metadata_serialized_path, "r") as f:
-            loaded_model = self.model_validate(json.load(f))
-            for k in loaded_model.model_fields:
-                if k in BigqueryArchiveTableEntity.model_fields:
-                    setattr(self, k, getattr(loaded_model, k))
+        loaded_model = read_entity(type(self), self.metadata_serialized_path)
+        for k in loaded_model.model_fields:
+            if k in BigqueryArchiveTableEntity.model_fields:
+                setattr(self, k, getattr(loaded_model, k))
+
+    def restore_table_mode(self, restore_config: dict) -> str:
+        return (
+            restore_config.get("table_restore_mode_mapping", {}).get(self.identity, None)
+            or restore_config.get("table_restore_mode", TABLE_RESTORE_MODE_LOAD)
+        ).lower()
+
+    def restore_destination_identity(self) -> str:
+        if self.destination_gcp_project_id and self.destination_bigquery_dataset:
+            return f"{self.destination_gcp_project_id}.{self.destination_bigquery_dataset}.{self.identity}"
+        return self.fully_qualified_identity
+
+    def restore_temp_table_identity(self, prefix: str) -> str:
+        return f"{self.destination_gcp_project_id or self.project_id}.{self.destination_bigquery_dataset or self.dataset}.{prefix}_{self.identity}_{self.archived_datetime_str}"
 
     def restore_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, restore_config: dict = None) -> typing.Any:
         if not bigquery_client:
             bigquery_client = google.cloud.bigquery.Client(project=self.project_id)
         if not restore_config:
             restore_config = {}
-        fully_qualified_identity = self.fully_qualified_identity
-        if self.destination_gcp_project_id and self.destination_bigquery_dataset:
-            fully_qualified_identity = f"{self.destination_gcp_project_id}.{self.destination_bigquery_dataset}.{self.identity}"
+        fully_qualified_identity = self.restore_destination_identity()
         if restore_config.get("skip_restore", {}).get(self.identity, False):
             print(f"Skip restoring {self.entity_type} {fully_qualified_identity}")
             return
         self.determine_data_archive_format_compression(restore_config)
+        if self.restore_table_mode(restore_config) == TABLE_RESTORE_MODE_MOUNT:
+            if self.data_archive_format != google.cloud.bigquery.job.DestinationFormat.CSV:
+                return self.mount_self(bigquery_client, restore_config)
+            print(f"CSV data of {self.entity_type} {fully_qualified_identity} can not be mounted, it is loaded instead")
+        if restore_config.get("overwrite_existing", False) and not self.overwrite_in_place(restore_config):
+            bigquery_client.delete_table(fully_qualified_identity, not_found_ok=True)
+        return self.load_data(bigquery_client, restore_config, fully_qualified_identity)
+
+    def load_data(self, bigquery_client: google.cloud.bigquery.client.Client, restore_config: dict, destination: str) -> typing.Any:
+        """Load the archived data files into the native table `destination` with the archived schema, partitioning and metadata."""
         use_stage = (self.data_archive_format == google.cloud.bigquery.job.DestinationFormat.AVRO) and (
             any([True if f.type == google.cloud.bigquery.enums.SqlTypeNames.DATETIME.value else False for f in self.schema_fields])
         )
-        stage_table_name = f"{self.destination_gcp_project_id or self.project_id}.{self.destination_bigquery_dataset or self.dataset}.temp_stg_load_{self.identity}_{self.archived_datetime_str}"
+        stage_table_name = self.restore_temp_table_identity("temp_stg_load")
         restore_table_schema = [f.to_bigquery_schema_field() for f in self.schema_fields] if self.schema_fields else []
         if use_stage:
             restore_table_schema = []
-            saved_schema = deepcopy(self.schema_fields)
-            for s in saved_schema:
+            for s in self.schema_fields:
                 if s.type == google.cloud.bigquery.enums.SqlTypeNames.DATETIME.value:
-                    s.type = google.cloud.bigquery.enums.SqlTypeNames.STRING.value
+                    s = s._replace(type=google.cloud.bigquery.enums.SqlTypeNames.STRING.value)
                 restore_table_schema.append(s.to_bigquery_schema_field())
-        if restore_config.get("overwrite_existing", False):
-            bigquery_client.delete_table(fully_qualified_identity, not_found_ok=True)
+        overwrite_in_place = self.overwrite_in_place(restore_config)
+        load_job_config = google.cloud.bigquery.job.LoadJobConfig(
+            source_format=self.data_archive_format,
+            schema=restore_table_schema if self.schema_fields else None,
+            time_partitioning=(
+                self.partition_config.to_bigquery_time_partitioning()
+                if self.partition_config and self.partition_config.partition_category == "TIME" and not use_stage
+                else None
+            ),
+            range_partitioning=(
+                self.partition_config.to_bigquery_range_partitioning()
+                if self.partition_config and self.partition_config.partition_category == "RANGE" and not use_stage
+                else None
+            ),
+            use_avro_logical_types=True,
+            write_disposition=google.cloud.bigquery.job.WriteDisposition.WRITE_TRUNCATE if overwrite_in_place else None,
+        )
+        if not use_stage and not overwrite_in_place:
+            load_job_config.destination_table_description = self.bigquery_metadata.description
+            # LoadJobConfig only exposes the description of destinationTableProperties, so labels are set in its API representation
+            load_job_config_repr = load_job_config.to_api_repr()
+            load_job_config_repr["load"].setdefault("destinationTableProperties", {})["labels"] = self.restore_labels(restore_config)
+            load_job_config = google.cloud.bigquery.job.LoadJobConfig.from_api_repr(load_job_config_repr)
         load_job = bigquery_client.load_table_from_uri(
-            source_uris=f"{self.data_serialized_path}/*",
-            destination=stage_table_name if use_stage else fully_qualified_identity,
+            source_uris=self.data_file_uris if 0 < len(self.data_files) <= BIGQUERY_LOAD_MAX_SOURCE_URIS else f"{self.data_serialized_path}/*",
+            destination=stage_table_name if use_stage else destination,
             job_id_prefix=f"restore_{self.bigquery_metadata.dataset}_{self.identity}_{self.archived_datetime_str}",
-            job_config=google.cloud.bigquery.job.LoadJobConfig(
-                source_format=self.data_archive_format,
-                schema=restore_table_schema if self.schema_fields else None,
-                destination_table_description=self.bigquery_metadata.description,
-                time_partitioning=(
-                    self.partition_config.to_bigquery_time_partitioning()
-                    if self.partition_config and self.partition_config.partition_category == "TIME" and not use_stage
-                    else None
-                ),
-                range_partitioning=(
-                    self.partition_config.to_bigquery_range_partitioning()
-                    if self.partition_config and self.partition_config.partition_category == "RANGE" and not use_stage
-                    else None
-                ),
-                use_avro_logical_types=True,
-            ),
+            job_config=load_job_config,
         )
-        load_job.result()
-        if use_stage:
-            datetime_fields = [f.name for f in self.schema_fields if f.type == google.cloud.bigquery.enums.SqlTypeNames.DATETIME.value]
-            cast_datetime_fields = [f"CAST({f} AS DATETIME) AS {f}" for f in datetime_fields]
-            partition_clause = ""
-            if self.partition_config and self.partition_config.partition_category == "TIME":
-                partition_clause = f"PARTITION BY {self.partition_config.partition_field}"
-            elif self.partition_config and self.partition_config.partition_category == "RANGE":
-                partition_clause = f"PARTITION BY RANGE_BUCKET({self.partition_config.partition_field}, GENERATE_ARRAY({self.partition_config.partition_range[0]}, {self.partition_config.partition_range[1]}, {self.partition_config.partition_range[2]}))"
-            create_sql = f"""
-                CREATE OR REPLACE TABLE `{self.fully_qualified_identity}` {partition_clause} AS
-                SELECT * except({",".join(datetime_fields)}), {",".join(cast_datetime_fields)} FROM `{stage_table_name}`
-                """
-            bigquery_client.query(create_sql).result()
-            bigquery_client.delete_table(f"{stage_table_name}", not_found_ok=True)
-        table = bigquery_client.get_table(fully_qualified_identity)
-        table.labels = self.bigquery_metadata.labels
+        with timeline_span("job-wait", "job", job_id=load_job.job_id):
+            load_job.result()
+        if not use_stage and overwrite_in_place:
+            # Destination table properties fail loads into existing tables with other metadata, so they are left out of
+            # in-place loads, and the metadata of the truncated table is replaced here, stale labels removed since a labels
+            # patch only adds or overwrites keys
+            restore_labels = self.restore_labels(restore_config)
+            with timeline_span("metadata-update", "metadata", table=destination):
+                table = bigquery_client.get_table(destination)
+                table.description = self.bigquery_metadata.description
+                table.labels = {**{k: None for k in table.labels if k not in restore_labels}, **restore_labels}
+                bigquery_client.update_table(table, ["description", "labels"])
+        if not use_stage:
+            return load_job
+        datetime_fields = [f.name for f in self.schema_fields if f.type == google.cloud.bigquery.enums.SqlTypeNames.DATETIME.value]
+        cast_datetime_fields = [f"CAST({f} AS DATETIME) AS {f}" for f in datetime_fields]
+        partition_clause = ""
+        if self.partition_config and self.partition_config.partition_category == "TIME":
+            partition_clause = f"PARTITION BY {self.partition_config.partition_field}"
+        elif self.partition_config and self.partition_config.partition_category == "RANGE":
+            partition_clause = f"PARTITION BY RANGE_BUCKET({self.partition_config.partition_field}, GENERATE_ARRAY({self.partition_config.partition_range[0]}, {self.partition_config.partition_range[1]}, {self.partition_config.partition_range[2]}))"
+        options_clause = bigquery_options_clause({"description": self.bigquery_metadata.description, "labels": self.restore_labels(restore_config)})
+        create_sql = f"""
+            CREATE OR REPLACE TABLE `{destination}` {partition_clause} {options_clause} AS
+            SELECT * except({",".join(datetime_fields)}), {",".join(cast_datetime_fields)} FROM `{stage_table_name}`
+            """
+        create_job = bigquery_client.query(create_sql)
+        with timeline_span("job-wait", "job", job_id=create_job.job_id):
+            create_job.result()
+        bigquery_client.delete_table(f"{stage_table_name}", not_found_ok=True)
+        return create_job
+
+    def generate_mount_view_ddl(self, restore_config: dict, external_table_identity: str) -> str:
+        """Render the view over the mounted external table, which presents the data with the archived schema.
+
+        Exported AVRO files keep DATETIME values as strings, so these columns are cast back in the view.
+        """
+        cast_datetime = self.data_archive_format == google.cloud.bigquery.job.DestinationFormat.AVRO
+        select_columns = [
+            (
+                f"CAST(`{f.name}` AS DATETIME) AS `{f.name}`"
+                if cast_datetime and f.type == google.cloud.bigquery.enums.SqlTypeNames.DATETIME.value
+                else f"`{f.name}`"
+            )
+            for f in self.schema_fields
+        ]
+        column_clause = ""
+        if any(f.description for f in self.schema_fields):
+            columns = [
+                f"`{f.name}` OPTIONS(description={bigquery_string_literal(f.description)})" if f.description else f"`{f.name}`"
+                for f in self.schema_fields
+            ]
+            column_clause = f"({', '.join(columns)})"
+        options_clause = bigquery_options_clause(
+            {"description": self.bigquery_metadata.description, "labels": dict([*self.restore_labels(restore_config).items(), MOUNTED_TABLE_LABEL])}
+        )
+        return f"""{bigquery_create_clause("VIEW", self.restore_destination_identity(), restore_config.get("overwrite_existing", False))} {column_clause}
+            {options_clause}
+            AS SELECT {", ".join(select_columns) or "*"} FROM `{external_table_identity}`"""
+
+    def mount_self(self, bigquery_client: google.cloud.bigquery.client.Client, restore_config: dict) -> typing.Any:
+        """Restore the table as a view over an external table on the archived data files, no data is copied.
+
+        External tables of AVRO and PARQUET files take their schema from the files, so the view presents them with the
+        archived schema and metadata. The data files laid out in hive partition directories are mounted with hive partitioning.
+        """
+        fully_qualified_identity = self.restore_destination_identity()
+        external_table_identity = self.restore_temp_table_identity("temp_mnt")
+        external_config = google.cloud.bigquery.ExternalConfig(self.data_archive_format)
+        if hive_partition_keys(self.data_files):
+            hive_partitioning = google.cloud.bigquery.external_config.HivePartitioningOptions()
+            hive_partitioning.mode = "AUTO"
+            hive_partitioning.source_uri_prefix = f"{self.data_serialized_path}/"
+            external_config.hive_partitioning = hive_partitioning
+            external_config.source_uris = [f"{self.data_serialized_path}/*"]
+        else:
+            external_config.source_uris = (
+                self.data_file_uris if 0 < len(self.data_files) <= BIGQUERY_LOAD_MAX_SOURCE_URIS else [f"{self.data_serialized_path}/*"]
+            )
+        if self.data_archive_format == google.cloud.bigquery.job.DestinationFormat.AVRO:
+            external_config.avro_options = google.cloud.bigquery.external_config.AvroOptions()
+            external_config.avro_options.use_avro_logical_types = True
+        external_table = google.cloud.bigquery.Table(external_table_identity)
+        external_table.external_data_configuration = external_config
+        external_table.labels = self.restore_labels(restore_config)
+        if restore_config.get("overwrite_existing", False):
+            # The restored object changes its type from a table to a view, so it can not be replaced in place
+            bigquery_client.delete_table(fully_qualified_identity, not_found_ok=True)
+        with timeline_span("metadata-update", "metadata", table=external_table_identity):
+            bigquery_client.delete_table(external_table_identity, not_found_ok=True)
+            bigquery_client.create_table(external_table)
+        view_job = bigquery_client.query(self.generate_mount_view_ddl(restore_config, external_table_identity))
+        with timeline_span("job-wait", "job", job_id=view_job.job_id):
+            view_job.result()
+        return view_job
+
+    def materialize_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, restore_config: dict = None) -> typing.Any:
+        """Replace the mounted table with a native table loaded from the archived data files.
+
+        The data is loaded into a temporary table while the mounted table keeps serving queries, then the mounted view is
+        swapped with a copy of the temporary table. The mounted view is recreated if the copy fails.
+        """
+        if not bigquery_client:
+            bigquery_client = google.cloud.bigquery.Client(project=self.project_id)
+        if not restore_config:
+            restore_config = {}
+        fully_qualified_identity = self.restore_destination_identity()
+        mounted_table = bigquery_client.get_table(fully_qualified_identity)
+        if mounted_table.labels.get(MOUNTED_TABLE_LABEL[0]) != MOUNTED_TABLE_LABEL[1]:
+            raise ValueError(f"{self.entity_type} {fully_qualified_identity} is not mounted, it can not be materialized")
+        self.determine_data_archive_format_compression(restore_config)
+        materialize_table_identity = self.restore_temp_table_identity("temp_mat")
+        bigquery_client.delete_table(materialize_table_identity, not_found_ok=True)
+        self.load_data(bigquery_client, {**restore_config, "overwrite_in_place": False}, materialize_table_identity)
+        bigquery_client.delete_table(fully_qualified_identity, not_found_ok=True)
+        try:
+            copy_job = bigquery_client.copy_table(
+                materialize_table_identity,
+                fully_qualified_identity,
+                job_id_prefix=f"materialize_{self.bigquery_metadata.dataset}_{self.identity}_{self.archived_datetime_str}",
+            )
+            with timeline_span("job-wait", "job", job_id=copy_job.job_id):
+                copy_job.result()
+        except Exception:
+            # The mounted view is put back, so the table keeps serving queries until a later materialization
+            view_job = bigquery_client.query(
+                self.generate_mount_view_ddl({**restore_config, "overwrite_existing": True}, self.restore_temp_table_identity("temp_mnt"))
+            )
+            view_job.result()
+            raise
+        table = google.cloud.bigquery.Table(fully_qualified_identity)
         table.description = self.bigquery_metadata.description
-        if restore_config.get("attach_archive_ts_to_label", True):
-            table.labels["archive_ts"] = self.archived_datetime_str
-        bigquery_client.update_table(table, ["labels", "description"])
-        return table
+        table.labels = self.restore_labels(restore_config)
+        with timeline_span("metadata-update", "metadata", table=fully_qualified_identity):
+            bigquery_client.update_table(table, ["description", "labels"])
+        bigquery_client.delete_table(materialize_table_identity, not_found_ok=True)
+        bigquery_client.delete_table(self.restore_temp_table_identity("temp_mnt"), not_found_ok=True)
+        return copy_job
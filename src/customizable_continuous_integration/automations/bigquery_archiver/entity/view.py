@@ -9,25 +9,37 @@ Revision History:
   05/03/2025   Ryan, Gao       Use sqlparse to handle view query transformation
   10/04/2025   Ryan, Gao       Add archive timestamp to dataset labels; Add skip_restore
   15/06/2025   Ryan, Gao       Fix restore logic to replace UDF in view query
+  19/10/2026   Ryan, Gao       Write compact manifests and validate them from bytes
+  19/10/2026   Ryan, Gao       Add restore DDL generation for batched restore
+  19/10/2026   Ryan, Gao       Restore views and materialized views by a single DDL job
+  19/10/2026   Ryan, Gao       Keep schema fields in the compact schema representation
+  19/10/2026   Ryan, Gao       Record restore job waits in timelines
+  19/10/2026   Ryan, Gao       Add staggered refresh of restored materialized views
 """
 
-import json
 import typing
 
-import fsspec
 import google.cloud.bigquery.table
 import sqlglot
 from typing_extensions import Self
 
-from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigqueryBaseArchiveEntity, BigquerySchemaFieldEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigqueryBaseArchiveEntity
 from customizable_continuous_integration.automations.bigquery_archiver.entity.bigquery_metadata import BigqueryPartitionConfig, BigqueryViewMetadata
+from customizable_continuous_integration.automations.bigquery_archiver.entity.compact_schema import CompactSchema, to_compact_schema
+from customizable_continuous_integration.automations.bigquery_archiver.entity.ddl import (
+    bigquery_create_clause,
+    bigquery_options_clause,
+    bigquery_string_literal,
+)
+from customizable_continuous_integration.automations.bigquery_archiver.entity.serialization import read_entity, write_entity
 from customizable_continuous_integration.common_libs.sql.parsing.extract_dependencies import extract_sql_select_statement_dependencies
+from customizable_continuous_integration.common_libs.timeline import timeline_span
 
 
 class BigqueryArchiveViewEntity(BigqueryBaseArchiveEntity):
     bigquery_metadata: BigqueryViewMetadata
     defining_query: str = ""
-    schema_fields: list[BigquerySchemaFieldEntity] = []
+    schema_fields: CompactSchema = ()
 
     @property
     def entity_type(self) -> str:
@@ -53,22 +65,20 @@ class BigqueryArchiveViewEntity(BigqueryBaseArchiveEntity):
         if not bigquery_client:
             bigquery_client = google.cloud.bigquery.Client(project=self.project_id)
         table = bigquery_client.get_table(self.fully_qualified_identity)
-        self.schema_fields = [BigquerySchemaFieldEntity.from_dict(f.to_api_repr()) for f in table.schema]
+        self.schema_fields = to_compact_schema(table.schema)
         self.bigquery_metadata.description = table.description
         self.defining_query = table.view_query
 
     def archive_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, archive_config: dict = None) -> typing.Any:
         self.is_archived = True
         self.actual_archive_metadata_path = self.metadata_serialized_path
-        with fsspec.open(self.metadata_serialized_path, "w") as f:
-            f.write(self.model_dump_json(indent=2))
+        write_entity(self, self.metadata_serialized_path)
 
     def load_self(self, bigquery_client: google.cloud.bigquery.client.Client = None) -> Self:
-        with fsspec.open(self.metadata_serialized_path, "r") as f:
-            loaded_model = self.model_validate(json.load(f))
-            for k in loaded_model.model_fields:
-                if k in BigqueryViewMetadata.model_fields:
-                    setattr(self, k, getattr(loaded_model, k))
+        loaded_model = read_entity(type(self), self.metadata_serialized_path)
+        for k in loaded_model.model_fields:
+            if k in BigqueryViewMetadata.model_fields:
+                setattr(self, k, getattr(loaded_model, k))
 
     def restore_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, restore_config: dict = None) -> typing.Any:
         if not bigquery_client:
@@ -81,18 +91,30 @@ class BigqueryArchiveViewEntity(BigqueryBaseArchiveEntity):
         if restore_config.get("skip_restore", {}).get(self.identity, False):
             print(f"Skip restoring {self.entity_type} {fully_qualified_identity}")
             return
-        if restore_config.get("overwrite_existing", False):
-            bigquery_client.delete_table(fully_qualified_identity, not_found_ok=True)
-        view = google.cloud.bigquery.Table(fully_qualified_identity)
-        view.view_query = self.defining_query
-        view = bigquery_client.create_table(view, exists_ok=True)
-        view.description = self.bigquery_metadata.description
-        view.labels = self.bigquery_metadata.labels
-        if restore_config.get("attach_archive_ts_to_label", True):
-            view.labels["archive_ts"] = self.archived_datetime_str
-        view.schema = [f.to_bigquery_schema_field() for f in self.schema_fields] if self.schema_fields else None
-        table = bigquery_client.update_table(view, ["description", "schema", "labels"])
-        return table
+        job = bigquery_client.query(
+            self.generate_restore_ddl(restore_config),
+            job_id_prefix=f"restore_{self.bigquery_metadata.dataset}_{self.identity}_{self.archived_datetime_str}",
+        )
+        with timeline_span("job-wait", "job", job_id=job.job_id):
+            job.result()
+        return job
+
+    def generate_restore_ddl(self, restore_config: dict = None) -> str:
+        if not restore_config:
+            restore_config = {}
+        column_clause = ""
+        if any(f.description for f in self.schema_fields):
+            columns = [
+                f"`{f.name}` OPTIONS(description={bigquery_string_literal(f.description)})" if f.description else f"`{f.name}`"
+                for f in self.schema_fields
+            ]
+            column_clause = f"({', '.join(columns)})"
+        options_clause = bigquery_options_clause(
+            {"description": self.bigquery_metadata.description, "labels": self.restore_labels(restore_config) or None}
+        )
+        return f"""{bigquery_create_clause("VIEW", self.fully_qualified_identity, restore_config.get("overwrite_existing", False))} {column_clause}
+            {options_clause}
+            AS {self.defining_query}"""
 
     def modify_self_query(self, modify_config: dict) -> typing.Any:
         replacement_mapping = modify_config.get("replacement_mapping", {})
@@ -125,7 +147,7 @@ class BigqueryArchiveMaterializedViewEntity(BigqueryBaseArchiveEntity):
     refresh_interval_seconds: int = 1800
     mview_query: str = ""
     partition_config: BigqueryPartitionConfig | None = None
-    schema_fields: list[BigquerySchemaFieldEntity] = []
+    schema_fields: CompactSchema = ()
 
     @property
     def entity_type(self) -> str:
@@ -153,7 +175,7 @@ class BigqueryArchiveMaterializedViewEntity(BigqueryBaseArchiveEntity):
         if not bigquery_client:
             bigquery_client = google.cloud.bigquery.Client(project=self.project_id)
         table = bigquery_client.get_table(self.fully_qualified_identity)
-        self.schema_fields = [BigquerySchemaFieldEntity.from_dict(f.to_api_repr()) for f in table.schema]
+        self.schema_fields = to_compact_schema(table.schema)
         self.bigquery_metadata.description = table.description
         self.enable_refresh = table.mview_enable_refresh
         self.refresh_interval_seconds = table.mview_refresh_interval.seconds
@@ -169,8 +191,7 @@ class BigqueryArchiveMaterializedViewEntity(BigqueryBaseArchiveEntity):
     def archive_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, archive_config: dict = None) -> typing.Any:
         self.is_archived = True
         self.actual_archive_metadata_path = self.metadata_serialized_path
-        with fsspec.open(self.metadata_serialized_path, "w") as f:
-            f.write(self.model_dump_json(indent=2))
+        write_entity(self, self.metadata_serialized_path)
 
     def restore_self(self, bigquery_client: google.cloud.bigquery.client.Client = None, restore_config: dict = None) -> typing.Any:
         if not bigquery_client:
@@ -183,21 +204,62 @@ class BigqueryArchiveMaterializedViewEntity(BigqueryBaseArchiveEntity):
         if restore_config.get("skip_restore", {}).get(self.identity, False):
             print(f"Skip restoring {self.entity_type} {fully_qualified_identity}")
             return
-        if restore_config.get("overwrite_existing", False):
-            bigquery_client.delete_table(fully_qualified_identity, not_found_ok=True)
-        stmt = f"""CREATE MATERIALIZED VIEW {fully_qualified_identity}
-            OPTIONS (enable_refresh = {self.enable_refresh}, refresh_interval_minutes = {self.refresh_interval_seconds // 60}) 
+        job = bigquery_client.query(
+            self.generate_restore_ddl(restore_config),
+            job_id_prefix=f"restore_{self.bigquery_metadata.dataset}_{self.identity}_{self.archived_datetime_str}",
+        )
+        with timeline_span("job-wait", "job", job_id=job.job_id):
+            job.result()
+        return job
+
+    def refresh_self(self, bigquery_client: google.cloud.bigquery.client.Client = None) -> typing.Any:
+        """Run the initial refresh of a materialized view restored with `staggered_mview_refresh`."""
+        if not bigquery_client:
+            bigquery_client = google.cloud.bigquery.Client(project=self.project_id)
+        job = bigquery_client.query(
+            self.generate_refresh_ddl(),
+            job_id_prefix=f"refresh_{self.bigquery_metadata.dataset}_{self.identity}_{self.archived_datetime_str}",
+        )
+        with timeline_span("job-wait", "job", job_id=job.job_id):
+            job.result()
+        return job
+
+    def enable_refresh_self(self, bigquery_client: google.cloud.bigquery.client.Client = None) -> typing.Any:
+        """Turn the archived refresh setting back on after the initial refresh, nothing to do if it was off."""
+        if not self.enable_refresh:
+            return None
+        if not bigquery_client:
+            bigquery_client = google.cloud.bigquery.Client(project=self.project_id)
+        job = bigquery_client.query(
+            self.generate_enable_refresh_ddl(),
+            job_id_prefix=f"enable_refresh_{self.bigquery_metadata.dataset}_{self.identity}_{self.archived_datetime_str}",
+        )
+        with timeline_span("metadata-update", "metadata", table=self.fully_qualified_identity):
+            job.result()
+        return job
+
+    def generate_refresh_ddl(self) -> str:
+        return f"CALL BQ.REFRESH_MATERIALIZED_VIEW({bigquery_string_literal(self.fully_qualified_identity)})"
+
+    def generate_enable_refresh_ddl(self) -> str:
+        options_clause = bigquery_options_clause({"enable_refresh": True, "refresh_interval_minutes": self.refresh_interval_seconds // 60})
+        return f"ALTER MATERIALIZED VIEW `{self.fully_qualified_identity}` SET {options_clause}"
+
+    def generate_restore_ddl(self, restore_config: dict = None) -> str:
+        if not restore_config:
+            restore_config = {}
+        options_clause = bigquery_options_clause(
+            {
+                # The refresh is turned on after the staggered initial refresh instead
+                "enable_refresh": self.enable_refresh and not restore_config.get("staggered_mview_refresh", False),
+                "refresh_interval_minutes": self.refresh_interval_seconds // 60,
+                "description": self.bigquery_metadata.description,
+                "labels": self.restore_labels(restore_config) or None,
+            }
+        )
+        return f"""{bigquery_create_clause("MATERIALIZED VIEW", self.fully_qualified_identity, restore_config.get("overwrite_existing", False))}
+            {options_clause}
             AS ({self.mview_query})"""
-        job = bigquery_client.query(stmt)
-        job.result()
-        view = bigquery_client.get_table(fully_qualified_identity)
-        view.description = self.bigquery_metadata.description
-        view.labels = self.bigquery_metadata.labels
-        if restore_config.get("attach_archive_ts_to_label", True):
-            view.labels["archive_ts"] = self.archived_datetime_str
-        view.schema = [f.to_bigquery_schema_field() for f in self.schema_fields] if self.schema_fields else None
-        table = bigquery_client.update_table(view, ["description", "labels"])
-        return table
 
     def modify_self_query(self, modify_config: dict) -> typing.Any:
         replacement_mapping = modify_config.get("replacement_mapping", {})
@@ -7,6 +7,9 @@ Revision History:
 ------------------------------------------------------------------------------
   23/02/2025   Ryan, Gao       Initial creation
   11/04/2025   Ryan, Gao       Add support for external table
+  19/10/2026   Ryan, Gao       Pass archive config to the dataset manifest writer
+  19/10/2026   Ryan, Gao       Profile workers when profiling is turned on
+  19/10/2026   Ryan, Gao       Record the run timeline when `timeline_path` is configured
 """
 
 import logging
@@ -29,6 +32,8 @@ from customizable_continuous_integration.automations.bigquery_archiver.entity.vi
     BigqueryArchiveViewEntity,
 )
 from customizable_continuous_integration.automations.bigquery_archiver.executor.fetch import BaseExecutor
+from customizable_continuous_integration.common_libs.profiling import profiled
+from customizable_continuous_integration.common_libs.timeline import timeline_recorded, traced
 
 
 class ArchiveSourceBigqueryDatasetExecutor(BaseExecutor):
@@ -48,6 +53,8 @@ class ArchiveSourceBigqueryDatasetExecutor(BaseExecutor):
             bigquery_client = google.cloud.bigquery.Client(project=self.bigquery_archived_dataset_entity.project_id)
         self.bigquery_client = bigquery_client
 
+    @profiled("archive-worker")
+    @traced(lambda self, entity: f"{entity.entity_type} {entity.identity}", "entity")
     def archive_single_entity(self, entity: BigqueryBaseArchiveEntity) -> typing.Any:
         supported_archive_entity_types = (
             BigqueryArchiveTableEntity,
@@ -63,6 +70,7 @@ class ArchiveSourceBigqueryDatasetExecutor(BaseExecutor):
         self.logger.warning(f"{entity.identity} is not supported type {type(entity)}")
         return False
 
+    @timeline_recorded(lambda self: self.archive_config.get("timeline_path"))
     def execute(self) -> BigqueryArchivedDatasetEntity:
         self.logger.info(f"Archiving entities in the dataset {self.bigquery_archived_dataset_entity.fully_qualified_identity}")
 
@@ -116,5 +124,5 @@ class ArchiveSourceBigqueryDatasetExecutor(BaseExecutor):
             self.logger.error(f"These archive processes FAILED: {list(failed_tasks_results.keys())}")
             exit(1)
         self.bigquery_archived_dataset_entity.is_archived = True
-        self.bigquery_archived_dataset_entity.archive_self(self.bigquery_client)
+        self.bigquery_archived_dataset_entity.archive_self(self.bigquery_client, self.archive_config)
         return self.bigquery_archived_dataset_entity
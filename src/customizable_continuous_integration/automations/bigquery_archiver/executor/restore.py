@@ -8,6 +8,12 @@ Revision History:
   23/02/2025   Ryan, Gao       Initial creation
   11/04/2025   Ryan, Gao       Add support for external table
   13/04/2025   Ryan, Gao       Support configurable statement replacements
+  19/10/2026   Ryan, Gao       Accept a loaded dataset entity as the restore source
+  19/10/2026   Ryan, Gao       Add batched multi-statement DDL restore for views and routines
+  19/10/2026   Ryan, Gao       Profile workers when profiling is turned on
+  19/10/2026   Ryan, Gao       Record the run timeline with DAG-ready events of views when `timeline_path` is configured
+  19/10/2026   Ryan, Gao       Add staggered initial refresh of materialized views
+  19/10/2026   Ryan, Gao       Materialize mounted tables in a materialize restore
 """
 
 import logging
@@ -19,29 +25,39 @@ import google.cloud.bigquery
 
 from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigqueryBaseArchiveEntity
 from customizable_continuous_integration.automations.bigquery_archiver.entity.dataset import BigqueryArchivedDatasetEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.ddl import bigquery_multi_statement_script
 from customizable_continuous_integration.automations.bigquery_archiver.entity.external import BigqueryArchiveGenericExternalTableEntity
 from customizable_continuous_integration.automations.bigquery_archiver.entity.routine import (
     BigqueryArchiveFunctionEntity,
     BigqueryArchiveStoredProcedureEntity,
 )
-from customizable_continuous_integration.automations.bigquery_archiver.entity.table import BigqueryArchiveTableEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.table import TABLE_RESTORE_MODE_LOAD, BigqueryArchiveTableEntity
 from customizable_continuous_integration.automations.bigquery_archiver.entity.view import (
     BigqueryArchiveMaterializedViewEntity,
     BigqueryArchiveViewEntity,
 )
 from customizable_continuous_integration.automations.bigquery_archiver.executor.fetch import BaseExecutor
 from customizable_continuous_integration.common_libs.graph.dag.builder import build_dag
+from customizable_continuous_integration.common_libs.profiling import profiled
+from customizable_continuous_integration.common_libs.timeline import timeline_instant, timeline_recorded, timeline_span, traced
+
+# Restore mode of a separate restore which only materializes the tables mounted by an earlier restore, so the mount
+# restore finishes without waiting for the materialization
+TABLE_RESTORE_MODE_MATERIALIZE = "materialize"
 
 
 class RestoreBigqueryDatasetExecutor(BaseExecutor):
     def __init__(
         self,
-        bigquery_archived_dataset_config: dict,
+        bigquery_archived_dataset_config: dict | BigqueryArchivedDatasetEntity,
         restore_config: dict,
         logger: logging.Logger = None,
         bigquery_client: google.cloud.bigquery.Client = None,
     ):
-        self.bigquery_archived_dataset_entity = BigqueryArchivedDatasetEntity.model_validate(bigquery_archived_dataset_config)
+        if isinstance(bigquery_archived_dataset_config, BigqueryArchivedDatasetEntity):
+            self.bigquery_archived_dataset_entity = bigquery_archived_dataset_config
+        else:
+            self.bigquery_archived_dataset_entity = BigqueryArchivedDatasetEntity.model_validate(bigquery_archived_dataset_config)
         self.bigquery_archived_dataset_entity.populate_sub_restore_info(restore_config=restore_config)
         self.restore_config = restore_config
         if not logger:
@@ -59,6 +75,8 @@ class RestoreBigqueryDatasetExecutor(BaseExecutor):
         self.logger.warning(f"restore {entity.identity} is not supported type {type(entity)}")
         return False
 
+    @profiled("restore-worker")
+    @traced(lambda self, entity, restore_config=None: f"{entity.entity_type} {entity.identity}", "entity")
     def restore_single_entity(self, entity: BigqueryBaseArchiveEntity, restore_config: dict = None) -> typing.Any:
         supported_archive_entity_types = (
             BigqueryArchiveTableEntity,
@@ -69,31 +87,222 @@ class RestoreBigqueryDatasetExecutor(BaseExecutor):
             BigqueryArchiveGenericExternalTableEntity,
         )
         if type(entity) in supported_archive_entity_types:
-            if self.archived_entity_metadata_version != entity.metadata_version:
-                raise TypeError(
-                    f"{entity.identity} metadata version {entity.metadata_version} is not compatible with {self.archived_entity_metadata_version}"
-                )
+            self.check_entity_metadata_version(entity)
             entity.restore_self(self.bigquery_client, restore_config)
             return True
         self.logger.warning(f"restore {entity.identity} is not supported type {type(entity)}")
         return False
 
+    def check_entity_metadata_version(self, entity: BigqueryBaseArchiveEntity) -> None:
+        if self.archived_entity_metadata_version != entity.metadata_version:
+            raise TypeError(
+                f"{entity.identity} metadata version {entity.metadata_version} is not compatible with {self.archived_entity_metadata_version}"
+            )
+
+    def chunk_ddl_batches(self, entities: list[BigqueryBaseArchiveEntity]) -> list[list[tuple[BigqueryBaseArchiveEntity, str]]]:
+        max_statements = self.restore_config.get("ddl_batch_max_statements", 200)
+        max_bytes = self.restore_config.get("ddl_batch_max_bytes", 900000)
+        batches = []
+        current_batch = []
+        current_bytes = 0
+        for entity in entities:
+            if self.restore_config.get("skip_restore", {}).get(entity.identity, False):
+                self.logger.info(f"Skip restoring {entity.entity_type} {entity.fully_qualified_identity}")
+                continue
+            self.check_entity_metadata_version(entity)
+            ddl = entity.generate_restore_ddl(self.restore_config)
+            ddl_bytes = len(ddl.encode("utf-8"))
+            if current_batch and (len(current_batch) >= max_statements or current_bytes + ddl_bytes > max_bytes):
+                batches.append(current_batch)
+                current_batch = []
+                current_bytes = 0
+            current_batch.append((entity, ddl))
+            current_bytes += ddl_bytes
+        if current_batch:
+            batches.append(current_batch)
+        return batches
+
+    @profiled("restore-worker")
+    @traced(lambda self, ddl_batch: f"ddl-batch of {len(ddl_batch)}", "entity")
+    def execute_ddl_batch(self, ddl_batch: list[tuple[BigqueryBaseArchiveEntity, str]]) -> list[BigqueryBaseArchiveEntity]:
+        """Run a batch of DDL statements as one multi-statement script and bisect it on failure.
+
+        The DDL statements are idempotent, so the statements applied before a failure are safe to be run again while bisecting.
+        Return:
+            list: The entities whose DDL statements failed
+        """
+        try:
+            self.bigquery_client.query(
+                bigquery_multi_statement_script([ddl for _, ddl in ddl_batch]),
+                job_id_prefix=f"restore_batch_{self.bigquery_archived_dataset_entity.identity}_",
+            ).result()
+            for entity, _ in ddl_batch:
+                self.logger.info(f"{entity.entity_type} {entity.identity} Restore Result: restored in a batch of {len(ddl_batch)}")
+            return []
+        except Exception as e:
+            if len(ddl_batch) == 1:
+                self.logger.error(f"{ddl_batch[0][0].entity_type} {ddl_batch[0][0].identity} FAILED with exception: {e}")
+                return [ddl_batch[0][0]]
+            self.logger.warning(f"Batch of {len(ddl_batch)} DDL statements FAILED, bisecting it to find the failed statements: {e}")
+            middle = len(ddl_batch) // 2
+            return self.execute_ddl_batch(ddl_batch[:middle]) + self.execute_ddl_batch(ddl_batch[middle:])
+
+    def restore_entities_in_ddl_batches(self, entities: list[BigqueryBaseArchiveEntity]) -> list[BigqueryBaseArchiveEntity]:
+        failed_entities = []
+        ddl_batches = self.chunk_ddl_batches(entities)
+        self.logger.info(f"Restoring {sum([len(b) for b in ddl_batches])} entities in {len(ddl_batches)} DDL batches")
+        with ThreadPoolExecutor(max_workers=self.restore_config.get("concurrency", 1)) as executor:
+            for completed_task in as_completed([executor.submit(self.execute_ddl_batch, b) for b in ddl_batches]):
+                failed_entities.extend(completed_task.result())
+        return failed_entities
+
+    def check_ddl_batch_failures(self, failed_entities: list[BigqueryBaseArchiveEntity], failed_tasks_results: dict) -> None:
+        if not failed_entities:
+            return
+        if not self.restore_config.get("continue_on_failure", False):
+            self.logger.error(f"These restoring processes FAILED: {[e.identity for e in failed_entities]}, execution will be stopped")
+            exit(1)
+        for e in failed_entities:
+            failed_tasks_results[e.identity] = False
+
+    def execute_views_in_ddl_batches(self, failed_tasks_results: dict) -> None:
+        views_dag = build_dag(
+            "view_restore_dag", self.bigquery_archived_dataset_entity.views + self.bigquery_archived_dataset_entity.materialized_views, set()
+        )
+        ready_nodes = views_dag.get_ready_nodes()
+        dag_level = 0
+        while ready_nodes:
+            for node in ready_nodes:
+                timeline_instant("dag-ready", "dag", view=node.dag_key(), dag_level=dag_level)
+            self.logger.info(f"Restoring {len(ready_nodes)} views of DAG level {dag_level} in DDL batches")
+            failed_entities = self.restore_entities_in_ddl_batches([node.raw_entity() for node in ready_nodes])
+            self.check_ddl_batch_failures(failed_entities, failed_tasks_results)
+            failed_keys = {e.dag_key() for e in failed_entities}
+            next_ready_nodes = {}
+            for node in ready_nodes:
+                if node.dag_key() in failed_keys:
+                    continue
+                next_ready_nodes.update({n.dag_key(): n for n in views_dag.complete_node(node.dag_key())})
+            ready_nodes = list(next_ready_nodes.values())
+            dag_level += 1
+
+    def get_table_bytes(self, table_id: str) -> int:
+        try:
+            return self.bigquery_client.get_table(table_id).num_bytes or 0
+        except Exception as e:
+            self.logger.warning(f"Failed to get the size of {table_id}, it is ordered as an empty table: {e}")
+            return 0
+
+    @traced(lambda self, entity: f"refresh {entity.identity}", "entity")
+    def refresh_single_mview(self, entity: BigqueryArchiveMaterializedViewEntity) -> typing.Any:
+        return entity.refresh_self(self.bigquery_client)
+
+    @traced(lambda self, entity: f"enable refresh {entity.identity}", "entity")
+    def enable_single_mview_refresh(self, entity: BigqueryArchiveMaterializedViewEntity) -> typing.Any:
+        return entity.enable_refresh_self(self.bigquery_client)
+
+    def run_entity_tasks(
+        self, executor: ThreadPoolExecutor, task_func: typing.Callable, entities: list, action: str, failed_tasks_results: dict
+    ) -> list[BigqueryBaseArchiveEntity]:
+        """Run a task per entity in the given order, return the entities whose tasks succeeded."""
+        succeeded_entities = []
+        task_requests = {executor.submit(task_func, e): e for e in entities}
+        for completed_task in as_completed(task_requests.keys()):
+            entity = task_requests[completed_task]
+            try:
+                completed_task.result()
+                self.logger.info(f"{entity.entity_type} {entity.identity} {action} done")
+                succeeded_entities.append(entity)
+            except Exception as e:
+                if not self.restore_config.get("continue_on_failure", False):
+                    self.logger.error(f"{entity.entity_type} {entity.identity} {action} FAILED with exception: {e}, execution will be stopped")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    exit(1)
+                self.logger.error(f"{entity.entity_type} {entity.identity} {action} FAILED with exception: {e}, execution will be continued")
+                failed_tasks_results[entity.identity] = e
+        return succeeded_entities
+
+    def refresh_mviews_staggered(self, failed_tasks_results: dict) -> None:
+        """Run the initial refreshes of the materialized views restored with refresh turned off.
+
+        The refreshes run by `mview_refresh_concurrency` workers apart from the restore `concurrency`, the materialized views
+        over the largest base tables first. The archived refresh settings are turned back on once all refreshes finished.
+        """
+        mviews = [
+            e
+            for e in self.bigquery_archived_dataset_entity.materialized_views
+            if e.identity not in failed_tasks_results and not self.restore_config.get("skip_restore", {}).get(e.identity, False)
+        ]
+        if not mviews:
+            return
+        mview_dependencies = {e.identity: e.dependencies for e in mviews}
+        with ThreadPoolExecutor(max_workers=self.restore_config.get("mview_refresh_concurrency", 1)) as executor:
+            base_tables = sorted(set().union(*mview_dependencies.values()))
+            base_table_bytes = dict(zip(base_tables, executor.map(self.get_table_bytes, base_tables)))
+            # Workers pick the submitted tasks in order, so the longest refreshes are started first
+            mviews.sort(key=lambda e: sum(base_table_bytes[t] for t in mview_dependencies[e.identity]), reverse=True)
+            self.logger.info(f"Refreshing {len(mviews)} materialized views in the order {[e.identity for e in mviews]}")
+            refreshed_mviews = self.run_entity_tasks(executor, self.refresh_single_mview, mviews, "initial refresh", failed_tasks_results)
+            self.run_entity_tasks(
+                executor,
+                self.enable_single_mview_refresh,
+                [e for e in refreshed_mviews if e.enable_refresh],
+                "refresh re-enabling",
+                failed_tasks_results,
+            )
+
+    @traced(lambda self, entity: f"materialize {entity.identity}", "entity")
+    def materialize_single_table(self, entity: BigqueryArchiveTableEntity) -> typing.Any:
+        return entity.materialize_self(self.bigquery_client, self.restore_config)
+
+    def materialize_mounted_tables(self, failed_tasks_results: dict) -> None:
+        """Replace the mounted tables in `materialize_tables` with native tables by `materialize_concurrency` workers.
+
+        The mounted tables keep serving queries until each of them is swapped with its native table.
+        """
+        materialize_tables = set(self.restore_config.get("materialize_tables", []) or [])
+        tables = [
+            e for e in self.bigquery_archived_dataset_entity.tables if e.identity in materialize_tables and e.identity not in failed_tasks_results
+        ]
+        unknown_tables = materialize_tables - {e.identity for e in self.bigquery_archived_dataset_entity.tables}
+        if unknown_tables:
+            self.logger.warning(f"These tables to materialize are not in the archive: {sorted(unknown_tables)}")
+        if not tables:
+            return
+        self.logger.info(f"Materializing {len(tables)} mounted tables {[e.identity for e in tables]}")
+        with ThreadPoolExecutor(max_workers=self.restore_config.get("materialize_concurrency", 1)) as executor:
+            self.run_entity_tasks(executor, self.materialize_single_table, tables, "materialization", failed_tasks_results)
+
+    def execute_materialization(self) -> BigqueryArchivedDatasetEntity:
+        failed_tasks_results = {}
+        self.materialize_mounted_tables(failed_tasks_results)
+        if failed_tasks_results:
+            self.logger.error(f"These materializing processes FAILED: {list(failed_tasks_results.keys())}")
+            exit(1)
+        return self.bigquery_archived_dataset_entity
+
+    @timeline_recorded(lambda self: self.restore_config.get("timeline_path"))
     def execute(self) -> BigqueryArchivedDatasetEntity:
+        if self.restore_config.get("table_restore_mode", TABLE_RESTORE_MODE_LOAD).lower() == TABLE_RESTORE_MODE_MATERIALIZE:
+            # Only the tables mounted by an earlier restore are materialized
+            return self.execute_materialization()
 
         task_requests = {}
         failed_tasks_results = {}
         concurrency = self.restore_config.get("concurrency", 1)
         continue_on_failure = self.restore_config.get("continue_on_failure", False)
+        batch_ddl_restore = self.restore_config.get("batch_ddl_restore", False)
+        routine_entities = self.bigquery_archived_dataset_entity.user_define_functions + self.bigquery_archived_dataset_entity.stored_procedures
 
         self.logger.info(f"Restoring dataset {self.bigquery_archived_dataset_entity.fully_qualified_identity} itself")
-        self.bigquery_archived_dataset_entity.restore_self(self.bigquery_client, self.restore_config)
+        with timeline_span(f"dataset {self.bigquery_archived_dataset_entity.identity}", "entity"):
+            self.bigquery_archived_dataset_entity.restore_self(self.bigquery_client, self.restore_config)
         self.logger.info(f"Restoring entities in the dataset {self.bigquery_archived_dataset_entity.fully_qualified_identity}")
         with ThreadPoolExecutor(max_workers=concurrency) as executor:
             for idx, table_entity in enumerate(
                 self.bigquery_archived_dataset_entity.tables
                 + self.bigquery_archived_dataset_entity.external_tables
-                + self.bigquery_archived_dataset_entity.user_define_functions
-                + self.bigquery_archived_dataset_entity.stored_procedures
+                + ([] if batch_ddl_restore else routine_entities)
             ):
                 task_req = (table_entity, self.restore_config)
                 task_requests[executor.submit(self.restore_single_entity, *task_req)] = task_req[0]
@@ -120,6 +329,20 @@ class RestoreBigqueryDatasetExecutor(BaseExecutor):
                     )
                     executor.shutdown(wait=False, cancel_futures=True)
                     exit(1)
+        if batch_ddl_restore:
+            self.check_ddl_batch_failures(
+                self.restore_entities_in_ddl_batches(self.bigquery_archived_dataset_entity.user_define_functions), failed_tasks_results
+            )
+            self.check_ddl_batch_failures(
+                self.restore_entities_in_ddl_batches(self.bigquery_archived_dataset_entity.stored_procedures), failed_tasks_results
+            )
+            self.execute_views_in_ddl_batches(failed_tasks_results)
+            if self.restore_config.get("staggered_mview_refresh", False):
+                self.refresh_mviews_staggered(failed_tasks_results)
+            if failed_tasks_results:
+                self.logger.error(f"These restoring processes FAILED: {list(failed_tasks_results.keys())}")
+                exit(1)
+            return self.bigquery_archived_dataset_entity
         # Do dependency restoring
         views_dag = build_dag(
             "view_restore_dag", self.bigquery_archived_dataset_entity.views + self.bigquery_archived_dataset_entity.materialized_views, set()
@@ -127,6 +350,8 @@ class RestoreBigqueryDatasetExecutor(BaseExecutor):
         task_requests.clear()
         failed_tasks_results.clear()
         ready_nodes = views_dag.get_ready_nodes()
+        for node in ready_nodes:
+            timeline_instant("dag-ready", "dag", view=node.dag_key())
         restoring_nodes = {node.dag_key(): node for node in ready_nodes}
         with ThreadPoolExecutor(max_workers=concurrency) as executor:
             for idx, node in enumerate(ready_nodes):
@@ -142,7 +367,9 @@ class RestoreBigqueryDatasetExecutor(BaseExecutor):
                         ret = completed_task.result()
                         if ret:
                             self.logger.info(f"{completed_task_req[0].entity_type} {completed_task_req[0].identity} Restore Result: {ret}")
-                            ready_nodes.extend(views_dag.complete_node(completed_task_req[2]))
+                            for node in views_dag.complete_node(completed_task_req[2]):
+                                timeline_instant("dag-ready", "dag", view=node.dag_key())
+                                ready_nodes.append(node)
                         elif continue_on_failure:
                             self.logger.error(
                                 f"{completed_task_req[0].entity_type} {completed_task_req[0].identity} Restore FAILED: {ret}, execution will be continued"
@@ -166,6 +393,8 @@ class RestoreBigqueryDatasetExecutor(BaseExecutor):
                     restoring_nodes[node.dag_key()] = node
                     task_req = (node.raw_entity(), self.restore_config, node.dag_key())
                     task_requests[executor.submit(self.restore_single_entity, *task_req[0:2])] = task_req
+        if self.restore_config.get("staggered_mview_refresh", False):
+            self.refresh_mviews_staggered(failed_tasks_results)
         if failed_tasks_results:
             self.logger.error(f"These restoring processes FAILED: {list(failed_tasks_results.keys())}")
             exit(1)
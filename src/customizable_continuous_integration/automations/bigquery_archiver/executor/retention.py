@@ -0,0 +1,134 @@
+"""This module hosts the retention action expiring archives of a dataset
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       List archives from both the catalog and the archive directories
+"""
+
+import datetime
+import logging
+import os
+import time
+from concurrent.futures import as_completed
+from concurrent.futures.thread import ThreadPoolExecutor
+
+import fsspec
+
+from customizable_continuous_integration.automations.bigquery_archiver.catalog.index import BigqueryArchiveCatalog
+from customizable_continuous_integration.automations.bigquery_archiver.executor.fetch import BaseExecutor
+
+ARCHIVE_TS_FORMAT = "%Y%m%d%H%M%S"
+
+
+def select_expired_archive_ts(
+    archive_ts_list: list[str], keep_last: int = 0, keep_daily: int = 0, keep_weekly: int = 0, keep_monthly: int = 0
+) -> tuple[list[str], list[str]]:
+    """Split archive timestamps into kept and expired ones by the retention rules.
+
+    Every rule keeps the latest archive of its latest N periods, the union of all rules is kept.
+    Args:
+        archive_ts_list (list[str]): The archive timestamps in `%Y%m%d%H%M%S`
+        keep_last (int): Keep the latest N archives
+        keep_daily (int): Keep the latest archive of the latest N days having archives
+        keep_weekly (int): Keep the latest archive of the latest N ISO weeks having archives
+        keep_monthly (int): Keep the latest archive of the latest N months having archives
+    Return:
+        tuple: The kept and expired archive timestamps, both sorted from the latest
+    """
+    ordered_ts = sorted(set(archive_ts_list), reverse=True)
+    kept = set(ordered_ts[:keep_last])
+    period_rules = (
+        (keep_daily, lambda d: d.date()),
+        (keep_weekly, lambda d: d.isocalendar()[0:2]),
+        (keep_monthly, lambda d: (d.year, d.month)),
+    )
+    for keep_periods, period_of in period_rules:
+        seen_periods = set()
+        for ts in ordered_ts:
+            if len(seen_periods) >= keep_periods:
+                break
+            period = period_of(datetime.datetime.strptime(ts, ARCHIVE_TS_FORMAT))
+            if period not in seen_periods:
+                seen_periods.add(period)
+                kept.add(ts)
+    return [ts for ts in ordered_ts if ts in kept], [ts for ts in ordered_ts if ts not in kept]
+
+
+class RetentionBigqueryArchiveExecutor(BaseExecutor):
+    def __init__(self, retention_config: dict, logger: logging.Logger = None):
+        self.retention_config = retention_config
+        self.gcs_prefix = retention_config["source_gcs_prefix"].rstrip("/")
+        self.project_id = retention_config["source_gcp_project_id"]
+        self.dataset = retention_config["source_bigquery_dataset"]
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+        self.fs, _ = fsspec.core.url_to_fs(self.gcs_prefix)
+        self.catalog = BigqueryArchiveCatalog(self.gcs_prefix, logger=self.logger)
+
+    @property
+    def dataset_archive_root(self) -> str:
+        return f"{self.gcs_prefix}/project={self.project_id}/dataset={self.dataset}"
+
+    def archive_prefix(self, archive_ts: str) -> str:
+        return f"{self.dataset_archive_root}/archive_ts={archive_ts}"
+
+    def list_archive_ts(self) -> list[str]:
+        """List the archives of the dataset from both the catalog and the `archive_ts=` directories.
+
+        Archives written before the catalog existed, or whose catalog record failed to be appended, are only found by
+        the listing, which is a single shallow listing of the dataset archive root.
+        """
+        archive_ts_set = set()
+        if self.retention_config.get("use_archive_catalog", True):
+            archive_ts_set.update(r.archive_ts for r in self.catalog.load_records(self.project_id, self.dataset))
+        _, root_path = fsspec.core.url_to_fs(self.dataset_archive_root)
+        if self.fs.exists(root_path):
+            archive_ts_set.update(
+                os.path.basename(p.rstrip("/")).split("=", 1)[1]
+                for p in self.fs.ls(root_path, detail=False)
+                if os.path.basename(p.rstrip("/")).startswith("archive_ts=")
+            )
+        return sorted(archive_ts_set)
+
+    def delete_archive_objects(self, archive_ts: str) -> int:
+        concurrency = self.retention_config.get("concurrency", 1)
+        batch_size = self.retention_config.get("deletion_batch_size", 1000)
+        _, archive_path = fsspec.core.url_to_fs(self.archive_prefix(archive_ts))
+        object_paths = self.fs.find(archive_path)
+        batches = [object_paths[i : i + batch_size] for i in range(0, len(object_paths), batch_size)]
+        self.logger.info(f"Deleting {len(object_paths)} objects of archive {archive_ts} in {len(batches)} batches")
+        deleted = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            task_requests = {executor.submit(self.fs.rm, batch): len(batch) for batch in batches}
+            for completed_task in as_completed(task_requests.keys()):
+                completed_task.result()
+                deleted += task_requests[completed_task]
+                elapsed = max(time.monotonic() - started, 1e-6)
+                self.logger.info(f"Archive {archive_ts} deletion progress: {deleted}/{len(object_paths)} objects, {deleted / elapsed:.1f} objects/s")
+        if self.fs.exists(archive_path):
+            self.fs.rm(archive_path, recursive=True)
+        return deleted
+
+    def execute(self) -> list[str]:
+        keep_rules = {k: int(self.retention_config.get(k, 0) or 0) for k in ("keep_last", "keep_daily", "keep_weekly", "keep_monthly")}
+        if not any(keep_rules.values()):
+            raise ValueError("At least one of keep_last, keep_daily, keep_weekly and keep_monthly must be positive")
+        kept, expired = select_expired_archive_ts(self.list_archive_ts(), **keep_rules)
+        self.logger.info(f"Retention of {self.dataset_archive_root} with {keep_rules} keeps {kept} and expires {expired}")
+        if self.retention_config.get("dry_run", False):
+            self.logger.info("Dry run, no archive is deleted")
+            return expired
+        total_deleted = 0
+        started = time.monotonic()
+        for archive_ts in expired:
+            total_deleted += self.delete_archive_objects(archive_ts)
+        self.catalog.remove([f"{self.project_id}.{self.dataset}.{archive_ts}" for archive_ts in expired])
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.logger.info(f"Expired {len(expired)} archives with {total_deleted} objects in {elapsed:.1f}s, {total_deleted / elapsed:.1f} objects/s")
+        return expired
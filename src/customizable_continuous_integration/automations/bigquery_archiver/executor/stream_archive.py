@@ -0,0 +1,190 @@
+"""This module hosts the streaming archive dataset action
+
+Entities are listed page by page and go through a bounded queue of fetch and archive tasks. An archived entity is
+appended to a local spool of the dataset manifest and only its summary record is kept, so the memory use stays flat
+regardless of the amount of entities in the dataset. The dataset manifest is assembled from the spool at the end.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Record the run timeline when `timeline_path` is configured
+"""
+
+import logging
+import os
+import tempfile
+import typing
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures.thread import ThreadPoolExecutor
+
+import google.cloud.bigquery
+
+from customizable_continuous_integration.automations.bigquery_archiver.catalog.index import ArchiveCatalogEntityRecord
+from customizable_continuous_integration.automations.bigquery_archiver.entity.dataset import BigqueryArchivedDatasetEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.external import BigqueryArchiveGenericExternalTableEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.routine import (
+    BigqueryArchiveFunctionEntity,
+    BigqueryArchiveStoredProcedureEntity,
+)
+from customizable_continuous_integration.automations.bigquery_archiver.entity.serialization import DEFAULT_MANIFEST_CODEC, write_streamed_entity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.table import BigqueryArchiveTableEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.view import (
+    BigqueryArchiveMaterializedViewEntity,
+    BigqueryArchiveViewEntity,
+)
+from customizable_continuous_integration.automations.bigquery_archiver.executor.fetch import BaseExecutor
+from customizable_continuous_integration.common_libs.profiling import profiled
+from customizable_continuous_integration.common_libs.timeline import timeline_recorded, timeline_span, traced
+
+# The dataset manifest field of every supported entity type
+STREAMED_ENTITY_FIELDS = {
+    BigqueryArchiveTableEntity: "tables",
+    BigqueryArchiveViewEntity: "views",
+    BigqueryArchiveMaterializedViewEntity: "materialized_views",
+    BigqueryArchiveFunctionEntity: "user_define_functions",
+    BigqueryArchiveStoredProcedureEntity: "stored_procedures",
+    BigqueryArchiveGenericExternalTableEntity: "external_tables",
+}
+
+
+class StreamedEntityResult(typing.NamedTuple):
+    entity_type: str
+    identity: str
+    field_name: str
+    serialized_entity: str
+    summary: ArchiveCatalogEntityRecord
+
+
+class ManifestSpool(object):
+    """The serialized entities of dataset manifest fields, spooled as json lines into local files."""
+
+    def __init__(self, spool_dir: str) -> None:
+        self.spool_dir = spool_dir
+        self.counts = {field_name: 0 for field_name in STREAMED_ENTITY_FIELDS.values()}
+        self._files = {field_name: open(os.path.join(spool_dir, f"{field_name}.jsonl"), "w") for field_name in self.counts}
+
+    def append(self, field_name: str, serialized_entity: str) -> None:
+        self._files[field_name].write(f"{serialized_entity}\n")
+        self.counts[field_name] += 1
+
+    def iter_field(self, field_name: str) -> typing.Iterator[str]:
+        with open(self._files[field_name].name, "r") as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+    def streamed_fields(self) -> dict[str, typing.Tuple[int, typing.Iterable[str]]]:
+        for f in self._files.values():
+            f.flush()
+        return {field_name: (count, self.iter_field(field_name)) for field_name, count in self.counts.items()}
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+
+
+class StreamingArchiveBigqueryDatasetExecutor(BaseExecutor):
+    def __init__(
+        self,
+        bigquery_archived_dataset_config: dict,
+        archive_config: dict,
+        logger: logging.Logger = None,
+        bigquery_client: google.cloud.bigquery.Client = None,
+    ):
+        self.bigquery_archived_dataset_entity = BigqueryArchivedDatasetEntity.from_dict(bigquery_archived_dataset_config)
+        self.archive_config = archive_config
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+        if not bigquery_client:
+            bigquery_client = google.cloud.bigquery.Client(project=self.bigquery_archived_dataset_entity.project_id)
+        self.bigquery_client = bigquery_client
+        self.entity_records: list[ArchiveCatalogEntityRecord] = []
+
+    def list_items(self) -> typing.Iterator[google.cloud.bigquery.table.TableListItem | google.cloud.bigquery.routine.Routine]:
+        """List the tables and routines of the dataset, the list pages are only requested as they are consumed."""
+        ds = self.bigquery_client.get_dataset(self.bigquery_archived_dataset_entity.dataset)
+        yield from self.bigquery_client.list_tables(dataset=ds)
+        yield from self.bigquery_client.list_routines(dataset=ds)
+
+    @profiled("archive-worker")
+    @traced(lambda self, item: getattr(item, "table_id", None) or item.routine_id, "entity")
+    def archive_single_item(
+        self, bigquery_item: google.cloud.bigquery.table.TableListItem | google.cloud.bigquery.routine.Routine
+    ) -> StreamedEntityResult | None:
+        entity = self.bigquery_archived_dataset_entity.generate_bigquery_archived_entity_from_table_item(bigquery_item)
+        if type(entity) not in STREAMED_ENTITY_FIELDS:
+            item_id = bigquery_item.table_id if hasattr(bigquery_item, "table_id") else bigquery_item.routine_id
+            self.logger.warning(f"{getattr(bigquery_item, 'table_type', 'ROUTINE')} {item_id} is not supported")
+            return None
+        with timeline_span("metadata-fetch", "io"):
+            entity.fetch_self(self.bigquery_client)
+        entity.archive_self(self.bigquery_client, self.archive_config)
+        return StreamedEntityResult(
+            entity.entity_type,
+            entity.identity,
+            STREAMED_ENTITY_FIELDS[type(entity)],
+            entity.model_dump_json(),
+            ArchiveCatalogEntityRecord.from_entity(entity),
+        )
+
+    @timeline_recorded(lambda self: self.archive_config.get("timeline_path"))
+    def execute(self) -> BigqueryArchivedDatasetEntity:
+        """Archive the dataset entities in streaming and return the dataset entity without its entity lists.
+
+        The summary records of the archived entities are kept in `entity_records`.
+        """
+        self.logger.info(f"Streaming the archive of the dataset {self.bigquery_archived_dataset_entity.fully_qualified_identity}")
+        self.bigquery_archived_dataset_entity.fetch_self(self.bigquery_client)
+        concurrency = self.archive_config.get("concurrency", 1)
+        queue_size = max(self.archive_config.get("streaming_queue_size", concurrency * 2), concurrency)
+        continue_on_failure = self.archive_config.get("continue_on_failure", False)
+        failed_tasks_results = {}
+
+        with tempfile.TemporaryDirectory() as spool_dir:
+            spool = ManifestSpool(spool_dir)
+
+            def handle_completed(completed_tasks: set[Future], task_items: dict[Future, str]) -> None:
+                for completed_task in completed_tasks:
+                    item_id = task_items.pop(completed_task)
+                    try:
+                        ret = completed_task.result()
+                    except Exception as e:
+                        if not continue_on_failure:
+                            self.logger.error(f"{item_id} FAILED with exception: {e}, execution will be stopped")
+                            executor.shutdown(wait=False, cancel_futures=True)
+                            exit(1)
+                        self.logger.error(f"{item_id} FAILED with exception: {e}, execution will be continued")
+                        failed_tasks_results[item_id] = e
+                        continue
+                    if ret:
+                        spool.append(ret.field_name, ret.serialized_entity)
+                        self.entity_records.append(ret.summary)
+                        self.logger.info(f"{ret.entity_type} {ret.identity} archived")
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                task_items = {}
+                for bigquery_item in self.list_items():
+                    if len(task_items) >= queue_size:
+                        done, _ = wait(task_items.keys(), return_when=FIRST_COMPLETED)
+                        handle_completed(done, task_items)
+                    item_id = bigquery_item.table_id if hasattr(bigquery_item, "table_id") else bigquery_item.routine_id
+                    task_items[executor.submit(self.archive_single_item, bigquery_item)] = item_id
+                handle_completed(set(wait(task_items.keys()).done), task_items)
+            if failed_tasks_results:
+                spool.close()
+                self.logger.error(f"These archive processes FAILED: {list(failed_tasks_results.keys())}")
+                exit(1)
+
+            self.bigquery_archived_dataset_entity.is_archived = True
+            self.bigquery_archived_dataset_entity.actual_archive_metadata_path = write_streamed_entity(
+                self.bigquery_archived_dataset_entity,
+                self.bigquery_archived_dataset_entity.metadata_serialized_path,
+                self.archive_config.get("manifest_codec", DEFAULT_MANIFEST_CODEC),
+                spool.streamed_fields(),
+            )
+            spool.close()
+        self.logger.info(f"Archived {len(self.entity_records)} entities with the spool counts {spool.counts}")
+        return self.bigquery_archived_dataset_entity
@@ -0,0 +1,331 @@
+"""This module hosts the verification action comparing the data of restored tables with their source tables
+
+Tables are compared partition by partition with row counts and order-independent fingerprints computed by Bigquery,
+`BIT_XOR(FARM_FINGERPRINT(TO_JSON_STRING(STRUCT(...))))` of the columns in the source column order, so no data leaves
+Bigquery, restored tables of reordered columns still match and a mismatch is located to its partitions.
+The partition metadata of both datasets is read from `INFORMATION_SCHEMA.PARTITIONS` first:
+  - partitions of different row counts are reported as mismatched without being fingerprinted
+  - partitions verified before and not modified since on both sides, by the verification state, are skipped
+Only the remaining partitions are fingerprinted, by queries pruned to the range of these partitions.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Fingerprint rows by the source column order
+"""
+
+import datetime
+import json
+import logging
+import typing
+from concurrent.futures import as_completed
+from concurrent.futures.thread import ThreadPoolExecutor
+
+import fsspec
+import google.api_core.exceptions
+import google.cloud.bigquery
+
+from customizable_continuous_integration.automations.bigquery_archiver.executor.fetch import BaseExecutor
+from customizable_continuous_integration.common_libs.timeline import timeline_recorded, traced
+
+WHOLE_TABLE_PARTITION_ID = "__TABLE__"
+NULL_PARTITION_ID = "__NULL__"
+UNPARTITIONED_PARTITION_ID = "__UNPARTITIONED__"
+TIME_PARTITION_ID_FORMATS = {"HOUR": "%Y%m%d%H", "DAY": "%Y%m%d", "MONTH": "%Y%m", "YEAR": "%Y"}
+
+
+class TablePartitioning(typing.NamedTuple):
+    """The partitioning of a table which partition ids can be computed from its rows, `None` compares whole tables."""
+
+    field: str
+    field_type: str
+    partition_type: str = ""
+    range_start: int = 0
+    range_end: int = 0
+    range_interval: int = 0
+
+    @classmethod
+    def from_bigquery_table(cls, table: google.cloud.bigquery.Table) -> typing.Optional["TablePartitioning"]:
+        field_types = {f.name: f.field_type for f in table.schema}
+        if table.time_partitioning and table.time_partitioning.field:
+            return cls(table.time_partitioning.field, field_types[table.time_partitioning.field], table.time_partitioning.type_)
+        if table.range_partitioning:
+            range_ = table.range_partitioning.range_
+            return cls(
+                table.range_partitioning.field, field_types[table.range_partitioning.field], "RANGE", range_.start, range_.end, range_.interval
+            )
+        # Ingestion time partitions are not kept by restoring, the whole table is compared instead
+        return None
+
+
+class PartitionFingerprint(typing.NamedTuple):
+    row_count: int
+    fingerprint: int | None
+
+
+class PartitionMismatch(typing.NamedTuple):
+    table: str
+    partition_id: str
+    reason: str
+    source: PartitionFingerprint | None
+    destination: PartitionFingerprint | None
+
+
+class TableVerificationResult(typing.NamedTuple):
+    table: str
+    matched_partitions: int
+    skipped_partitions: int
+    mismatches: list[PartitionMismatch]
+
+
+def partition_id_expression(partitioning: TablePartitioning | None) -> str:
+    """Render the expression of the partition id of a row of the table aliased `t`, the same as `INFORMATION_SCHEMA.PARTITIONS`."""
+    if not partitioning:
+        return f'"{WHOLE_TABLE_PARTITION_ID}"'
+    column = f"t.`{partitioning.field}`"
+    if partitioning.partition_type == "RANGE":
+        start, end, interval = partitioning.range_start, partitioning.range_end, partitioning.range_interval
+        return (
+            f'CASE WHEN {column} IS NULL THEN "{NULL_PARTITION_ID}" '
+            f'WHEN {column} < {start} OR {column} >= {end} THEN "{UNPARTITIONED_PARTITION_ID}" '
+            f"ELSE CAST({start} + DIV({column} - {start}, {interval}) * {interval} AS STRING) END"
+        )
+    format_function = {"DATE": "FORMAT_DATE", "DATETIME": "FORMAT_DATETIME"}.get(partitioning.field_type, "FORMAT_TIMESTAMP")
+    return f'IFNULL({format_function}("{TIME_PARTITION_ID_FORMATS[partitioning.partition_type]}", {column}), "{NULL_PARTITION_ID}")'
+
+
+def time_partition_bounds(partition_id: str, partition_type: str) -> tuple[datetime.datetime, datetime.datetime]:
+    started = datetime.datetime.strptime(partition_id, TIME_PARTITION_ID_FORMATS[partition_type])
+    if partition_type == "HOUR":
+        return started, started + datetime.timedelta(hours=1)
+    if partition_type == "DAY":
+        return started, started + datetime.timedelta(days=1)
+    if partition_type == "MONTH":
+        return started, (started + datetime.timedelta(days=32)).replace(day=1)
+    return started, started.replace(year=started.year + 1)
+
+
+def partition_range_filter(partitioning: TablePartitioning | None, partition_ids: typing.Iterable[str]) -> str:
+    """Render a filter on the partition column covering the partitions, which prunes the partitions out of the range.
+
+    An empty string is returned when the partitions cannot be bounded, e.g. the `__NULL__` partition is among them.
+    """
+    partition_ids = list(partition_ids)
+    if not partitioning or not partition_ids or any(p.startswith("__") for p in partition_ids):
+        return ""
+    column = f"t.`{partitioning.field}`"
+    if partitioning.partition_type == "RANGE":
+        starts = [int(p) for p in partition_ids]
+        return f"{column} >= {min(starts)} AND {column} < {max(starts) + partitioning.range_interval}"
+    bounds = [time_partition_bounds(p, partitioning.partition_type) for p in partition_ids]
+    lower, upper = min(b[0] for b in bounds), max(b[1] for b in bounds)
+    if partitioning.field_type == "DATE":
+        return f"{column} >= DATE '{lower:%Y-%m-%d}' AND {column} < DATE '{upper:%Y-%m-%d}'"
+    literal_type = "DATETIME" if partitioning.field_type == "DATETIME" else "TIMESTAMP"
+    return f"{column} >= {literal_type} '{lower:%Y-%m-%d %H:%M:%S}' AND {column} < {literal_type} '{upper:%Y-%m-%d %H:%M:%S}'"
+
+
+def generate_fingerprint_query(
+    table_id: str, partitioning: TablePartitioning | None, partition_ids: typing.Iterable[str] = None, columns: list[str] = None
+) -> str:
+    """Render the query of the row count and the fingerprint of every partition of a table.
+
+    Args:
+        table_id (str): The `project.dataset.table` of the table
+        partitioning (TablePartitioning): The partitioning of the table, `None` to fingerprint the whole table
+        partition_ids (Iterable): The partitions to fingerprint, all partitions when not given
+        columns (list): The columns fingerprinted in this order, so tables of reordered columns match, all columns when not given
+    Return:
+        str: The query returning `partition_id`, `row_count` and `fingerprint` columns
+    """
+    range_filter = partition_range_filter(partitioning, partition_ids) if partition_ids is not None else ""
+    row_expression = f"STRUCT({', '.join([f't.`{c}` AS `{c}`' for c in columns])})" if columns else "t"
+    return f"""SELECT {partition_id_expression(partitioning)} AS partition_id, COUNT(*) AS row_count,
+            BIT_XOR(FARM_FINGERPRINT(TO_JSON_STRING({row_expression}))) AS fingerprint
+            FROM `{table_id}` AS t
+            {f"WHERE {range_filter}" if range_filter else ""}
+            GROUP BY partition_id"""
+
+
+class VerifyRestoredBigqueryDatasetExecutor(BaseExecutor):
+    def __init__(self, verification_config: dict, logger: logging.Logger = None, bigquery_client: google.cloud.bigquery.Client = None):
+        self.verification_config = verification_config
+        self.source_dataset = f"{verification_config['source_gcp_project_id']}.{verification_config['source_bigquery_dataset']}"
+        self.destination_dataset = f"{verification_config['destination_gcp_project_id']}.{verification_config['destination_bigquery_dataset']}"
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+        if not bigquery_client:
+            bigquery_client = google.cloud.bigquery.Client(project=verification_config["destination_gcp_project_id"])
+        self.bigquery_client = bigquery_client
+
+    def list_tables(self) -> list[str]:
+        if self.verification_config.get("tables"):
+            return list(self.verification_config["tables"])
+        return sorted(t.table_id for t in self.bigquery_client.list_tables(self.source_dataset) if t.table_type == "TABLE")
+
+    def load_verification_state(self) -> dict[str, dict[str, dict[str, typing.Any]]]:
+        state_path = self.verification_config.get("verification_state_path")
+        if not state_path:
+            return {}
+        fs, path = fsspec.core.url_to_fs(state_path)
+        if not fs.exists(path):
+            return {}
+        with fs.open(path, "r") as f:
+            return json.load(f)
+
+    def save_verification_state(self, state: dict[str, dict[str, dict[str, typing.Any]]]) -> None:
+        state_path = self.verification_config.get("verification_state_path")
+        if state_path:
+            with fsspec.open(state_path, "w") as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+
+    def fetch_partition_metadata(self, dataset: str) -> dict[str, dict[str, tuple[int, str]]]:
+        """Return the row counts and the last modified times of the partitions of the tables in a dataset."""
+        rows = self.bigquery_client.query(
+            f"SELECT table_name, partition_id, total_rows, last_modified_time FROM `{dataset}.INFORMATION_SCHEMA.PARTITIONS`"
+        ).result()
+        metadata = {}
+        for row in rows:
+            metadata.setdefault(row["table_name"], {})[row["partition_id"] or WHOLE_TABLE_PARTITION_ID] = (
+                row["total_rows"] or 0,
+                row["last_modified_time"].isoformat() if row["last_modified_time"] else "",
+            )
+        return metadata
+
+    def fetch_table_layout(self, table: str) -> tuple[TablePartitioning | None, bool, list[str], list[str]]:
+        """Return the partitioning of the source table, whether the destination table is partitioned the same and the columns of both."""
+        source_table = self.bigquery_client.get_table(f"{self.source_dataset}.{table}")
+        destination_table = self.bigquery_client.get_table(f"{self.destination_dataset}.{table}")
+        source_partitioning = TablePartitioning.from_bigquery_table(source_table)
+        destination_partitioning = TablePartitioning.from_bigquery_table(destination_table)
+        return (
+            source_partitioning,
+            source_partitioning == destination_partitioning,
+            [f.name for f in source_table.schema],
+            [f.name for f in destination_table.schema],
+        )
+
+    @traced(lambda self, table_id, partitioning, partition_ids, columns: f"fingerprint {table_id}", "entity")
+    def fetch_fingerprints(
+        self, table_id: str, partitioning: TablePartitioning | None, partition_ids: set[str] | None, columns: list[str]
+    ) -> dict[str, PartitionFingerprint]:
+        rows = self.bigquery_client.query(
+            generate_fingerprint_query(table_id, partitioning, partition_ids, columns), job_id_prefix=f"verify_{table_id.replace('.', '_')}_"
+        ).result()
+        fingerprints = {r["partition_id"]: PartitionFingerprint(r["row_count"], r["fingerprint"]) for r in rows}
+        if partition_ids is None:
+            return fingerprints
+        return {p: fingerprints.get(p, PartitionFingerprint(0, None)) for p in partition_ids}
+
+    def plan_table(
+        self,
+        table: str,
+        partitioning: TablePartitioning | None,
+        same_partitioning: bool,
+        source_metadata: dict[str, tuple[int, str]],
+        destination_metadata: dict[str, tuple[int, str]],
+        table_state: dict[str, dict[str, typing.Any]],
+    ) -> tuple[set[str] | None, list[PartitionMismatch], int]:
+        """Plan the partitions of a table to fingerprint by the partition metadata.
+
+        Return:
+            tuple: The partitions to fingerprint (`None` for all of them), the mismatches found by metadata and the skipped partition count
+        """
+        whole_table = {WHOLE_TABLE_PARTITION_ID}
+        if not same_partitioning or (partitioning is None and (set(source_metadata) != whole_table or set(destination_metadata) != whole_table)):
+            # Without partitions comparable by metadata, e.g. ingestion time partitions, all partitions are fingerprinted
+            return None, [], 0
+        partition_ids, mismatches, skipped = set(), [], 0
+        for partition_id in sorted(set(source_metadata) | set(destination_metadata)):
+            source_rows, source_modified = source_metadata.get(partition_id, (0, ""))
+            destination_rows, destination_modified = destination_metadata.get(partition_id, (0, ""))
+            if source_rows != destination_rows:
+                mismatches.append(
+                    PartitionMismatch(
+                        table, partition_id, "row_count", PartitionFingerprint(source_rows, None), PartitionFingerprint(destination_rows, None)
+                    )
+                )
+                continue
+            verified = table_state.get(partition_id, {})
+            if verified.get("source_last_modified") == source_modified and verified.get("destination_last_modified") == destination_modified:
+                skipped += 1
+                continue
+            partition_ids.add(partition_id)
+        return partition_ids, mismatches, skipped
+
+    @timeline_recorded(lambda self: self.verification_config.get("timeline_path"))
+    def execute(self) -> list[TableVerificationResult]:
+        concurrency = self.verification_config.get("concurrency", 1)
+        tables = self.list_tables()
+        state = self.load_verification_state()
+        self.logger.info(f"Verifying {len(tables)} tables of {self.destination_dataset} against {self.source_dataset}")
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            source_metadata_task = executor.submit(self.fetch_partition_metadata, self.source_dataset)
+            destination_metadata_task = executor.submit(self.fetch_partition_metadata, self.destination_dataset)
+            layout_tasks = {t: executor.submit(self.fetch_table_layout, t) for t in tables}
+            source_metadata, destination_metadata = source_metadata_task.result(), destination_metadata_task.result()
+
+            plans = {}
+            fingerprint_tasks = {}
+            for table in tables:
+                try:
+                    partitioning, same_partitioning, source_columns, destination_columns = layout_tasks[table].result()
+                except google.api_core.exceptions.NotFound as e:
+                    plans[table] = (set(), [PartitionMismatch(table, WHOLE_TABLE_PARTITION_ID, f"missing table: {e}", None, None)], 0)
+                    continue
+                if set(source_columns) != set(destination_columns):
+                    reason = f"columns: {sorted(set(source_columns) ^ set(destination_columns))} are not in both tables"
+                    plans[table] = (set(), [PartitionMismatch(table, WHOLE_TABLE_PARTITION_ID, reason, None, None)], 0)
+                    continue
+                plans[table] = self.plan_table(
+                    table,
+                    partitioning,
+                    same_partitioning,
+                    source_metadata.get(table, {}),
+                    destination_metadata.get(table, {}),
+                    state.get(f"{self.source_dataset}.{table}", {}),
+                )
+                partition_ids = plans[table][0]
+                if partition_ids is not None and not partition_ids:
+                    continue
+                for side, dataset in (("source", self.source_dataset), ("destination", self.destination_dataset)):
+                    task = executor.submit(self.fetch_fingerprints, f"{dataset}.{table}", partitioning, partition_ids, source_columns)
+                    fingerprint_tasks[task] = (table, side)
+            fingerprints = {}
+            for completed_task in as_completed(fingerprint_tasks.keys()):
+                table, side = fingerprint_tasks[completed_task]
+                fingerprints[(table, side)] = completed_task.result()
+
+        results = []
+        for table in tables:
+            _, mismatches, skipped = plans[table]
+            source_fingerprints = fingerprints.get((table, "source"), {})
+            destination_fingerprints = fingerprints.get((table, "destination"), {})
+            table_state = state.setdefault(f"{self.source_dataset}.{table}", {})
+            matched = 0
+            for partition_id in sorted(set(source_fingerprints) | set(destination_fingerprints)):
+                source, destination = source_fingerprints.get(partition_id), destination_fingerprints.get(partition_id)
+                if source != destination:
+                    mismatches.append(PartitionMismatch(table, partition_id, "fingerprint", source, destination))
+                    table_state.pop(partition_id, None)
+                    continue
+                matched += 1
+                table_state[partition_id] = {
+                    "source_last_modified": source_metadata.get(table, {}).get(partition_id, (0, ""))[1],
+                    "destination_last_modified": destination_metadata.get(table, {}).get(partition_id, (0, ""))[1],
+                    "row_count": source.row_count,
+                    "fingerprint": source.fingerprint,
+                }
+            for mismatch in mismatches:
+                self.logger.error(
+                    f"{table} partition {mismatch.partition_id} MISMATCHED by {mismatch.reason}: "
+                    f"source {mismatch.source}, destination {mismatch.destination}"
+                )
+            self.logger.info(f"{table} verified: {matched} partitions matched, {skipped} skipped, {len(mismatches)} mismatched")
+            results.append(TableVerificationResult(table, matched, skipped, mismatches))
+        self.save_verification_state(state)
+        return results
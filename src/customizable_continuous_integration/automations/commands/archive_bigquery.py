@@ -9,19 +9,37 @@ Revision History:
   28/03/2025   Ryan, Gao       Add default help argument
   11/04/2025   Ryan, Gao       Strip trailing slash for gcs prefix and archive path
   21/06/2025   Ryan, Gao       Add variadic parameters
+  19/10/2026   Ryan, Gao       Load dataset manifest from bytes with codec detection
+  19/10/2026   Ryan, Gao       Maintain archive catalog index; Resolve restore archive from the catalog
+  19/10/2026   Ryan, Gao       Add retention command expiring archives
+  19/10/2026   Ryan, Gao       Add streaming archive mode
+  19/10/2026   Ryan, Gao       Add verification command comparing restored tables with their source tables
 """
 
 import argparse
-import json
 import logging
 import sys
 
 import fsspec
 import yaml
 
+from customizable_continuous_integration.automations.bigquery_archiver.catalog.index import (
+    ARCHIVE_TS_SELECTOR_LATEST,
+    ArchiveCatalogRecord,
+    BigqueryArchiveCatalog,
+)
+from customizable_continuous_integration.automations.bigquery_archiver.entity.dataset import BigqueryArchivedDatasetEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.serialization import (
+    DEFAULT_MANIFEST_CODEC,
+    detect_manifest_codec,
+    read_entity,
+)
 from customizable_continuous_integration.automations.bigquery_archiver.executor.archive import ArchiveSourceBigqueryDatasetExecutor
 from customizable_continuous_integration.automations.bigquery_archiver.executor.fetch import FetchSourceBigqueryDatasetExecutor
 from customizable_continuous_integration.automations.bigquery_archiver.executor.restore import RestoreBigqueryDatasetExecutor
+from customizable_continuous_integration.automations.bigquery_archiver.executor.retention import RetentionBigqueryArchiveExecutor
+from customizable_continuous_integration.automations.bigquery_archiver.executor.stream_archive import StreamingArchiveBigqueryDatasetExecutor
+from customizable_continuous_integration.automations.bigquery_archiver.executor.verification import VerifyRestoredBigqueryDatasetExecutor
 
 
 def get_bigquery_archiver_logger(logger_name: str) -> logging.Logger:
@@ -48,9 +66,43 @@ def generate_restore_arguments_parser() -> argparse.ArgumentParser:
     args_parser.add_argument("--restore-destination-gcp-project-id", default="")
     args_parser.add_argument("--restore-destination-bigquery-dataset", default="")
     args_parser.add_argument("--restore-source-gcs-archive", default="")
+    args_parser.add_argument("--restore-source-gcs-prefix", default="")
+    args_parser.add_argument("--restore-source-gcp-project-id", default="")
+    args_parser.add_argument("--restore-source-bigquery-dataset", default="")
+    args_parser.add_argument("--restore-archive-ts", default="")
     return args_parser
 
 
+def generate_retention_arguments_parser() -> argparse.ArgumentParser:
+    args_parser = argparse.ArgumentParser(add_help=True)
+    args_parser.add_argument("--retention-config-file", default="")
+    args_parser.add_argument("--retention-source-gcs-prefix", default="")
+    args_parser.add_argument("--retention-source-gcp-project-id", default="")
+    args_parser.add_argument("--retention-source-bigquery-dataset", default="")
+    args_parser.add_argument("--retention-dry-run", action="store_true")
+    return args_parser
+
+
+def generate_verification_arguments_parser() -> argparse.ArgumentParser:
+    args_parser = argparse.ArgumentParser(add_help=True)
+    args_parser.add_argument("--verification-config-file", default="")
+    args_parser.add_argument("--verification-source-gcp-project-id", default="")
+    args_parser.add_argument("--verification-source-bigquery-dataset", default="")
+    args_parser.add_argument("--verification-destination-gcp-project-id", default="")
+    args_parser.add_argument("--verification-destination-bigquery-dataset", default="")
+    return args_parser
+
+
+def verify_restored_dataset(verification_config: dict, _logger: logging.Logger) -> bool:
+    results = VerifyRestoredBigqueryDatasetExecutor(verification_config=verification_config, logger=_logger).execute()
+    mismatched_tables = [r.table for r in results if r.mismatches]
+    if mismatched_tables:
+        _logger.error(f"These tables MISMATCHED their source tables: {mismatched_tables}")
+        return False
+    _logger.info(f"All {len(results)} tables matched their source tables")
+    return True
+
+
 def archive_command(cli_args: list[str], *args, **kargs) -> None:
     _logger = get_bigquery_archiver_logger("bigquery_archive")
     args_parser = generate_archive_arguments_parser()
@@ -83,12 +135,25 @@ def archive_command(cli_args: list[str], *args, **kargs) -> None:
             "identity": archive_config["source_bigquery_dataset"],
             "gcs_prefix": archive_config["destination_gcs_prefix"],
         }
-        dataset_entity = FetchSourceBigqueryDatasetExecutor(bigquery_archived_dataset_config=bigquery_dataset_config, logger=_logger).execute()
-        archive_executor = ArchiveSourceBigqueryDatasetExecutor(
-            bigquery_archived_dataset_entity=dataset_entity, archive_config=archive_config, logger=_logger
-        )
-        dataset_entity = archive_executor.execute()
-        _logger.info(f"Archived dataset :\n {dataset_entity.model_dump_json(indent=2)}")
+        manifest_codec = archive_config.get("manifest_codec", DEFAULT_MANIFEST_CODEC)
+        if archive_config.get("streaming", False):
+            archive_executor = StreamingArchiveBigqueryDatasetExecutor(
+                bigquery_archived_dataset_config=bigquery_dataset_config, archive_config=archive_config, logger=_logger
+            )
+            dataset_entity = archive_executor.execute()
+            catalog_record = ArchiveCatalogRecord.from_entity_records(dataset_entity, archive_executor.entity_records, manifest_codec)
+        else:
+            dataset_entity = FetchSourceBigqueryDatasetExecutor(bigquery_archived_dataset_config=bigquery_dataset_config, logger=_logger).execute()
+            archive_executor = ArchiveSourceBigqueryDatasetExecutor(
+                bigquery_archived_dataset_entity=dataset_entity, archive_config=archive_config, logger=_logger
+            )
+            dataset_entity = archive_executor.execute()
+            catalog_record = None
+            _logger.info(f"Archived dataset :\n {dataset_entity.model_dump_json(indent=2)}")
+        if archive_config.get("update_archive_catalog", True):
+            catalog = BigqueryArchiveCatalog(archive_config["destination_gcs_prefix"], logger=_logger)
+            catalog.append(catalog_record or ArchiveCatalogRecord.from_dataset_entity(dataset_entity, manifest_codec))
+            catalog.compact()
         _logger.info(f"Archived dataset is located: {dataset_entity.metadata_serialized_path.rstrip('/dataset.json')}")
         _logger.info(f"Archiving task {archive_config.get('name', 'ad-hoc')} completed")
     exit(0)
@@ -111,18 +176,118 @@ def restore_command(cli_args: list[str], *args, **kargs) -> None:
             restore_config["destination_bigquery_dataset"] = args.restore_destination_bigquery_dataset
         if args.restore_source_gcs_archive:
             restore_config["source_gcs_archive"] = args.restore_source_gcs_archive
+        if args.restore_source_gcs_prefix:
+            restore_config["source_gcs_prefix"] = args.restore_source_gcs_prefix
+        if args.restore_source_gcp_project_id:
+            restore_config["source_gcp_project_id"] = args.restore_source_gcp_project_id
+        if args.restore_source_bigquery_dataset:
+            restore_config["source_bigquery_dataset"] = args.restore_source_bigquery_dataset
+        if args.restore_archive_ts:
+            restore_config["archive_ts"] = args.restore_archive_ts
+        manifest_codec = None
+        if not restore_config.get("source_gcs_archive") and restore_config.get("source_gcs_prefix"):
+            if not restore_config.get("source_gcp_project_id") or not restore_config.get("source_bigquery_dataset"):
+                _logger.error("Missing source project and dataset to resolve the archive from the catalog")
+                exit(1)
+            archive_ts_selector = str(restore_config.get("archive_ts", ARCHIVE_TS_SELECTOR_LATEST))
+            catalog_record = BigqueryArchiveCatalog(restore_config["source_gcs_prefix"], logger=_logger).resolve_archive(
+                restore_config["source_gcp_project_id"], restore_config["source_bigquery_dataset"], archive_ts_selector
+            )
+            if not catalog_record:
+                _logger.error(f"No archive matches {archive_ts_selector} in the catalog under {restore_config['source_gcs_prefix']}")
+                exit(1)
+            _logger.info(f"Resolved archive {catalog_record.archive_key} from the catalog")
+            restore_config["source_gcs_archive"] = catalog_record.archive_prefix
+            manifest_codec = catalog_record.manifest_codec
         if not restore_config.get("source_gcs_archive"):
             _logger.error("Missing required parameters for restoring task")
             exit(1)
         restore_config["source_gcs_archive"] = restore_config["source_gcs_archive"].rstrip("/")
         _logger.info(f"Restoring task {restore_config.get('name', 'ad-hoc')} with config: {restore_config}")
-        with fsspec.open(f"{restore_config['source_gcs_archive']}/dataset.json") as f:
-            bigquery_dataset_config = json.load(f)
-        bigquery_dataset_config["destination_gcp_project_id"] = restore_config["destination_gcp_project_id"]
-        bigquery_dataset_config["destination_bigquery_dataset"] = restore_config["destination_bigquery_dataset"]
+        manifest_path = f"{restore_config['source_gcs_archive']}/dataset.json"
+        dataset_entity = read_entity(BigqueryArchivedDatasetEntity, manifest_path, manifest_codec or detect_manifest_codec(manifest_path))
+        dataset_entity.destination_gcp_project_id = restore_config["destination_gcp_project_id"]
+        dataset_entity.destination_bigquery_dataset = restore_config["destination_bigquery_dataset"]
         restore_executor = RestoreBigqueryDatasetExecutor(
-            bigquery_archived_dataset_config=bigquery_dataset_config, restore_config=restore_config, logger=_logger
+            bigquery_archived_dataset_config=dataset_entity, restore_config=restore_config, logger=_logger
         )
         restore_executor.execute()
         _logger.info(f"Restoring task {restore_config.get('name', 'ad-hoc')} completed")
+        if restore_config.get("verify_restore", False):
+            verification_config = dict(
+                restore_config,
+                source_gcp_project_id=dataset_entity.project_id,
+                source_bigquery_dataset=dataset_entity.dataset,
+                # The timeline of the restore is not overwritten by the verification
+                timeline_path=None,
+                tables=[t.identity for t in dataset_entity.tables if not restore_config.get("skip_restore", {}).get(t.identity, False)],
+            )
+            if not verify_restored_dataset(verification_config, _logger):
+                exit(1)
+    exit(0)
+
+
+def retention_command(cli_args: list[str], *args, **kargs) -> None:
+    _logger = get_bigquery_archiver_logger("bigquery_retention")
+    args_parser = generate_retention_arguments_parser()
+    args = args_parser.parse_args(cli_args)
+    retention_configs = [{"task_type": "retention"}]
+    if args.retention_config_file:
+        with fsspec.open(args.retention_config_file) as f:
+            retention_configs = yaml.safe_load(f)
+    for retention_config in retention_configs:
+        if retention_config.get("task_type", "") != "retention":
+            continue
+        if args.retention_source_gcs_prefix:
+            retention_config["source_gcs_prefix"] = args.retention_source_gcs_prefix
+        if args.retention_source_gcp_project_id:
+            retention_config["source_gcp_project_id"] = args.retention_source_gcp_project_id
+        if args.retention_source_bigquery_dataset:
+            retention_config["source_bigquery_dataset"] = args.retention_source_bigquery_dataset
+        if args.retention_dry_run:
+            retention_config["dry_run"] = True
+        if (
+            not retention_config.get("source_gcs_prefix")
+            or not retention_config.get("source_gcp_project_id")
+            or not retention_config.get("source_bigquery_dataset")
+        ):
+            _logger.error("Missing required parameters for retention task")
+            exit(1)
+        _logger.info(f"Retention task {retention_config.get('name', 'ad-hoc')} with config: {retention_config}")
+        RetentionBigqueryArchiveExecutor(retention_config=retention_config, logger=_logger).execute()
+        _logger.info(f"Retention task {retention_config.get('name', 'ad-hoc')} completed")
     exit(0)
+
+
+def verification_command(cli_args: list[str], *args, **kargs) -> None:
+    _logger = get_bigquery_archiver_logger("bigquery_verification")
+    args_parser = generate_verification_arguments_parser()
+    args = args_parser.parse_args(cli_args)
+    verification_configs = [{"task_type": "verification"}]
+    if args.verification_config_file:
+        with fsspec.open(args.verification_config_file) as f:
+            verification_configs = yaml.safe_load(f)
+    all_matched = True
+    for verification_config in verification_configs:
+        if verification_config.get("task_type", "") != "verification":
+            continue
+        if args.verification_source_gcp_project_id:
+            verification_config["source_gcp_project_id"] = args.verification_source_gcp_project_id
+        if args.verification_source_bigquery_dataset:
+            verification_config["source_bigquery_dataset"] = args.verification_source_bigquery_dataset
+        if args.verification_destination_gcp_project_id:
+            verification_config["destination_gcp_project_id"] = args.verification_destination_gcp_project_id
+        if args.verification_destination_bigquery_dataset:
+            verification_config["destination_bigquery_dataset"] = args.verification_destination_bigquery_dataset
+        if (
+            not verification_config.get("source_gcp_project_id")
+            or not verification_config.get("source_bigquery_dataset")
+            or not verification_config.get("destination_gcp_project_id")
+            or not verification_config.get("destination_bigquery_dataset")
+        ):
+            _logger.error("Missing required parameters for verification task")
+            exit(1)
+        _logger.info(f"Verification task {verification_config.get('name', 'ad-hoc')} with config: {verification_config}")
+        all_matched = verify_restored_dataset(verification_config, _logger) and all_matched
+        _logger.info(f"Verification task {verification_config.get('name', 'ad-hoc')} completed")
+    exit(0 if all_matched else 1)
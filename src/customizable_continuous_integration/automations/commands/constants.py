@@ -10,15 +10,14 @@ Revision History:
   06/03/2025   Ryan, Gao       Add help command to show info
   28/03/2025   Ryan, Gao       Add default help command
   21/06/2025   Ryan, Gao       Add variadic parameters to commands dictionary
+  19/10/2026   Ryan, Gao       Add retain bigquery archives command
+  19/10/2026   Ryan, Gao       Import command modules lazily
+  19/10/2026   Ryan, Gao       Add verify bigquery restore command
 """
 
 import typing
 
-from customizable_continuous_integration.automations.commands.archive_bigquery import archive_command, restore_command
-from customizable_continuous_integration.automations.commands.integration_test import integration_command
-from customizable_continuous_integration.automations.commands.run_shell import run_shell_commands
-from customizable_continuous_integration.automations.commands.write_protection_hook import write_protection_command
-from customizable_continuous_integration.common_libs.collections import ImmutableDictWrapper
+from customizable_continuous_integration.common_libs.collections import LazyImmutableDictWrapper
 
 CLICommandHandlerType = typing.Callable[[list[str], list, dict], None]
 
@@ -29,13 +28,18 @@ def not_implemented_command(cli_args: list[str], *args, **kargs) -> None:
 
 SentinelCommand = not_implemented_command
 
-INTEGRATION_CLI_COMMANDS_REGISTRY: ImmutableDictWrapper[str, CLICommandHandlerType] = ImmutableDictWrapper(
+COMMANDS_PACKAGE = "customizable_continuous_integration.automations.commands"
+
+# The command modules are only imported when their commands are retrieved, so a command does not pay for the others
+INTEGRATION_CLI_COMMANDS_REGISTRY: LazyImmutableDictWrapper[str, CLICommandHandlerType] = LazyImmutableDictWrapper(
     {
-        "integration-test": integration_command,
-        "run-shell": run_shell_commands,
-        "write-protection": write_protection_command,
-        "archive-bigquery": archive_command,
-        "restore-bigquery": restore_command,
+        "integration-test": f"{COMMANDS_PACKAGE}.integration_test:integration_command",
+        "run-shell": f"{COMMANDS_PACKAGE}.run_shell:run_shell_commands",
+        "write-protection": f"{COMMANDS_PACKAGE}.write_protection_hook:write_protection_command",
+        "archive-bigquery": f"{COMMANDS_PACKAGE}.archive_bigquery:archive_command",
+        "restore-bigquery": f"{COMMANDS_PACKAGE}.archive_bigquery:restore_command",
+        "retain-bigquery": f"{COMMANDS_PACKAGE}.archive_bigquery:retention_command",
+        "verify-bigquery": f"{COMMANDS_PACKAGE}.archive_bigquery:verification_command",
     }
 )
 
@@ -9,6 +9,8 @@ Revision History:
   31/10/2024   Ryan, Gao       Refactor the input parameter automation-config-file
   21/06/2025   Ryan, Gao       Add variadic parameters
   14/07/2025   Ryan, Gao       Add virtual environment setup and activation
+  19/10/2026   Ryan, Gao       Run automations on a process pool when concurrency is above 1
+  19/10/2026   Ryan, Gao       Reuse cached virtual environments
 """
 
 import os
@@ -25,10 +27,11 @@ from virtualenv.__main__ import run_with_catch as venv_run_with_catch
 
 from customizable_continuous_integration.automations.integration.argument import generate_arguments_parser
 from customizable_continuous_integration.automations.integration.logging import _logger
+from customizable_continuous_integration.automations.integration.venv_cache import DEFAULT_VENV_CACHE_MAX_ENTRIES, VirtualEnvironmentCache
 
 
-def create_venv(venv_config: dict[str, typing.Any]) -> str:
-    venv_path = tempfile.mkdtemp()
+def create_venv(venv_config: dict[str, typing.Any], venv_path: str = None) -> str:
+    venv_path = venv_path or tempfile.mkdtemp()
     venv_args = ["--system-site-packages"]
     venv_args.extend([f"--python=python{sys.version_info.major}.{sys.version_info.minor}", venv_path])
     _logger.info(f"Setting up virtual environment {venv_path} with config: {venv_config} args: {venv_args}")
@@ -36,7 +39,7 @@ def create_venv(venv_config: dict[str, typing.Any]) -> str:
     return venv_path
 
 
-def activate_venv_info(venv_path: str, venv_config: dict[str, typing.Any]) -> dict[str, typing.Any]:
+def activate_venv_info(venv_path: str, venv_config: dict[str, typing.Any], install_requirements: bool = True) -> dict[str, typing.Any]:
     py_env_backup = dict()
     py_env_backup["os_environ"] = os.environ.copy()
     py_env_backup["sys_path"] = sys.path.copy()
@@ -45,6 +48,8 @@ def activate_venv_info(venv_path: str, venv_config: dict[str, typing.Any]) -> di
     venv_activate_this_file = f"{venv_path}/bin/activate_this.py"
     _logger.info(f"Activated virtual environment at {venv_path}")
     runpy.run_path(venv_activate_this_file)
+    if not install_requirements:
+        return py_env_backup
     temp_req_file = tempfile.mktemp()
     with open(temp_req_file, "w") as f:
         for r in venv_config.get("requirements", []):
@@ -65,6 +70,29 @@ def deactivate_venv_info(py_env_backup: dict[str, typing.Any]) -> None:
         sys.real_prefix = py_env_backup["sys_real_prefix"]
 
 
+def acquire_cached_venv(venv_cache: VirtualEnvironmentCache, venv_config: dict[str, typing.Any]) -> tuple[str, str, dict[str, typing.Any]]:
+    """Activate the cached virtual environment of the requirements, creating it in the cache on misses.
+
+    Return:
+        tuple: The cache key, the virtual environment path and the python environment backup
+    """
+    cache_key = venv_cache.cache_key(venv_config.get("requirements", []))
+    venv_path = os.fspath(venv_cache.entry_path(cache_key))
+    try:
+        if venv_cache.lock_for_lookup(cache_key):
+            _logger.info(f"Reusing cached virtual environment {venv_path}")
+            py_env_backup = activate_venv_info(venv_path, venv_config, install_requirements=False)
+        else:
+            create_venv(venv_config, venv_path)
+            py_env_backup = activate_venv_info(venv_path, venv_config)
+            venv_cache.mark_ready(cache_key)
+        venv_cache.lock_for_use(cache_key)
+    except Exception:
+        venv_cache.release(cache_key)
+        raise
+    return cache_key, venv_path, py_env_backup
+
+
 def integration_command(cli_args: list[str], *args, **kargs) -> None:
     args_parser = generate_arguments_parser()
     args = args_parser.parse_args(cli_args)
@@ -76,15 +104,30 @@ def integration_command(cli_args: list[str], *args, **kargs) -> None:
         _logger.info(f"Integration test config:\n {integration_test_config}")
         py_env_backup = None
         venv_path = None
-        if "virtual_environment" in integration_test_config:
-            venv_path = create_venv(integration_test_config["virtual_environment"])
-            py_env_backup = activate_venv_info(venv_path, integration_test_config["virtual_environment"])
+        venv_cache = None
+        venv_cache_key = None
+        venv_config = integration_test_config.get("virtual_environment", None)
+        if venv_config is not None and venv_config.get("cache", True):
+            venv_cache = VirtualEnvironmentCache(
+                venv_config.get("cache_dir", None), venv_config.get("max_cached_environments", DEFAULT_VENV_CACHE_MAX_ENTRIES)
+            )
+            venv_cache_key, venv_path, py_env_backup = acquire_cached_venv(venv_cache, venv_config)
+        elif venv_config is not None:
+            venv_path = create_venv(venv_config)
+            py_env_backup = activate_venv_info(venv_path, venv_config)
+
+        from customizable_continuous_integration.automations.integration.executor import execute_commands_in_process, execute_commands_in_serial
 
-        from customizable_continuous_integration.automations.integration.executor import execute_commands_in_serial
-        ret = execute_commands_in_serial(integration_test_config)
-        if "virtual_environment" in integration_test_config and py_env_backup is not None and venv_path is not None:
+        if integration_test_config.get("concurrency", 1) > 1:
+            ret = execute_commands_in_process(integration_test_config)
+        else:
+            ret = execute_commands_in_serial(integration_test_config)
+        if venv_config is not None and py_env_backup is not None and venv_path is not None:
             deactivate_venv_info(py_env_backup)
-            if not integration_test_config.get("keep_virtual_environment", False):
+            if venv_cache is not None:
+                venv_cache.release(venv_cache_key)
+                venv_cache.evict()
+            elif not venv_config.get("keep_virtual_environment", integration_test_config.get("keep_virtual_environment", False)):
                 _logger.info(f"Deleted virtual environment under {venv_path}")
                 shutil.rmtree(venv_path)
             _logger.info(f"Deactivated virtual environment under {venv_path}")
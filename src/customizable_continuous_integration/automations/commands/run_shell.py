@@ -7,13 +7,26 @@ Revision History:
 ------------------------------------------------------------------------------
   04/09/2024   Ryan, Gao       Initial creation
   21/06/2025   Ryan, Gao       Add variadic parameters
+  19/10/2026   Ryan, Gao       Add parallel command groups with streaming outputs and timeouts
 """
 
+import argparse
 import logging
+import os
+import shlex
+import signal
+import subprocess
 import sys
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
 
 from pre_commit.util import cmd_output
 
+TIMEOUT_RETURN_CODE = 124
+COMMAND_NOT_STARTED_RETURN_CODE = 127
+
 
 def get_integration_test_logger() -> logging.Logger:
     _logger = logging.getLogger("shell_runner")
@@ -32,7 +45,98 @@ def split_command_str(cmd_str: str) -> list[str]:
     return raw_cmds
 
 
+class ShellCommandResult(typing.NamedTuple):
+    name: str
+    command: str
+    return_code: int
+    duration: float
+    timed_out: bool
+
+
+def generate_arguments_parser() -> argparse.ArgumentParser:
+    args_parser = argparse.ArgumentParser(add_help=True)
+    args_parser.add_argument("--group", action="append", nargs="+", default=[], help="commands run concurrently, groups run one after another")
+    args_parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1, help="max commands running at the same time")
+    args_parser.add_argument("--timeout", type=float, default=None, help="seconds before a command is killed")
+    return args_parser
+
+
+def stream_command_output(name: str, stream: typing.IO[str], print_lock: threading.Lock) -> None:
+    for line in stream:
+        with print_lock:
+            print(f"[{name}] {line.rstrip()}", flush=True)
+
+
+def run_streaming_command(name: str, cmd_str: str, timeout: float | None, print_lock: threading.Lock) -> ShellCommandResult:
+    """Run a command with its outputs printed line by line with the command name, killing it after the timeout."""
+    with print_lock:
+        print(f"- Run [{name}]: {cmd_str}", flush=True)
+    started_at = time.monotonic()
+    timed_out = False
+    try:
+        # Undecodable outputs are replaced, otherwise the output streamer stops draining the pipe and the command blocks on it
+        proc = subprocess.Popen(
+            shlex.split(cmd_str),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            bufsize=1,
+            start_new_session=True,
+        )
+    except OSError as e:
+        with print_lock:
+            print(f"- Failed [{name}] to start: {e}", flush=True)
+        return ShellCommandResult(name, cmd_str, COMMAND_NOT_STARTED_RETURN_CODE, time.monotonic() - started_at, False)
+    streamer = threading.Thread(target=stream_command_output, args=(name, proc.stdout, print_lock), daemon=True)
+    streamer.start()
+    try:
+        return_code = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        # The command runs in its own session, so its children are killed along with it
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.wait()
+        timed_out = True
+        return_code = TIMEOUT_RETURN_CODE
+    streamer.join()
+    duration = time.monotonic() - started_at
+    with print_lock:
+        print(f"- {'Timed out' if timed_out else 'Done'} [{name}] with return code {return_code} in {duration:.2f}s", flush=True)
+    return ShellCommandResult(name, cmd_str, return_code, duration, timed_out)
+
+
+def run_command_groups(groups: list[list[str]], concurrency: int, timeout: float | None) -> list[ShellCommandResult]:
+    """Run the groups one after another with the commands in a group run concurrently, stopping after a failed group."""
+    print_lock = threading.Lock()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        for group_idx, group in enumerate(groups, start=1):
+            group_results = list(
+                executor.map(lambda c: run_streaming_command(f"{group_idx}.{c[0]}", c[1], timeout, print_lock), enumerate(group, start=1))
+            )
+            results.extend(group_results)
+            if any(r.return_code != 0 for r in group_results):
+                _logger.error(f"Group {group_idx} failed, skipping the following groups")
+                break
+    return results
+
+
+def report_command_results(results: list[ShellCommandResult]) -> None:
+    print("- Summary:")
+    for r in results:
+        status = "TIMEOUT" if r.timed_out else ("OK" if r.return_code == 0 else f"FAILED({r.return_code})")
+        print(f"  [{r.name}] {status:<12} {r.duration:8.2f}s  {r.command}")
+
+
 def run_shell_commands(cli_args: list[str], *args, **kargs) -> None:
+    if cli_args and cli_args[0].startswith("-"):
+        parsed_args = generate_arguments_parser().parse_args(cli_args)
+        results = run_command_groups(parsed_args.group, parsed_args.concurrency, parsed_args.timeout)
+        report_command_results(results)
+        exit(0 if all(r.return_code == 0 for r in results) else 1)
     for cmd_str in cli_args:
         cmds = split_command_str(cmd_str)
         cmd, cmd_args = cmds[0], cmds[1:] if len(cmds) > 1 else []
@@ -12,6 +12,8 @@ Revision History:
   28/03/2025   Ryan, Gao       Add default help argument
   21/06/2025   Ryan, Gao       Add variadic parameters
   16/11/2025   Ryan, Gao       Add more debugging logs
+  19/10/2026   Ryan, Gao       Add the native write protection engine
+  19/10/2026   Ryan, Gao       Cache collaborator lookups
 """
 
 import argparse
@@ -25,9 +27,13 @@ from pre_commit.git import get_all_files
 from pre_commit.lang_base import run_xargs
 from pre_commit.util import CalledProcessError, cmd_output
 
+from customizable_continuous_integration.automations.write_protection.engine import WriteProtectionEngine
 from customizable_continuous_integration.common_libs.github_apis import repository
+from customizable_continuous_integration.common_libs.github_apis.collaborators import DEFAULT_COLLABORATOR_CACHE_TTL_SECONDS
 
 FORKED_REPOSITORY_REMOTE_NAME = "downstream"
+WRITE_PROTECTION_ENGINE_NATIVE = "native"
+WRITE_PROTECTION_ENGINE_SHELL = "shell"
 
 
 def get_integration_test_logger() -> logging.Logger:
@@ -53,6 +59,16 @@ def generate_arguments_parser() -> argparse.ArgumentParser:
     args_parser.add_argument("--forked-repository-url", default="", help="forked repository clone url")
     args_parser.add_argument("--github-access-token", default="", help="access token to access Github API")
     args_parser.add_argument("--github-repository-name", default="", help="full name of host repository")
+    args_parser.add_argument("--github-cache-path", default="", help="file caching the collaborators of the host repository")
+    args_parser.add_argument(
+        "--github-cache-ttl", type=int, default=DEFAULT_COLLABORATOR_CACHE_TTL_SECONDS, help="seconds to trust cached collaborators"
+    )
+    args_parser.add_argument(
+        "--engine",
+        default=WRITE_PROTECTION_ENGINE_NATIVE,
+        choices=[WRITE_PROTECTION_ENGINE_NATIVE, WRITE_PROTECTION_ENGINE_SHELL],
+        help="check files by the in-process engine or the write protection script",
+    )
     return args_parser
 
 
@@ -75,25 +91,44 @@ def add_forked_repository(forked_repository_url, remote_name):
     cmd_output("git", "remote", "update", remote_name)
 
 
-def write_protection_command(cli_args: list[str], *args, **kargs) -> None:
-    cmd = get_write_protection_script_path()
-    args_parser = generate_arguments_parser()
-    args = args_parser.parse_args(cli_args)
+def get_repository_admins(args: argparse.Namespace) -> list[str]:
+    admins = WriteProtectionEngine.split_admin_list(args.admin_list)
+    if args.github_access_token and args.github_repository_name:
+        admins.extend(
+            repository.get_cached_repository_by_permission(
+                args.github_access_token,
+                args.github_repository_name,
+                "maintain",
+                cache_path=args.github_cache_path or None,
+                ttl_seconds=args.github_cache_ttl,
+            )
+        )
+    return list(dict.fromkeys(admins))
+
+
+def native_write_protection(args: argparse.Namespace, head_ref: str, forked: bool) -> int:
+    engine = WriteProtectionEngine(args.include_filter, args.exclude_filter, WriteProtectionEngine.split_admin_list(args.admin_list), _logger)
+    # The collaborators are only fetched when the acting user is not bypassed by the given admin list
+    if head_ref and args.merge_ref and not engine.is_admin_user(args.acting_user):
+        engine.admins.update(get_repository_admins(args))
+    _logger.info(f"Retrieved administrator list: {';'.join(sorted(engine.admins))}")
+    try:
+        passed, protected_files, message = engine.check(head_ref, args.merge_ref, args.acting_user, forked)
+    except CalledProcessError:
+        cmd_output("git", "config", "--global", "--add", "safe.directory", os.getcwd())
+        passed, protected_files, message = engine.check(head_ref, args.merge_ref, args.acting_user, forked)
+    if protected_files:
+        print("\n".join(protected_files))
+    print(message)
+    return 0 if passed else 1
 
-    head_ref = args.head_ref
-    cmd_args = []
-    if args.forked_repository_url and args.forked_repository_url.lower() != "unknown":
-        add_forked_repository(forked_repository_url=args.forked_repository_url, remote_name=FORKED_REPOSITORY_REMOTE_NAME)
-        cmd_args = ["-r"]
-        if head_ref:
-            head_ref = f"{FORKED_REPOSITORY_REMOTE_NAME}/{head_ref}"
+
+def shell_write_protection(args: argparse.Namespace, head_ref: str, forked: bool) -> int:
+    cmd = get_write_protection_script_path()
+    cmd_args = ["-r"] if forked else []
     admin_list = args.admin_list
     if args.github_access_token and args.github_repository_name:
-        admins = repository.get_repository_by_permission(args.github_access_token, args.github_repository_name, "maintain")
-        admins = list(set(admins))
-        if admin_list:
-            admins.append(admin_list)
-        admin_list = ";".join(admins)
+        admin_list = ";".join(get_repository_admins(args))
 
     if head_ref:
         cmd_args.extend(["-s", head_ref])
@@ -108,11 +143,27 @@ def write_protection_command(cli_args: list[str], *args, **kargs) -> None:
     except CalledProcessError:
         cmd_output("git", "config", "--global", "--add", "safe.directory", os.getcwd())
         git_files = list(filter_by_include_exclude(get_all_files(), args.include_filter, args.exclude_filter))
-    _logger.info("Retrieved administrator list: ", admin_list)
-    _logger.info("Detect files in scope: \n\t", "\t\n".join(git_files))
+    _logger.info(f"Retrieved administrator list: {admin_list}")
+    _logger.info("Detect files in scope: \n\t" + "\t\n".join(git_files))
     if git_files:
         ret_code, std_out = run_xargs(cmd=(cmd, *cmd_args), file_args=git_files, require_serial=True, color=False)
         print(str(std_out, encoding="ascii"))
         if ret_code != 0:
-            exit(1)
-    exit(0)
+            return 1
+    return 0
+
+
+def write_protection_command(cli_args: list[str], *args, **kargs) -> None:
+    args_parser = generate_arguments_parser()
+    args = args_parser.parse_args(cli_args)
+
+    head_ref = args.head_ref
+    forked = False
+    if args.forked_repository_url and args.forked_repository_url.lower() != "unknown":
+        add_forked_repository(forked_repository_url=args.forked_repository_url, remote_name=FORKED_REPOSITORY_REMOTE_NAME)
+        forked = True
+        if head_ref:
+            head_ref = f"{FORKED_REPOSITORY_REMOTE_NAME}/{head_ref}"
+    if args.engine == WRITE_PROTECTION_ENGINE_SHELL:
+        exit(shell_write_protection(args, head_ref, forked))
+    exit(native_write_protection(args, head_ref, forked))
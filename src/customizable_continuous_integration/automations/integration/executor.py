@@ -10,15 +10,22 @@ Revision History:
   04/11/2024   Ryan, Gao       refactor the name of `automation_config` and `automation_args`
   09/11/2024   Ryan, Gao       fix the false positive when `continue_on_failure`
   14/07/2025   Ryan, Gao       Add return code in test command execution
+  19/10/2026   Ryan, Gao       Run automations as a DAG of `depends_on` on a process pool
+  19/10/2026   Ryan, Gao       Profile workers when profiling is turned on
+  19/10/2026   Ryan, Gao       Record the run timeline when `timeline_path` is configured
 """
 
 import os
 import pathlib
 import typing
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 from customizable_continuous_integration.automations.integration.logging import _logger
 from customizable_continuous_integration.automations.integration.test_commands.constants import SentinelCommand, retrieve_test_command
+from customizable_continuous_integration.common_libs.graph.dag.builder import build_dag
+from customizable_continuous_integration.common_libs.graph.dag.entity import DAGNodeInterface
+from customizable_continuous_integration.common_libs.profiling import profiled
+from customizable_continuous_integration.common_libs.timeline import timeline_instant, timeline_recorded, traced
 
 SUCCESS = 0
 TEST_FAILED = 1
@@ -37,6 +44,7 @@ def prepare_test_environment() -> None:
         os.chdir(target_cwd.resolve())
 
 
+@traced(lambda test_name, command_config, continue_on_failure: test_name, "automation")
 def do_execute_command(test_name: str, command_config: dict[typing.Any, typing.Any], continue_on_failure: bool) -> (bool, str):
     prepare_test_environment()
     command_name = command_config["command"]
@@ -55,27 +63,92 @@ def do_execute_command(test_name: str, command_config: dict[typing.Any, typing.A
         return False, f"{test_name} FAILED with exception: {e}"
 
 
-def execute_command_worker(worker_id: int, test_name: str, command_config: dict[typing.Any, typing.Any], continue_on_failure=False) -> (bool, str):
-    _logger.info(f"[Worker-{worker_id}] Start executing test {test_name}")
+class AutomationDAGNode(DAGNodeInterface):
+    def __init__(self, test_name: str, command_config: dict[typing.Any, typing.Any]) -> None:
+        self.test_name = test_name
+        self.depends_on = set(command_config.get("depends_on", []) or [])
+
+    def dag_dependencies(self) -> set[str]:
+        return self.depends_on
+
+    def dag_key(self) -> str:
+        return self.test_name
+
+
+def check_automation_dependencies(configured_tests: dict[str, typing.Any]) -> list[str]:
+    """Return the error messages of `depends_on` entries referring to undefined automations."""
+    return [
+        f"{test_name} depends on undefined automation {dependency}"
+        for test_name, command_config in configured_tests.items()
+        for dependency in command_config.get("depends_on", []) or []
+        if dependency not in configured_tests
+    ]
+
+
+def order_automations(configured_tests: dict[str, typing.Any]) -> list[str]:
+    """Order the automations by their `depends_on`, keeping the configured order among the independent ones.
+
+    Automations in a dependency cycle are left out of the returned list.
+    """
+    automations_dag = build_dag("automations_dag", [AutomationDAGNode(n, c) for n, c in configured_tests.items()], set())
+    ordered_tests = []
+    ready_nodes = automations_dag.get_ready_nodes()
+    while ready_nodes:
+        test_name = ready_nodes.pop(0).dag_key()
+        ordered_tests.append(test_name)
+        ready_nodes.extend(automations_dag.complete_node(test_name))
+        ready_nodes.sort(key=lambda n: list(configured_tests).index(n.dag_key()))
+    return ordered_tests
+
+
+@profiled("integration-worker")
+def execute_command_worker(
+    worker_id: int, test_name: str, command_config: dict[typing.Any, typing.Any], continue_on_failure=False, working_directory: str = None
+) -> (bool, str):
+    # Pool processes are reused, so every automation starts over from the working directory of the runner
+    if working_directory:
+        os.chdir(working_directory)
+    _logger.info(f"[Worker-{worker_id}] Start executing test {test_name} in process {os.getpid()}")
     return do_execute_command(test_name=test_name, command_config=command_config, continue_on_failure=continue_on_failure)
 
 
+@timeline_recorded(lambda integration_test_config: integration_test_config.get("timeline_path"))
 def execute_commands_in_process(integration_test_config: dict[typing.Any, typing.Any]) -> int:
-    configured_tests = integration_test_config.get("automations", [])
+    configured_tests = integration_test_config.get("automations", {})
     continue_on_failure = integration_test_config.get("continue_on_failure", False)
     concurrency = integration_test_config.get("concurrency", 1)
+    dependency_errors = check_automation_dependencies(configured_tests)
+    if dependency_errors:
+        _logger.error(f"Invalid automation dependencies: {dependency_errors}")
+        return TEST_FAILED
+    automations_dag = build_dag("automations_dag", [AutomationDAGNode(n, c) for n, c in configured_tests.items()], set())
+    working_directory = os.getcwd()
     task_requests = {}
+    passed_tests = set()
     failed_tasks_results = {}
+    ready_nodes = automations_dag.get_ready_nodes()
     with ProcessPoolExecutor(max_workers=concurrency) as executor:
-        for idx, test_name in enumerate(configured_tests):
-            task_req = (idx, test_name, configured_tests[test_name].copy(), continue_on_failure)
-            task_requests[executor.submit(execute_command_worker, *task_req)] = task_req
-        for completed_task in as_completed(task_requests):
-            completed_task_req = task_requests[completed_task]
-            try:
-                ret, ret_msg = completed_task.result()
+        while ready_nodes or task_requests:
+            for node in ready_nodes:
+                test_name = node.dag_key()
+                timeline_instant("dag-ready", "dag", automation=test_name)
+                worker_id = list(configured_tests).index(test_name)
+                task_req = (worker_id, test_name, configured_tests[test_name].copy(), continue_on_failure, working_directory)
+                task_requests[executor.submit(execute_command_worker, *task_req)] = task_req
+            ready_nodes = []
+            completed_tasks, _ = wait(task_requests.keys(), return_when=FIRST_COMPLETED)
+            for completed_task in completed_tasks:
+                test_name = task_requests.pop(completed_task)[1]
+                try:
+                    ret, ret_msg = completed_task.result()
+                except Exception as e:
+                    _logger.error(f"{test_name} FAILED with exception: {e}, execution will be stopped")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return TEST_FAILED
                 if ret:
-                    _logger.info(f"{completed_task_req[1]} PASSED: {ret_msg}")
+                    _logger.info(f"{test_name} PASSED: {ret_msg}")
+                    passed_tests.add(test_name)
+                    ready_nodes.extend(automations_dag.complete_node(test_name))
                 elif continue_on_failure:
                     _logger.error(f"{test_name} FAILED: {ret_msg}, execution will be continued")
                     failed_tasks_results[test_name] = (ret, ret_msg)
@@ -83,25 +156,39 @@ def execute_commands_in_process(integration_test_config: dict[typing.Any, typing
                     _logger.error(f"{test_name} FAILED: {ret_msg}, execution will be stopped")
                     executor.shutdown(wait=False, cancel_futures=True)
                     return TEST_FAILED
-            except Exception as e:
-                _logger.error(f"{test_name} FAILED with exception: {e}, execution will be stopped")
-                executor.shutdown(wait=False, cancel_futures=True)
-                return TEST_FAILED
+    not_executed_tests = [n for n in configured_tests if n not in passed_tests and n not in failed_tasks_results]
     if failed_tasks_results:
         _logger.error(f"These automations FAILED: {list(failed_tasks_results.keys())}")
+    if not_executed_tests:
+        _logger.error(f"These automations are NOT executed because of failed or cyclic dependencies: {not_executed_tests}")
+    if failed_tasks_results or not_executed_tests:
         return TEST_FAILED
     return SUCCESS
 
 
+@timeline_recorded(lambda integration_test_config: integration_test_config.get("timeline_path"))
 def execute_commands_in_serial(integration_test_config: dict[typing.Any, typing.Any]) -> int:
-    configured_tests = integration_test_config.get("automations", [])
+    configured_tests = integration_test_config.get("automations", {})
     continue_on_failure = integration_test_config.get("continue_on_failure", False)
     failed_tasks_results = {}
+    dependency_errors = check_automation_dependencies(configured_tests)
+    if dependency_errors:
+        _logger.error(f"Invalid automation dependencies: {dependency_errors}")
+        return TEST_FAILED
+    ordered_tests = order_automations(configured_tests)
+    if len(ordered_tests) != len(configured_tests):
+        _logger.error(f"These automations are in dependency cycles: {[n for n in configured_tests if n not in ordered_tests]}")
+        return TEST_FAILED
     cwd = os.getcwd()
-    for test_name in configured_tests:
+    for test_name in ordered_tests:
         _logger.info(f"Starting test {test_name} from working directory {cwd}")
         os.chdir(cwd)
         command_config = configured_tests[test_name]
+        failed_dependencies = [d for d in command_config.get("depends_on", []) or [] if d in failed_tasks_results]
+        if failed_dependencies:
+            _logger.error(f"{test_name} SKIPPED because its dependencies {failed_dependencies} FAILED")
+            failed_tasks_results[test_name] = (False, f"Skipped because of failed dependencies {failed_dependencies}")
+            continue
         ret, ret_msg = do_execute_command(test_name=test_name, command_config=command_config, continue_on_failure=continue_on_failure)
         if ret:
             _logger.info(f"{test_name} PASSED: {ret_msg}")
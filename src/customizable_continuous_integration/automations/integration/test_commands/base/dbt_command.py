@@ -9,6 +9,9 @@ Revision History:
   01/11/2024   Ryan, Gao       Add workspace and configuration
   04/11/2024   Ryan, Gao       refactor the name of `run_args`
   06/11/2024   Ryan, Gao       add the support of dbt profiles
+  19/10/2026   Ryan, Gao       Add copy-on-write project workspace
+  19/10/2026   Ryan, Gao       Add content-addressed DBT package cache
+  19/10/2026   Ryan, Gao       Add persistent DBT parse cache and preloaded manifests
 """
 
 import io
@@ -18,8 +21,12 @@ import typing
 
 import yaml
 from dbt.cli.main import dbtRunner, dbtRunnerResult
+from dbt.contracts.graph.manifest import Manifest
 
 from customizable_continuous_integration.automations.integration.test_commands.base import base_command
+from customizable_continuous_integration.automations.integration.test_commands.base.package_cache import DBTPackageCache
+from customizable_continuous_integration.automations.integration.test_commands.base.parse_cache import DBTParseCache, parse_affecting_args
+from customizable_continuous_integration.automations.integration.test_commands.base.workspace import WORKSPACE_LINK_MODE_AUTO, DBTProjectWorkspace
 
 
 class DBTAutomationBaseCommand(base_command.BaseAutomationCommand):
@@ -29,11 +36,21 @@ class DBTAutomationBaseCommand(base_command.BaseAutomationCommand):
     DBT_PROFILES_CONFIG_FILENAME = "profiles.yml"
     DBT_SOURCES_CONFIG_FILENAME = "sources.yml"
     DBT_PACKAGES_CONFIG_FILENAME = "packages.yml"
+    DBT_PACKAGE_LOCK_FILENAME = "package-lock.yml"
+    DBT_WORKSPACE_EXCLUDED_PATHS = ["target", "logs", "dbt_packages"]
 
     DBT_TEST_CONFIG_FIELD_SOURCE = "dbt_source"
     DBT_TEST_CONFIG_FIELD_VARIABLE = "dbt_variable"
     DBT_TEST_CONFIG_FIELD_DEPENDENCY = "dbt_dependency"
     DBT_TEST_CONFIG_FIELD_PROFILE = "dbt_profile"
+    DBT_TEST_CONFIG_FIELD_WORKSPACE_LINK_MODE = "workspace_link_mode"
+    DBT_TEST_CONFIG_FIELD_WORKSPACE_ROOT = "workspace_root"
+    DBT_TEST_CONFIG_FIELD_WORKSPACE_EXCLUDES = "workspace_excludes"
+    DBT_TEST_CONFIG_FIELD_PACKAGE_CACHE = "dbt_package_cache"
+    DBT_TEST_CONFIG_FIELD_PACKAGE_CACHE_DIR = "dbt_package_cache_dir"
+    DBT_TEST_CONFIG_FIELD_PARSE_CACHE = "dbt_parse_cache"
+    DBT_TEST_CONFIG_FIELD_PARSE_CACHE_DIR = "dbt_parse_cache_dir"
+    DBT_TEST_CONFIG_FIELD_PRELOAD_MANIFEST = "dbt_preload_manifest"
 
     def __init__(self, test_name: str, command_config: dict[typing.Any, typing.Any], throw_exception: bool = True) -> None:
         super().__init__(test_name, command_config, throw_exception)
@@ -93,6 +110,34 @@ class DBTAutomationBaseCommand(base_command.BaseAutomationCommand):
         self._logger.info(f"To prepare default dbt into execution path {dbt_target_path}")
         self._copy_directory(dbt_source_path, dbt_target_path)
 
+    def do_dbt_project_workspace(self, dbt_test_config: dict, dbt_source_path: pathlib.Path) -> DBTProjectWorkspace:
+        """Define a copy-on-write workspace of a DBT project.
+
+        The files rewritten by `do_dbt_project_setup` or by `dbt deps` are materialized as real copies, the others are
+        reflinked or hardlinked where the filesystem supports them.
+        Args:
+            dbt_test_config (dict): The dbt test configuration
+            dbt_source_path (Path): The DBT project directory
+        Return:
+            DBTProjectWorkspace: The workspace to be created and cleaned up by the caller
+        Raises:
+            ValueError: the link mode is not supported
+        """
+        return DBTProjectWorkspace(
+            source_path=dbt_source_path,
+            materialized_paths=[
+                self.DBT_PROJECT_CONFIG_FILENAME,
+                self.DBT_PROFILES_CONFIG_FILENAME,
+                self.DBT_PACKAGES_CONFIG_FILENAME,
+                self.DBT_PACKAGE_LOCK_FILENAME,
+                f"models/{self.DBT_SOURCES_CONFIG_FILENAME}",
+            ],
+            excluded_paths=dbt_test_config.get(self.DBT_TEST_CONFIG_FIELD_WORKSPACE_EXCLUDES, self.DBT_WORKSPACE_EXCLUDED_PATHS),
+            link_mode=dbt_test_config.get(self.DBT_TEST_CONFIG_FIELD_WORKSPACE_LINK_MODE, WORKSPACE_LINK_MODE_AUTO),
+            workspace_root=dbt_test_config.get(self.DBT_TEST_CONFIG_FIELD_WORKSPACE_ROOT, None),
+            logger=self._logger,
+        )
+
     def do_dbt_project_setup(self, dbt_test_config: dict, dbt_target_path: pathlib.Path):
         """Setup DBT config according optional config from the test config
 
@@ -130,15 +175,70 @@ class DBTAutomationBaseCommand(base_command.BaseAutomationCommand):
                 self._logger.info(f"DBT profiles config content: \n{content}")
                 f.write(content)
 
+    def do_dbt_deps(self, dbt_test_config: dict, project_path: pathlib.Path) -> typing.Tuple[bool, str]:
+        """Install DBT packages of a project, reusing the package cache unless it is switched off.
+
+        Args:
+            dbt_test_config (dict): The dbt test configuration
+            project_path (Path): The DBT project directory, whose package definitions are already set up
+        Return:
+            tuple: The success flag and message of the installation
+        Raises:
+            None
+        """
+
+        def deps_runner() -> typing.Tuple[bool, str]:
+            return self.do_dbt_run(dbt_action="deps", project_path=project_path, profile_path=project_path)
+
+        if not dbt_test_config.get(self.DBT_TEST_CONFIG_FIELD_PACKAGE_CACHE, True):
+            return deps_runner()
+        package_cache = DBTPackageCache(dbt_test_config.get(self.DBT_TEST_CONFIG_FIELD_PACKAGE_CACHE_DIR, None), logger=self._logger)
+        return package_cache.install(project_path, deps_runner)
+
+    def do_dbt_parse_cache(
+        self, dbt_test_config: dict, dbt_source_path: pathlib.Path, extra_args: list[str] = None
+    ) -> typing.Tuple[DBTParseCache | None, str | None]:
+        """Return the parse cache and the cache key of a DBT project, or None when the parse cache is switched off.
+
+        Args:
+            dbt_test_config (dict): The dbt test configuration
+            dbt_source_path (Path): The source DBT project directory
+            extra_args (list[str]): The extra DBT arguments, of which the ones affecting parsing are in the key
+        Return:
+            tuple: The parse cache and the cache key
+        Raises:
+            None
+        """
+        if not dbt_test_config.get(self.DBT_TEST_CONFIG_FIELD_PARSE_CACHE, True):
+            return None, None
+        parse_settings = {
+            k: dbt_test_config.get(k)
+            for k in (
+                self.DBT_TEST_CONFIG_FIELD_VARIABLE,
+                self.DBT_TEST_CONFIG_FIELD_PROFILE,
+                self.DBT_TEST_CONFIG_FIELD_SOURCE,
+                self.DBT_TEST_CONFIG_FIELD_DEPENDENCY,
+            )
+        }
+        parse_settings["args"] = parse_affecting_args(extra_args)
+        parse_cache = DBTParseCache(dbt_test_config.get(self.DBT_TEST_CONFIG_FIELD_PARSE_CACHE_DIR, None), logger=self._logger)
+        return parse_cache, parse_cache.cache_key(dbt_source_path, parse_settings)
+
     def do_dbt_run(
-        self, dbt_action: str, project_path: pathlib.Path, profile_path: pathlib.Path, extra_args: list[str] = None
+        self,
+        dbt_action: str,
+        project_path: pathlib.Path,
+        profile_path: pathlib.Path,
+        extra_args: list[str] = None,
+        manifest: Manifest = None,
     ) -> typing.Tuple[bool, str]:
         project_path = project_path.resolve()
         profile_path = profile_path.resolve()
         self._logger.info(f"Run {dbt_action} against project under {project_path}")
         run_args = [dbt_action, f"--project-dir={project_path}", f"--profiles-dir={profile_path}"]
         run_args.extend(extra_args if extra_args else [])
-        dbt_runner = dbtRunner()
+        # A preloaded manifest lets DBT skip parsing the project entirely
+        dbt_runner = dbtRunner(manifest=manifest)
         test_result: dbtRunnerResult = dbt_runner.invoke(run_args)
         if not test_result.success:
             return False, f"{test_result.exception}"
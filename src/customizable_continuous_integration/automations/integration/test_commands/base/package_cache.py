@@ -0,0 +1,121 @@
+"""This module defines the content-addressed cache of installed DBT packages.
+
+A cache entry is the installed packages tree of a project, keyed by the hash of the DBT version and the package
+definition files of the project. Filling an entry is guarded by a file lock, so concurrent automations resolving the
+same packages wait for the first one instead of installing them again.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import logging
+import os
+import pathlib
+import shutil
+import typing
+
+import yaml
+from dbt.version import __version__ as dbt_version
+
+DEFAULT_DBT_PACKAGE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "customizable_continuous_integration", "dbt_packages")
+DBT_PACKAGE_DEFINITION_FILENAMES = ("packages.yml", "dependencies.yml", "package-lock.yml")
+DBT_DEFAULT_PACKAGES_INSTALL_PATH = "dbt_packages"
+
+
+class DBTPackageCache(object):
+    def __init__(self, cache_dir: str = None, logger: logging.Logger = None) -> None:
+        self.cache_dir = pathlib.Path(cache_dir or DEFAULT_DBT_PACKAGE_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+
+    @staticmethod
+    def packages_install_path(project_path: pathlib.Path) -> pathlib.Path:
+        """Return the packages install path of a project, honouring `packages-install-path` in `dbt_project.yml`."""
+        with open(project_path / "dbt_project.yml", "r") as f:
+            dbt_project_obj = yaml.safe_load(f) or {}
+        return project_path / dbt_project_obj.get("packages-install-path", DBT_DEFAULT_PACKAGES_INSTALL_PATH)
+
+    @staticmethod
+    def cache_key(project_path: pathlib.Path) -> str | None:
+        """Hash the DBT version and the package definition files of a project, or None if the project has none."""
+        definition_files = [project_path / n for n in DBT_PACKAGE_DEFINITION_FILENAMES if (project_path / n).is_file()]
+        if not definition_files:
+            return None
+        digest = hashlib.sha256(f"dbt=={dbt_version}".encode("utf-8"))
+        for definition_file in definition_files:
+            digest.update(f"\0{definition_file.name}\0".encode("utf-8"))
+            digest.update(definition_file.read_bytes())
+        return digest.hexdigest()
+
+    def entry_path(self, cache_key: str) -> pathlib.Path:
+        return self.cache_dir / cache_key
+
+    @contextlib.contextmanager
+    def entry_lock(self, cache_key: str) -> typing.Iterator[None]:
+        """Hold an exclusive lock of a cache entry across threads and processes."""
+        with open(self.cache_dir / f"{cache_key}.lock", "w") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def link_entry(self, cache_key: str, project_path: pathlib.Path) -> bool:
+        """Link the installed packages of a cache entry into a project, return False on cache misses."""
+        entry_path = self.entry_path(cache_key)
+        if not entry_path.is_dir():
+            return False
+        install_path = self.packages_install_path(project_path)
+        if install_path.is_symlink() or install_path.is_file():
+            install_path.unlink()
+        elif install_path.is_dir():
+            shutil.rmtree(install_path)
+        install_path.parent.mkdir(parents=True, exist_ok=True)
+        install_path.symlink_to(entry_path, target_is_directory=True)
+        self.logger.info(f"Linked cached DBT packages {entry_path} into {install_path}")
+        return True
+
+    def fill_entry(self, cache_key: str, project_path: pathlib.Path) -> None:
+        """Move the packages installed in a project into a cache entry and link it back."""
+        install_path = self.packages_install_path(project_path)
+        if not install_path.is_dir() or install_path.is_symlink():
+            self.logger.info(f"No installed DBT packages under {install_path} to be cached")
+            return
+        entry_path = self.entry_path(cache_key)
+        staging_path = self.cache_dir / f"{cache_key}.{os.getpid()}.tmp"
+        shutil.rmtree(staging_path, ignore_errors=True)
+        shutil.move(install_path, staging_path)
+        # The entry is published by an atomic rename, so a crashed fill never leaves a partial entry behind
+        os.rename(staging_path, entry_path)
+        self.logger.info(f"Cached DBT packages of {project_path} into {entry_path}")
+        self.link_entry(cache_key, project_path)
+
+    def install(self, project_path: pathlib.Path, deps_runner: typing.Callable[[], typing.Tuple[bool, str]]) -> typing.Tuple[bool, str]:
+        """Install the packages of a project from the cache, or by the deps runner while filling the cache.
+
+        Args:
+            project_path (Path): The DBT project directory, whose package definitions are already resolved
+            deps_runner (Callable): The function running `dbt deps` in the project
+        Return:
+            tuple: The success flag and message of the installation
+        """
+        cache_key = self.cache_key(project_path)
+        if cache_key is None:
+            return deps_runner()
+        with self.entry_lock(cache_key):
+            if self.link_entry(cache_key, project_path):
+                return True, f"DBT packages restored from cache entry {cache_key}"
+            self.logger.info(f"DBT package cache miss of {cache_key}, running deps in {project_path}")
+            ret, ret_msg = deps_runner()
+            if ret:
+                self.fill_entry(cache_key, project_path)
+            return ret, ret_msg
@@ -0,0 +1,144 @@
+"""This module defines the persistent cache of DBT parse artifacts.
+
+The `partial_parse.msgpack` of a project is kept in a cache entry keyed by the project path, the DBT version and the
+settings affecting parsing, and restored into the next workspace of the project before DBT runs, so that DBT only
+reparses the changed files. The absolute workspace path recorded in the artifact is cached as a placeholder, which is
+rewritten to the new workspace path on restoring.
+Parsed manifests can also be kept in the process to be passed to `dbtRunner` when several automations target the
+same project. They are kept serialized with the placeholder root like the cached artifacts, and every call gets its own
+manifest with all paths pointed to its workspace.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Hand out per-workspace copies of preloaded manifests
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import threading
+import typing
+
+import msgpack
+from dbt.cli.main import dbtRunner
+from dbt.contracts.graph.manifest import Manifest
+from dbt.parser.manifest import extended_mashumaro_encoder, extended_mashumuro_decoder
+from dbt.version import __version__ as dbt_version
+
+DEFAULT_DBT_PARSE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "customizable_continuous_integration", "dbt_parse")
+DBT_PARTIAL_PARSE_FILENAME = "partial_parse.msgpack"
+DBT_PROJECT_ROOT_PLACEHOLDER = "@@DBT_PROJECT_ROOT@@"
+DBT_TARGET_DIRNAME = "target"
+# The command line options which change the parse result, others like `--select` only change the node selection
+DBT_PARSE_AFFECTING_OPTIONS = ("--target", "-t", "--profile", "--vars")
+
+_PRELOADED_MANIFESTS: dict[str, bytes] = {}
+_PRELOADED_MANIFESTS_LOCK = threading.Lock()
+
+
+def parse_affecting_args(extra_args: list[str]) -> list[str]:
+    """Pick the options changing the parse result from the extra DBT arguments, in both `--opt=value` and `--opt value`."""
+    picked = []
+    extra_args = extra_args or []
+    for idx, arg in enumerate(extra_args):
+        option = arg.split("=", 1)[0]
+        if option not in DBT_PARSE_AFFECTING_OPTIONS:
+            continue
+        picked.append(arg)
+        if "=" not in arg and idx + 1 < len(extra_args):
+            picked.append(extra_args[idx + 1])
+    return picked
+
+
+def rewrite_project_root(obj: typing.Any, old_root: str, new_root: str) -> typing.Any:
+    """Replace the project root prefix of all strings in a nested structure of dictionaries and lists."""
+    if isinstance(obj, str):
+        if obj == old_root or obj.startswith(f"{old_root}/"):
+            return f"{new_root}{obj[len(old_root):]}"
+        return obj
+    if isinstance(obj, dict):
+        return {k: rewrite_project_root(v, old_root, new_root) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [rewrite_project_root(v, old_root, new_root) for v in obj]
+    return obj
+
+
+class DBTParseCache(object):
+    def __init__(self, cache_dir: str = None, logger: logging.Logger = None) -> None:
+        self.cache_dir = pathlib.Path(cache_dir or DEFAULT_DBT_PARSE_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+
+    @staticmethod
+    def cache_key(source_project_path: pathlib.Path, parse_settings: dict[str, typing.Any]) -> str:
+        """Hash the source project path, the DBT version and the settings affecting parsing, e.g. vars and profiles."""
+        key_material = {"project": str(source_project_path.resolve()), "dbt_version": dbt_version, "settings": parse_settings}
+        return hashlib.sha256(json.dumps(key_material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def entry_path(self, cache_key: str) -> pathlib.Path:
+        return self.cache_dir / cache_key
+
+    @staticmethod
+    def _rewrite_payload(payload: bytes, old_root: str, new_root: str) -> bytes:
+        manifest_obj = msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        return msgpack.packb(rewrite_project_root(manifest_obj, old_root, new_root), use_bin_type=True)
+
+    def restore(self, cache_key: str, project_path: pathlib.Path) -> bool:
+        """Restore the cached parse artifact into a project workspace, return False on cache misses."""
+        cached_artifact_path = self.entry_path(cache_key) / DBT_PARTIAL_PARSE_FILENAME
+        if not cached_artifact_path.is_file():
+            return False
+        payload = self._rewrite_payload(cached_artifact_path.read_bytes(), DBT_PROJECT_ROOT_PLACEHOLDER, str(project_path))
+        target_path = project_path / DBT_TARGET_DIRNAME
+        target_path.mkdir(parents=True, exist_ok=True)
+        (target_path / DBT_PARTIAL_PARSE_FILENAME).write_bytes(payload)
+        self.logger.info(f"Restored DBT parse artifact {cached_artifact_path} into {target_path}")
+        return True
+
+    def save(self, cache_key: str, project_path: pathlib.Path) -> bool:
+        """Save the parse artifact of a project workspace into the cache entry, return False if DBT wrote none."""
+        artifact_path = project_path / DBT_TARGET_DIRNAME / DBT_PARTIAL_PARSE_FILENAME
+        if not artifact_path.is_file():
+            return False
+        entry_path = self.entry_path(cache_key)
+        entry_path.mkdir(parents=True, exist_ok=True)
+        # The artifact is published by an atomic rename, so concurrent savers and readers never see a partial file
+        staging_path = entry_path / f"{DBT_PARTIAL_PARSE_FILENAME}.{os.getpid()}.{threading.get_ident()}.tmp"
+        staging_path.write_bytes(self._rewrite_payload(artifact_path.read_bytes(), str(project_path), DBT_PROJECT_ROOT_PLACEHOLDER))
+        os.replace(staging_path, entry_path / DBT_PARTIAL_PARSE_FILENAME)
+        self.logger.info(f"Saved DBT parse artifact of {project_path} into {entry_path}")
+        return True
+
+    def preloaded_manifest(
+        self, cache_key: str, project_path: pathlib.Path, profile_path: pathlib.Path, extra_args: list[str] = None
+    ) -> Manifest | None:
+        """Return a copy of the manifest parsed for the cache key in this process, parsing the project on the first call.
+
+        The manifest is kept serialized with the placeholder root, and each copy has every path, e.g. the root paths of
+        nodes and macros and the source files, pointed to the current workspace, so no copy refers to a removed one.
+        """
+        with _PRELOADED_MANIFESTS_LOCK:
+            payload = _PRELOADED_MANIFESTS.get(cache_key)
+        if payload is None:
+            run_args = ["parse", f"--project-dir={project_path}", f"--profiles-dir={profile_path}"] + parse_affecting_args(extra_args)
+            parse_result = dbtRunner().invoke(run_args)
+            if not parse_result.success:
+                self.logger.error(f"Failed to preload the manifest of {project_path}: {parse_result.exception}")
+                return None
+            manifest_payload = parse_result.result.to_msgpack(extended_mashumaro_encoder)
+            payload = self._rewrite_payload(manifest_payload, str(project_path), DBT_PROJECT_ROOT_PLACEHOLDER)
+            with _PRELOADED_MANIFESTS_LOCK:
+                payload = _PRELOADED_MANIFESTS.setdefault(cache_key, payload)
+            self.logger.info(f"Preloaded the manifest of {project_path}")
+        manifest_payload = self._rewrite_payload(payload, DBT_PROJECT_ROOT_PLACEHOLDER, str(project_path))
+        manifest = Manifest.from_msgpack(manifest_payload, decoder=extended_mashumuro_decoder)
+        manifest.build_flat_graph()
+        return manifest
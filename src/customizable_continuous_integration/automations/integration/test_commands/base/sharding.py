@@ -0,0 +1,116 @@
+"""This module defines the helpers to shard DBT node executions.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import pathlib
+
+from customizable_continuous_integration.automations.integration.test_commands.base.parse_cache import parse_affecting_args
+
+DEFAULT_DBT_RUN_HISTORY_DIR = os.path.join(os.path.expanduser("~"), ".cache", "customizable_continuous_integration", "dbt_run_history")
+DBT_RUN_RESULTS_FILENAME = "run_results.json"
+DBT_SELECTION_OPTIONS = ("--select", "-s", "--models", "-m", "--exclude", "--selector", "--resource-type", "--resource-types")
+
+
+def split_selection_args(extra_args: list[str]) -> tuple[list[str], list[str]]:
+    """Split the extra DBT arguments into the node selection ones and the others.
+
+    A selection option takes either `--opt=value` or all the following values till the next option.
+    Return:
+        tuple: The selection arguments and the other arguments
+    """
+    selection_args, other_args = [], []
+    in_selection = False
+    for arg in extra_args or []:
+        if arg.startswith("-"):
+            in_selection = arg.split("=", 1)[0] in DBT_SELECTION_OPTIONS and "=" not in arg
+            (selection_args if arg.split("=", 1)[0] in DBT_SELECTION_OPTIONS else other_args).append(arg)
+        elif in_selection:
+            selection_args.append(arg)
+        else:
+            other_args.append(arg)
+    return selection_args, other_args
+
+
+def listing_args(extra_args: list[str]) -> list[str]:
+    """Pick the extra DBT arguments accepted by `dbt ls` to list the selected nodes."""
+    return split_selection_args(extra_args)[0] + parse_affecting_args(extra_args)
+
+
+def balance_shards(node_durations: dict[str, float], shard_count: int) -> list[list[str]]:
+    """Assign nodes to shards by the longest processing time first, so shards have similar total durations.
+
+    Args:
+        node_durations (dict): The node keys to their expected durations in seconds
+        shard_count (int): The amount of shards
+    Return:
+        list: The node keys of each shard, empty shards are dropped
+    """
+    shards: list[list[str]] = [[] for _ in range(shard_count)]
+    shard_loads = [0.0] * shard_count
+    for node_key in sorted(node_durations, key=lambda k: (-node_durations[k], k)):
+        lightest = shard_loads.index(min(shard_loads))
+        shards[lightest].append(node_key)
+        shard_loads[lightest] += node_durations[node_key]
+    return [s for s in shards if s]
+
+
+def read_run_results_durations(target_path: pathlib.Path) -> dict[str, float]:
+    """Return the execution time of nodes in the `run_results.json` of a DBT target path."""
+    run_results_path = target_path / DBT_RUN_RESULTS_FILENAME
+    if not run_results_path.is_file():
+        return {}
+    with open(run_results_path, "r") as f:
+        run_results = json.load(f)
+    return {r["unique_id"]: float(r.get("execution_time") or 0.0) for r in run_results.get("results", [])}
+
+
+class DBTRunHistory(object):
+    def __init__(self, source_project_path: pathlib.Path, history_dir: str = None, logger: logging.Logger = None) -> None:
+        history_dir = pathlib.Path(history_dir or DEFAULT_DBT_RUN_HISTORY_DIR)
+        history_dir.mkdir(parents=True, exist_ok=True)
+        project_key = hashlib.sha256(str(source_project_path.resolve()).encode("utf-8")).hexdigest()
+        self.history_path = history_dir / f"{project_key}.json"
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+
+    def load(self) -> dict[str, float]:
+        if not self.history_path.is_file():
+            return {}
+        with open(self.history_path, "r") as f:
+            return json.load(f)
+
+    def expected_durations(self, node_keys: list[str]) -> dict[str, float]:
+        """Return the historical durations of nodes, using the average of known nodes for the new ones."""
+        history = self.load()
+        known = [history[k] for k in node_keys if k in history]
+        default_duration = sum(known) / len(known) if known else 1.0
+        return {k: history.get(k, default_duration) for k in node_keys}
+
+    def update(self, node_durations: dict[str, float]) -> None:
+        """Merge the latest node durations into the history under an exclusive lock."""
+        if not node_durations:
+            return
+        with open(f"{self.history_path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                history = self.load()
+                history.update(node_durations)
+                staging_path = f"{self.history_path}.{os.getpid()}.tmp"
+                with open(staging_path, "w") as f:
+                    json.dump(history, f)
+                os.replace(staging_path, self.history_path)
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        self.logger.info(f"Updated {len(node_durations)} node durations into the run history {self.history_path}")
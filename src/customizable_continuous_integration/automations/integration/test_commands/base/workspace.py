@@ -0,0 +1,138 @@
+"""This module defines the copy-on-write workspace of DBT projects.
+
+A workspace mirrors the directory tree of a DBT project, while its files are reflinks or hardlinks of the project files
+where the filesystem supports them. The files rewritten by the automation are materialized as real copies, so the
+source project is never changed through a shared inode.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import errno
+import fcntl
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+
+# The ioctl request number of FICLONE on Linux, cloning a file by sharing its extents until either side is written
+FICLONE = 0x40049409
+
+WORKSPACE_LINK_MODE_AUTO = "auto"
+WORKSPACE_LINK_MODE_REFLINK = "reflink"
+WORKSPACE_LINK_MODE_HARDLINK = "hardlink"
+WORKSPACE_LINK_MODE_COPY = "copy"
+WORKSPACE_LINK_MODES = (WORKSPACE_LINK_MODE_AUTO, WORKSPACE_LINK_MODE_REFLINK, WORKSPACE_LINK_MODE_HARDLINK, WORKSPACE_LINK_MODE_COPY)
+
+# Errors meaning the filesystem can not link the file, so the next fallback mode is tried
+_LINK_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EPERM, errno.EMLINK}
+
+
+class DBTProjectWorkspace(object):
+    def __init__(
+        self,
+        source_path: pathlib.Path,
+        materialized_paths: list[str],
+        excluded_paths: list[str] = None,
+        link_mode: str = WORKSPACE_LINK_MODE_AUTO,
+        workspace_root: str = None,
+        logger: logging.Logger = None,
+    ) -> None:
+        """Define a workspace of a DBT project.
+
+        Args:
+            source_path (Path): The DBT project directory
+            materialized_paths (list[str]): The project relative paths of files to be real copies, e.g. `dbt_project.yml`
+            excluded_paths (list[str]): The project relative paths of files or directories not brought into the workspace
+            link_mode (str): One of `auto`, `reflink`, `hardlink` or `copy`; `auto` falls back from reflink to hardlink then copy
+            workspace_root (str): The parent directory of the workspace, default is the system temporary directory
+            logger (Logger): The logger to report the workspace building
+        """
+        if link_mode not in WORKSPACE_LINK_MODES:
+            raise ValueError(f"Unsupported workspace link mode {link_mode}, available modes: {WORKSPACE_LINK_MODES}")
+        self.source_path = source_path.resolve()
+        self.materialized_paths = {pathlib.PurePath(p) for p in materialized_paths}
+        self.excluded_paths = {pathlib.PurePath(p) for p in excluded_paths or []}
+        self.link_mode = link_mode
+        self.workspace_root = workspace_root
+        self.workspace_path: pathlib.Path | None = None
+        self.file_counts = {WORKSPACE_LINK_MODE_REFLINK: 0, WORKSPACE_LINK_MODE_HARDLINK: 0, WORKSPACE_LINK_MODE_COPY: 0}
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+
+    def _fallback_modes(self) -> list[str]:
+        if self.link_mode == WORKSPACE_LINK_MODE_AUTO:
+            return [WORKSPACE_LINK_MODE_REFLINK, WORKSPACE_LINK_MODE_HARDLINK, WORKSPACE_LINK_MODE_COPY]
+        return [self.link_mode] if self.link_mode == WORKSPACE_LINK_MODE_COPY else [self.link_mode, WORKSPACE_LINK_MODE_COPY]
+
+    @staticmethod
+    def _reflink_file(src: pathlib.Path, dst: pathlib.Path) -> None:
+        with open(src, "rb") as src_f, open(dst, "wb") as dst_f:
+            try:
+                fcntl.ioctl(dst_f.fileno(), FICLONE, src_f.fileno())
+            except OSError:
+                dst_f.close()
+                dst.unlink()
+                raise
+        shutil.copystat(src, dst)
+
+    def _place_file(self, src: pathlib.Path, dst: pathlib.Path, modes: list[str]) -> None:
+        """Place a file by the first working mode, dropping the modes the filesystem does not support for later files."""
+        while modes:
+            mode = modes[0]
+            try:
+                if mode == WORKSPACE_LINK_MODE_REFLINK:
+                    self._reflink_file(src, dst)
+                elif mode == WORKSPACE_LINK_MODE_HARDLINK:
+                    os.link(src, dst)
+                else:
+                    shutil.copy2(src, dst)
+                self.file_counts[mode] += 1
+                return
+            except OSError as e:
+                if mode == WORKSPACE_LINK_MODE_COPY or e.errno not in _LINK_UNSUPPORTED_ERRNOS:
+                    raise
+                self.logger.info(f"Workspace link mode {mode} is not supported from {src} to {dst}: {e}, falling back")
+                modes.pop(0)
+
+    def create(self) -> pathlib.Path:
+        """Build the workspace and return its path."""
+        self.workspace_path = pathlib.Path(tempfile.mkdtemp(prefix="dbt_workspace_", dir=self.workspace_root))
+        modes = self._fallback_modes()
+        # Symbolic links are followed as the full copy did, so the workspace never refers back to the source through them
+        for dir_path, dir_names, file_names in os.walk(self.source_path, followlinks=True):
+            relative_dir = pathlib.Path(dir_path).relative_to(self.source_path)
+            dir_names[:] = [d for d in dir_names if relative_dir / d not in self.excluded_paths]
+            for d in dir_names:
+                (self.workspace_path / relative_dir / d).mkdir()
+            for file_name in file_names:
+                relative_file = relative_dir / file_name
+                if relative_file in self.excluded_paths:
+                    continue
+                src, dst = self.source_path / relative_file, self.workspace_path / relative_file
+                if relative_file in self.materialized_paths:
+                    shutil.copy2(src, dst)
+                    self.file_counts[WORKSPACE_LINK_MODE_COPY] += 1
+                else:
+                    self._place_file(src, dst, modes)
+        self.logger.info(f"Built workspace {self.workspace_path} of {self.source_path} with files placed by {self.file_counts}")
+        return self.workspace_path
+
+    def cleanup(self) -> None:
+        """Remove the workspace, which never touches the source files even if they are hardlinked."""
+        if self.workspace_path and self.workspace_path.exists():
+            shutil.rmtree(self.workspace_path, ignore_errors=True)
+            self.logger.info(f"Removed workspace {self.workspace_path}")
+        self.workspace_path = None
+
+    def __enter__(self) -> pathlib.Path:
+        return self.create()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.cleanup()
@@ -6,18 +6,18 @@ Revision History:
   Date         Author		   Comments
 ------------------------------------------------------------------------------
   27/08/2024   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Import test command modules lazily
 """
 
 import typing
 
 from customizable_continuous_integration.automations.integration.test_commands.base.base_command import BaseAutomationCommand
-from customizable_continuous_integration.automations.integration.test_commands.dbt_test import DBTAutomationTestCommand
-from customizable_continuous_integration.common_libs.collections import ImmutableDictWrapper
+from customizable_continuous_integration.common_libs.collections import LazyImmutableDictWrapper
 
 SentinelCommand = BaseAutomationCommand
 
-INTEGRATION_TEST_COMMANDS_REGISTRY: ImmutableDictWrapper[str, type[BaseAutomationCommand]] = ImmutableDictWrapper(
-    {"dbt_test": DBTAutomationTestCommand}
+INTEGRATION_TEST_COMMANDS_REGISTRY: LazyImmutableDictWrapper[str, type[BaseAutomationCommand]] = LazyImmutableDictWrapper(
+    {"dbt_test": "customizable_continuous_integration.automations.integration.test_commands.dbt_test:DBTAutomationTestCommand"}
 )
 
 
@@ -7,14 +7,18 @@ Revision History:
 ------------------------------------------------------------------------------
   30/10/2024   Ryan, Gao       Initial creation
   04/11/2024   Ryan, Gao       automation_args compatible types
+  19/10/2026   Ryan, Gao       Run projects in copy-on-write workspaces cleaned up after the run
+  19/10/2026   Ryan, Gao       Install DBT packages through the package cache
+  19/10/2026   Ryan, Gao       Reuse DBT parse artifacts and preloaded manifests
+  19/10/2026   Ryan, Gao       Split the project action for sharded subclasses
 """
 
 import os
 import pathlib
-import tempfile
 import typing
 
 from customizable_continuous_integration.automations.integration.test_commands.base import dbt_command
+from customizable_continuous_integration.automations.integration.test_commands.base.workspace import DBTProjectWorkspace
 
 
 class DBTAutomationActionCommand(dbt_command.DBTAutomationBaseCommand):
@@ -24,10 +28,8 @@ class DBTAutomationActionCommand(dbt_command.DBTAutomationBaseCommand):
     def __init__(self, test_name: str, command_config: dict[typing.Any, typing.Any], throw_exception: bool = True) -> None:
         super().__init__(test_name, command_config, throw_exception)
 
-    def do_execution(self, command_args: dict[typing.Any, typing.Any] | list[str] | str = None) -> typing.Tuple[bool, str]:
-        scoped_test_projects = self._command_config.get("target_projects", [])
-        dbt_action = self._command_config.get("dbt_action")
-        self._logger.info(f"Following DBT projects will be subject to the action {dbt_action}: \n{scoped_test_projects}")
+    @staticmethod
+    def extract_extra_args(command_args: dict[typing.Any, typing.Any] | list[str] | str = None) -> list[str]:
         extra_args = []
         if type(command_args) is dict:
             extra_args = [str(a) for a in command_args.values()]
@@ -35,19 +37,49 @@ class DBTAutomationActionCommand(dbt_command.DBTAutomationBaseCommand):
             extra_args = [str(a) for a in command_args]
         elif type(command_args) is str:
             extra_args = [command_args]
+        return extra_args
+
+    def do_project_workspace_setup(self, project_path: pathlib.Path) -> typing.Tuple[DBTProjectWorkspace, pathlib.Path]:
+        """Create a workspace of a project with its DBT configs set up and packages installed, and switch into it."""
+        workspace = self.do_dbt_project_workspace(self._command_config, project_path)
+        dbt_exec_path = workspace.create().resolve()
+        self.do_dbt_project_setup(self._command_config, dbt_exec_path)
+        os.chdir(dbt_exec_path)
+        self.do_dbt_deps(self._command_config, dbt_exec_path)
+        return workspace, dbt_exec_path
+
+    def do_project_action(self, dbt_action: str, project_path: pathlib.Path, extra_args: list[str]) -> typing.Tuple[bool, str]:
         saved_cwd = os.getcwd()
-        for prj in scoped_test_projects:
-            os.chdir(saved_cwd)
-            project_path = pathlib.Path(prj).resolve()
-            dbt_exec_path = pathlib.Path(tempfile.mkdtemp())
-            self._logger.info(f"Take action {dbt_action} project {prj} under {dbt_exec_path}")
-            self.do_dbt_project_copy(project_path, dbt_exec_path)
-            self.do_dbt_project_setup(self._command_config, dbt_exec_path)
-            os.chdir(dbt_exec_path)
-            self.do_dbt_run(dbt_action="deps", project_path=dbt_exec_path, profile_path=dbt_exec_path)
+        workspace = None
+        try:
+            workspace, dbt_exec_path = self.do_project_workspace_setup(project_path)
+            self._logger.info(f"Take action {dbt_action} project {project_path} under {dbt_exec_path}")
+            parse_cache, parse_cache_key = self.do_dbt_parse_cache(self._command_config, project_path, extra_args)
+            manifest = None
+            if parse_cache:
+                parse_cache.restore(parse_cache_key, dbt_exec_path)
+                if self._command_config.get(self.DBT_TEST_CONFIG_FIELD_PRELOAD_MANIFEST, False):
+                    manifest = parse_cache.preloaded_manifest(parse_cache_key, dbt_exec_path, dbt_exec_path, extra_args)
             test_result, result_message = self.do_dbt_run(
-                dbt_action=dbt_action, project_path=dbt_exec_path, profile_path=dbt_exec_path, extra_args=extra_args
+                dbt_action=dbt_action, project_path=dbt_exec_path, profile_path=dbt_exec_path, extra_args=extra_args, manifest=manifest
             )
+            if parse_cache:
+                parse_cache.save(parse_cache_key, dbt_exec_path)
+        finally:
+            os.chdir(saved_cwd)
+            if workspace and not self._command_config.get("keep_workspace", False):
+                workspace.cleanup()
+        return test_result, result_message
+
+    def do_execution(self, command_args: dict[typing.Any, typing.Any] | list[str] | str = None) -> typing.Tuple[bool, str]:
+        scoped_test_projects = self._command_config.get("target_projects", [])
+        dbt_action = self._command_config.get("dbt_action")
+        self._logger.info(f"Following DBT projects will be subject to the action {dbt_action}: \n{scoped_test_projects}")
+        extra_args = self.extract_extra_args(command_args)
+        saved_cwd = os.getcwd()
+        for prj in scoped_test_projects:
+            os.chdir(saved_cwd)
+            test_result, result_message = self.do_project_action(dbt_action, pathlib.Path(prj).resolve(), extra_args)
             if not test_result:
                 self._logger.error(f"Failed on project {prj}")
                 return False, f"{self.test_name} on project {prj} failed with {result_message}"
@@ -8,17 +8,110 @@ Revision History:
   27/08/2024   Ryan, Gao       Initial creation
   01/11/2024   Ryan, Gao       Simplify test command by refactoring
   06/11/2024   Ryan, Gao       Add build before test
+  19/10/2026   Ryan, Gao       Add sharded test execution balanced by run history
+  19/10/2026   Ryan, Gao       Profile workers when profiling is turned on
 """
 
+import json
+import os
+import pathlib
 import typing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+from dbt.cli.main import dbtRunner
+
+from customizable_continuous_integration.automations.integration.test_commands.base.sharding import (
+    DBTRunHistory,
+    balance_shards,
+    listing_args,
+    read_run_results_durations,
+    split_selection_args,
+)
 from customizable_continuous_integration.automations.integration.test_commands.dbt_action import DBTAutomationActionCommand
+from customizable_continuous_integration.common_libs.profiling import profiled
+
+
+@profiled("dbt-test-shard")
+def run_dbt_shard(dbt_action: str, project_path: pathlib.Path, extra_args: list[str]) -> typing.Tuple[bool, str, dict[str, float]]:
+    """Run a DBT action in a shard workspace, return the result and the node durations of the shard."""
+    run_args = [dbt_action, f"--project-dir={project_path}", f"--profiles-dir={project_path}"] + extra_args
+    result = dbtRunner().invoke(run_args)
+    return result.success, f"{result.exception}", read_run_results_durations(project_path / "target")
 
 
 class DBTAutomationTestCommand(DBTAutomationActionCommand):
     COMMAND_NAME: str = "DBTAutomationTestCommand"
     CLASS_NAME: str = "DBTAutomationTestCommand"
+    DBT_TEST_CONFIG_FIELD_SHARDS = "dbt_test_shards"
+    DBT_TEST_CONFIG_FIELD_RUN_HISTORY_DIR = "dbt_run_history_dir"
 
     def __init__(self, test_name: str, command_config: dict[typing.Any, typing.Any], throw_exception: bool = True) -> None:
         command_config["dbt_action"] = "build" if command_config.get("build_before_test", False) else "test"
         super().__init__(test_name, command_config, throw_exception)
+
+    def do_dbt_list_tests(self, project_path: pathlib.Path, extra_args: list[str]) -> dict[str, str]:
+        """List the selected tests of a project as their unique ids to their fqn selectors."""
+        run_args = ["ls", f"--project-dir={project_path}", f"--profiles-dir={project_path}", "--quiet"]
+        run_args += listing_args(extra_args) + ["--resource-type", "test", "--output", "json", "--output-keys", "unique_id fqn"]
+        result = dbtRunner().invoke(run_args)
+        if not result.success:
+            raise RuntimeError(f"Failed to list tests of {project_path}: {result.exception}")
+        nodes = [json.loads(line) for line in result.result or []]
+        return {n["unique_id"]: ".".join(n["fqn"]) for n in nodes}
+
+    def do_project_action(self, dbt_action: str, project_path: pathlib.Path, extra_args: list[str]) -> typing.Tuple[bool, str]:
+        shard_count = int(self._command_config.get(self.DBT_TEST_CONFIG_FIELD_SHARDS, 1) or 1)
+        if shard_count <= 1 or dbt_action != "test":
+            if shard_count > 1:
+                # Nodes of a build depend on each other across any split, so only tests are sharded
+                self._logger.warning(f"Sharding is only supported by test, {dbt_action} of {project_path} runs in one piece")
+            return super().do_project_action(dbt_action, project_path, extra_args)
+        run_history = DBTRunHistory(project_path, self._command_config.get(self.DBT_TEST_CONFIG_FIELD_RUN_HISTORY_DIR, None), self._logger)
+        saved_cwd = os.getcwd()
+        workspaces = []
+        try:
+            workspace, dbt_exec_path = self.do_project_workspace_setup(project_path)
+            workspaces.append(workspace)
+            parse_cache, parse_cache_key = self.do_dbt_parse_cache(self._command_config, project_path, extra_args)
+            if parse_cache:
+                parse_cache.restore(parse_cache_key, dbt_exec_path)
+            tests = self.do_dbt_list_tests(dbt_exec_path, extra_args)
+            if parse_cache:
+                parse_cache.save(parse_cache_key, dbt_exec_path)
+            if not tests:
+                self._logger.info(f"No tests selected in {project_path}")
+                return True, f"{self.test_name} Done"
+            shards = balance_shards(run_history.expected_durations(list(tests.keys())), shard_count)
+            shard_paths = [dbt_exec_path]
+            for _ in shards[1:]:
+                os.chdir(saved_cwd)
+                workspace, shard_path = self.do_project_workspace_setup(project_path)
+                workspaces.append(workspace)
+                if parse_cache:
+                    parse_cache.restore(parse_cache_key, shard_path)
+                shard_paths.append(shard_path)
+            self._logger.info(f"Running {len(tests)} tests of {project_path} in {len(shards)} shards of sizes {[len(s) for s in shards]}")
+            _, shard_args = split_selection_args(extra_args)
+            failed_shards = {}
+            with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+                task_requests = {}
+                for idx, shard in enumerate(shards):
+                    task_req = (dbt_action, shard_paths[idx], shard_args + ["--select"] + [tests[k] for k in shard])
+                    task_requests[executor.submit(run_dbt_shard, *task_req)] = idx
+                for completed_task in as_completed(task_requests.keys()):
+                    idx = task_requests[completed_task]
+                    ret, ret_msg, node_durations = completed_task.result()
+                    run_history.update(node_durations)
+                    if ret:
+                        self._logger.info(f"Shard {idx} of {project_path} PASSED with {len(shards[idx])} tests")
+                    else:
+                        self._logger.error(f"Shard {idx} of {project_path} FAILED: {ret_msg}")
+                        failed_shards[idx] = ret_msg
+            if failed_shards:
+                return False, f"shards {sorted(failed_shards.keys())} failed with {list(failed_shards.values())}"
+            return True, f"{self.test_name} Done"
+        finally:
+            os.chdir(saved_cwd)
+            if not self._command_config.get("keep_workspace", False):
+                for workspace in workspaces:
+                    workspace.cleanup()
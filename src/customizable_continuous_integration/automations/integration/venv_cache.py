@@ -0,0 +1,130 @@
+"""This module defines the cache of virtual environments for integration runs.
+
+A cache entry is a virtual environment keyed by the hash of its requirements, the Python version and the platform.
+An entry is looked up and used under a shared file lock and only created under an exclusive one, so concurrent runs
+reuse a ready environment without waiting for each other, never use a half-installed environment, and the least recently used entries are only evicted while nobody is using them.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Look up ready entries under the shared lock
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import platform
+import shutil
+import sys
+import typing
+
+DEFAULT_VENV_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "customizable_continuous_integration", "venvs")
+DEFAULT_VENV_CACHE_MAX_ENTRIES = 5
+VENV_READY_MARKER = ".ready"
+VENV_LAST_USED_MARKER = ".last_used"
+
+
+class VirtualEnvironmentCache(object):
+    def __init__(self, cache_dir: str = None, max_entries: int = DEFAULT_VENV_CACHE_MAX_ENTRIES, logger: logging.Logger = None) -> None:
+        self.cache_dir = pathlib.Path(cache_dir or DEFAULT_VENV_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock_files: dict[str, typing.TextIO] = {}
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+
+    @staticmethod
+    def cache_key(requirements: list[str]) -> str:
+        """Hash the requirements with the Python version and the platform the environment is built for."""
+        key_material = {
+            "requirements": [str(r).strip() for r in requirements or []],
+            "python": sys.version,
+            "implementation": sys.implementation.name,
+            "platform": sys.platform,
+            "machine": platform.machine(),
+        }
+        return hashlib.sha256(json.dumps(key_material, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def entry_path(self, cache_key: str) -> pathlib.Path:
+        return self.cache_dir / cache_key
+
+    def is_ready(self, cache_key: str) -> bool:
+        return (self.entry_path(cache_key) / VENV_READY_MARKER).is_file()
+
+    def _lock(self, cache_key: str, operation: int) -> None:
+        if cache_key not in self._lock_files:
+            self._lock_files[cache_key] = open(self.cache_dir / f"{cache_key}.lock", "w")
+        fcntl.flock(self._lock_files[cache_key].fileno(), operation)
+
+    def lock_for_lookup(self, cache_key: str) -> bool:
+        """Hold the shared lock of a ready entry, or the exclusive lock to create a missing one. Return whether it is ready.
+
+        Runs hold the shared lock of the entries they use, so a ready entry is looked up under the shared lock without
+        waiting for them, and only a miss escalates to the exclusive lock.
+        """
+        self._lock(cache_key, fcntl.LOCK_SH)
+        if self.is_ready(cache_key):
+            return True
+        return self.lock_for_creation(cache_key)
+
+    def lock_for_creation(self, cache_key: str) -> bool:
+        """Hold the exclusive lock of an entry, clearing a half-built entry left behind. Return whether it is ready.
+
+        An entry created by another run while waiting for the lock is held by the shared lock instead.
+        """
+        self._lock(cache_key, fcntl.LOCK_EX)
+        if self.is_ready(cache_key):
+            self._lock(cache_key, fcntl.LOCK_SH)
+            return True
+        shutil.rmtree(self.entry_path(cache_key), ignore_errors=True)
+        return False
+
+    def mark_ready(self, cache_key: str) -> None:
+        (self.entry_path(cache_key) / VENV_READY_MARKER).touch()
+
+    def lock_for_use(self, cache_key: str) -> None:
+        """Turn the lock of an entry into a shared one and record its use, blocking its eviction until released."""
+        self._lock(cache_key, fcntl.LOCK_SH)
+        (self.entry_path(cache_key) / VENV_LAST_USED_MARKER).touch()
+
+    def release(self, cache_key: str) -> None:
+        lock_file = self._lock_files.pop(cache_key, None)
+        if lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            lock_file.close()
+
+    def evict(self) -> list[str]:
+        """Remove the least recently used ready entries beyond the max entries, skipping the ones in use.
+
+        Return:
+            list: The keys of the evicted entries
+        """
+        entries = []
+        for entry_path in self.cache_dir.iterdir():
+            if entry_path.is_dir() and (entry_path / VENV_READY_MARKER).is_file():
+                last_used_marker = entry_path / VENV_LAST_USED_MARKER
+                last_used = last_used_marker.stat().st_mtime if last_used_marker.exists() else 0.0
+                entries.append((last_used, entry_path.name))
+        evicted = []
+        for _, cache_key in sorted(entries, reverse=True)[self.max_entries :]:
+            with open(self.cache_dir / f"{cache_key}.lock", "w") as lock_file:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    self.logger.info(f"Skip evicting virtual environment {cache_key} in use")
+                    continue
+                try:
+                    shutil.rmtree(self.entry_path(cache_key), ignore_errors=True)
+                    evicted.append(cache_key)
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        if evicted:
+            self.logger.info(f"Evicted least recently used virtual environments {evicted} from {self.cache_dir}")
+        return evicted
@@ -0,0 +1 @@
+"""This package hosts write protection codes"""
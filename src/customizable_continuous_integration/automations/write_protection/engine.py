@@ -0,0 +1,86 @@
+"""This module defines the in-process write protection engine.
+
+The engine computes the changed files of a pull request with a single `git diff` and matches them against the
+precompiled include and exclude filters, instead of listing all repository files and diffing them in batches by
+`write-protection-pr.sh`.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import logging
+import re
+import typing
+
+from pre_commit.util import cmd_output
+
+ADMIN_LIST_SEPARATOR = ";"
+
+
+class WriteProtectionEngine(object):
+    def __init__(self, include_filter: str = "^$", exclude_filter: str = "^$", admin_list: list[str] = None, logger: logging.Logger = None) -> None:
+        self.include_re = re.compile(include_filter)
+        self.exclude_re = re.compile(exclude_filter)
+        self.admins = {a for a in admin_list or [] if a}
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+
+    @staticmethod
+    def split_admin_list(admin_list: str) -> list[str]:
+        return [a.strip() for a in (admin_list or "").split(ADMIN_LIST_SEPARATOR) if a.strip()]
+
+    def is_admin_user(self, user: str) -> bool:
+        return bool(user) and user in self.admins
+
+    def is_protected(self, filename: str) -> bool:
+        return bool(self.include_re.search(filename)) and not self.exclude_re.search(filename)
+
+    @staticmethod
+    def changed_files(merge_ref: str, head_ref: str, forked: bool = False) -> set[str]:
+        """Return the files changed by the head reference against the merge reference in one diff.
+
+        Renames are listed as a deletion and an addition, so both the old and the new paths are checked.
+        A cross-forks diff compares the trees directly, otherwise the head is compared with the merge base.
+        """
+        diff_args = ["git", "diff", "--name-only", "-z", "--no-renames"]
+        if not forked:
+            diff_args.append("--merge-base")
+        _, diff_stdout, _ = cmd_output(*diff_args, merge_ref, head_ref)
+        return {f for f in diff_stdout.split("\0") if f}
+
+    @staticmethod
+    def tracked_files() -> set[str]:
+        _, ls_stdout, _ = cmd_output("git", "ls-files", "-z")
+        return {f for f in ls_stdout.split("\0") if f}
+
+    def protected_changes(self, changed_files: typing.Iterable[str], tracked_files: set[str] = None) -> list[str]:
+        """Return the changed files matched by the filters, limited to the tracked files when they are given."""
+        return sorted(f for f in changed_files if (tracked_files is None or f in tracked_files) and self.is_protected(f))
+
+    def check(self, head_ref: str, merge_ref: str, acting_user: str, forked: bool = False) -> typing.Tuple[bool, list[str], str]:
+        """Check whether the acting user may change the protected files changed by the pull request.
+
+        Args:
+            head_ref (str): The head reference of the pull request
+            merge_ref (str): The merge target reference of the pull request
+            acting_user (str): The user initiating the pull request
+            forked (bool): Whether the head reference is from a forked repository
+        Return:
+            tuple: The passing flag, the changed protected files and the check message
+        """
+        if not head_ref or not merge_ref:
+            return True, [], "It is not github action run, skip the check"
+        if self.is_admin_user(acting_user):
+            return True, [], f"User {acting_user} is a administrator of this repository, pass all checks"
+        changed_files = self.changed_files(merge_ref, head_ref, forked)
+        self.logger.info(f"Detected {len(changed_files)} changed files between {merge_ref} and {head_ref}")
+        # Files only existing in the pull request base are out of scope, the same as the files listed by the script
+        protected_files = self.protected_changes(changed_files, self.tracked_files() if changed_files else set())
+        if protected_files:
+            return False, protected_files, "protected files changed"
+        return True, [], "protected files are not changed"
@@ -6,10 +6,12 @@ Revision History:
   Date         Author		   Comments
 ------------------------------------------------------------------------------
   27/08/2024   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Add lazily imported immutable dictionary
 """
 
 import collections
 import copy
+import importlib
 import typing
 
 ImmutableDictKeyType = typing.TypeVar("ImmutableDictKeyType")
@@ -37,3 +39,17 @@ class ImmutableDictWrapper(collections.abc.Mapping[ImmutableDictKeyType, Immutab
     @property
     def data(self) -> dict[ImmutableDictKeyType, ImmutableDictValueType]:
         return copy.deepcopy(self.__data)
+
+
+class LazyImmutableDictWrapper(ImmutableDictWrapper[ImmutableDictKeyType, ImmutableDictValueType]):
+    """An immutable dictionary wrapper of values given as `module:attribute` paths, imported on the first access."""
+
+    def __init__(self, data: dict[ImmutableDictKeyType, str]):
+        super().__init__(data)
+        self.__resolved: dict[ImmutableDictKeyType, ImmutableDictValueType] = {}
+
+    def __getitem__(self, key: ImmutableDictKeyType) -> ImmutableDictValueType:
+        if key not in self.__resolved:
+            module_path, _, attribute_name = super().__getitem__(key).partition(":")
+            self.__resolved[key] = getattr(importlib.import_module(module_path), attribute_name)
+        return self.__resolved[key]
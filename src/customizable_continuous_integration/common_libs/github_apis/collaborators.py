@@ -0,0 +1,156 @@
+"""The cached Github API lookups of repository collaborators
+
+Collaborators are kept in a local cache file per repository and permission. Within the TTL the cached logins are
+used without any request. After the TTL every cached page is revalidated by its ETag with `If-None-Match`, and
+unchanged pages answered by `304 Not Modified` do not count against the API rate limit. On cache misses the pages
+after the first one are fetched concurrently.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Stop paginating at the last page told by the Link header
+"""
+
+import fcntl
+import json
+import logging
+import os
+import pathlib
+import re
+import time
+import typing
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_GITHUB_API_URL = "https://api.github.com"
+DEFAULT_COLLABORATOR_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "customizable_continuous_integration", "github_collaborators.json")
+DEFAULT_COLLABORATOR_CACHE_TTL_SECONDS = 300
+DEFAULT_COLLABORATOR_PAGE_SIZE = 100
+DEFAULT_COLLABORATOR_FETCH_WORKERS = 4
+LINK_LAST_PAGE_PATTERN = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+class CollaboratorPage(typing.NamedTuple):
+    etag: str
+    logins: list[str]
+
+
+class CachedCollaboratorLookup(object):
+    def __init__(
+        self,
+        github_access_token: str,
+        cache_path: str = None,
+        ttl_seconds: int = DEFAULT_COLLABORATOR_CACHE_TTL_SECONDS,
+        base_url: str = None,
+        max_workers: int = DEFAULT_COLLABORATOR_FETCH_WORKERS,
+        logger: logging.Logger = None,
+    ) -> None:
+        self.github_access_token = github_access_token
+        self.cache_path = pathlib.Path(cache_path or DEFAULT_COLLABORATOR_CACHE_PATH)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.base_url = (base_url or os.environ.get("GITHUB_API_URL", DEFAULT_GITHUB_API_URL)).rstrip("/")
+        self.max_workers = max_workers
+        if not logger:
+            logger = logging.getLogger(__class__.__name__)
+        self.logger = logger
+
+    @staticmethod
+    def cache_key(repository_name: str, permission: str = None) -> str:
+        return f"{repository_name.lower()}:{permission or ''}"
+
+    def load(self) -> dict[str, typing.Any]:
+        if not self.cache_path.is_file():
+            return {}
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except ValueError:
+            self.logger.warning(f"Ignore the corrupted collaborator cache {self.cache_path}")
+            return {}
+
+    def store(self, cache_key: str, entry: dict[str, typing.Any]) -> None:
+        """Merge an entry into the cache file under an exclusive lock."""
+        with open(f"{self.cache_path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                cache = self.load()
+                cache[cache_key] = entry
+                staging_path = f"{self.cache_path}.{os.getpid()}.tmp"
+                with open(staging_path, "w") as f:
+                    json.dump(cache, f)
+                os.replace(staging_path, self.cache_path)
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def fetch_page(
+        self, repository_name: str, permission: str, page: int, cached_page: CollaboratorPage = None
+    ) -> typing.Tuple[CollaboratorPage, int | None]:
+        """Fetch a page of collaborators, revalidating the cached page by its ETag.
+
+        Return:
+            tuple: The page and the last page number in the `Link` header, which is None for not modified pages without it
+        """
+        query = {"per_page": DEFAULT_COLLABORATOR_PAGE_SIZE, "page": page}
+        if permission:
+            query["permission"] = permission
+        url = f"{self.base_url}/repos/{repository_name}/collaborators?{urllib.parse.urlencode(query)}"
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self.github_access_token}",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+        if cached_page and cached_page.etag:
+            headers["If-None-Match"] = cached_page.etag
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+                logins = [c["login"] for c in json.loads(response.read())]
+                last_page_match = LINK_LAST_PAGE_PATTERN.search(response.headers.get("Link", ""))
+                last_page = int(last_page_match.group(1)) if last_page_match else page
+                return CollaboratorPage(response.headers.get("ETag", ""), logins), last_page
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached_page:
+                # The last page is only known when the not modified response carries the `Link` header
+                last_page_match = LINK_LAST_PAGE_PATTERN.search(e.headers.get("Link", "")) if e.headers else None
+                return cached_page, int(last_page_match.group(1)) if last_page_match else None
+            raise
+
+    def get_logins(self, repository_name: str, permission: str = None) -> list[str]:
+        """Return the collaborator logins of a repository with the given permission, from the cache when valid."""
+        cache_key = self.cache_key(repository_name, permission)
+        entry = self.load().get(cache_key, {})
+        cached_pages = [CollaboratorPage(*p) for p in entry.get("pages", [])]
+        if "fetched_at" in entry and time.time() - entry["fetched_at"] < self.ttl_seconds:
+            self.logger.info(f"Use cached collaborators of {repository_name} with permission {permission}")
+            return [login for p in cached_pages for login in p.logins]
+
+        def cached(page: int) -> CollaboratorPage | None:
+            return cached_pages[page - 1] if page <= len(cached_pages) else None
+
+        first_page, known_last_page = self.fetch_page(repository_name, permission, 1, cached(1))
+        # The last page of a not modified first page is unknown, so the cached pages are all revalidated
+        last_page = known_last_page if known_last_page is not None else max(len(cached_pages), 1)
+        pages = [first_page]
+        if last_page > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for page, page_last_page in executor.map(
+                    lambda p: self.fetch_page(repository_name, permission, p, cached(p)), range(2, last_page + 1)
+                ):
+                    pages.append(page)
+                    if page_last_page is not None:
+                        known_last_page = max(known_last_page or 0, page_last_page)
+        # Collaborators appended beyond the last full page are only seen by reading on, unless a fetched page told the last page
+        while len(pages[-1].logins) >= DEFAULT_COLLABORATOR_PAGE_SIZE and (known_last_page is None or len(pages) < known_last_page):
+            next_page, page_last_page = self.fetch_page(repository_name, permission, len(pages) + 1, cached(len(pages) + 1))
+            pages.append(next_page)
+            if page_last_page is not None:
+                known_last_page = max(known_last_page or 0, page_last_page)
+        pages = [p for p in pages if p.logins]
+        self.store(cache_key, {"fetched_at": time.time(), "pages": [list(p) for p in pages]})
+        self.logger.info(f"Fetched {len(pages)} pages of collaborators of {repository_name} with permission {permission}")
+        return [login for p in pages for login in p.logins]
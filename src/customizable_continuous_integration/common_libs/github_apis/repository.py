@@ -7,10 +7,13 @@ Revision History:
 ------------------------------------------------------------------------------
   17/09/2024   Ryan, Gao       Initial creation
   22/09/2024   Ryan, Gao       Fix iterator of returned collaborators
+  19/10/2026   Ryan, Gao       Add cached collaborator lookups
 """
 
 from github import Auth, Github
 
+from customizable_continuous_integration.common_libs.github_apis.collaborators import DEFAULT_COLLABORATOR_CACHE_TTL_SECONDS, CachedCollaboratorLookup
+
 
 def get_repository_by_permission(github_access_token: str, repository_name: str, permission: str = None) -> list[str]:
     auth = Auth.Token(github_access_token)
@@ -20,3 +23,15 @@ def get_repository_by_permission(github_access_token: str, repository_name: str,
     else:
         admin_paged_list = r.get_collaborators()
     return [n.login for n in admin_paged_list]
+
+
+def get_cached_repository_by_permission(
+    github_access_token: str,
+    repository_name: str,
+    permission: str = None,
+    cache_path: str = None,
+    ttl_seconds: int = DEFAULT_COLLABORATOR_CACHE_TTL_SECONDS,
+    base_url: str = None,
+) -> list[str]:
+    lookup = CachedCollaboratorLookup(github_access_token, cache_path=cache_path, ttl_seconds=ttl_seconds, base_url=base_url)
+    return lookup.get_logins(repository_name, permission)
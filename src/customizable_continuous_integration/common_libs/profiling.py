@@ -0,0 +1,177 @@
+"""This module defines the profiling hooks of CLI commands and their workers
+
+Profiling is turned on by the output path in the `CI_CLI_PROFILE` environment variable, which is inherited by worker
+processes. Each profiled call runs under its own profiler, since profilers only observe the thread they are started
+on, and the results are merged per process and profile name. The merged profiles are written when the process exits
+into the output path, which can be any fsspec path:
+  - `<name>-<pid>.prof` by cProfile, readable by `pstats`, snakeviz or flameprof
+  - `<name>-<pid>.speedscope.json` by the pyinstrument sampling profiler, readable by speedscope
+
+The profiler is chosen by `CI_CLI_PROFILER` of `auto` (pyinstrument when installed), `cprofile` or `pyinstrument`.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import contextlib
+import cProfile
+import functools
+import importlib.util
+import logging
+import marshal
+import multiprocessing.util
+import os
+import pstats
+import threading
+import typing
+
+PROFILE_OUTPUT_ENV = "CI_CLI_PROFILE"
+PROFILER_ENV = "CI_CLI_PROFILER"
+PROFILER_AUTO = "auto"
+PROFILER_CPROFILE = "cprofile"
+PROFILER_PYINSTRUMENT = "pyinstrument"
+
+_logger = logging.getLogger("profiling")
+_RECORDERS: dict[str, "ProfileRecorder"] = {}
+_RECORDERS_LOCK = threading.Lock()
+_RECORDERS_PID: int | None = None
+_THREAD_STATE = threading.local()
+
+
+def profile_output() -> str | None:
+    return os.environ.get(PROFILE_OUTPUT_ENV) or None
+
+
+def resolve_profiler() -> str:
+    profiler = os.environ.get(PROFILER_ENV, PROFILER_AUTO).lower()
+    if profiler == PROFILER_AUTO:
+        return PROFILER_PYINSTRUMENT if importlib.util.find_spec("pyinstrument") else PROFILER_CPROFILE
+    return profiler
+
+
+class ProfileRecorder(object):
+    """The merged profile of the calls under a profile name in this process."""
+
+    def __init__(self, name: str, profiler: str) -> None:
+        self.name = name
+        self.profiler = profiler
+        self.stats: pstats.Stats | None = None
+        self.session = None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def record(self) -> typing.Iterator[None]:
+        if self.profiler == PROFILER_PYINSTRUMENT:
+            from pyinstrument import Profiler
+            from pyinstrument.session import Session
+
+            profiler = Profiler(async_mode="disabled")
+            profiler.start()
+            try:
+                yield
+            finally:
+                session = profiler.stop()
+                with self._lock:
+                    self.session = Session.combine(self.session, session) if self.session else session
+        else:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Since Python 3.12 a single cProfile profiler observes all threads and others cannot be enabled
+                yield
+                return
+            try:
+                yield
+            finally:
+                profiler.disable()
+                with self._lock:
+                    if self.stats is None:
+                        self.stats = pstats.Stats(profiler)
+                    else:
+                        self.stats.add(profiler)
+
+    def dump(self, output_path: str) -> str | None:
+        """Write the merged profile under the output path, return the written file or None if nothing recorded."""
+        # Imported on dumping to keep it off the startup of unprofiled commands
+        import fsspec
+
+        with self._lock:
+            if self.session is not None:
+                from pyinstrument.renderers import SpeedscopeRenderer
+
+                file_path = f"{output_path.rstrip('/')}/{self.name}-{os.getpid()}.speedscope.json"
+                with fsspec.open(file_path, "w") as f:
+                    f.write(SpeedscopeRenderer().render(self.session))
+            elif self.stats is not None:
+                file_path = f"{output_path.rstrip('/')}/{self.name}-{os.getpid()}.prof"
+                # The same marshalled format as pstats.Stats.dump_stats, which only writes to local files
+                with fsspec.open(file_path, "wb") as f:
+                    marshal.dump(self.stats.stats, f)
+            else:
+                return None
+        return file_path
+
+
+def dump_profiles() -> list[str]:
+    output_path = profile_output()
+    if not output_path:
+        return []
+    with _RECORDERS_LOCK:
+        recorders = list(_RECORDERS.values())
+    file_paths = [p for p in (r.dump(output_path) for r in recorders) if p]
+    for file_path in file_paths:
+        _logger.info(f"Profile written to {file_path}")
+    return file_paths
+
+
+def get_recorder(name: str) -> ProfileRecorder:
+    """Return the recorder of a profile name, registering the dump at the exit of this process on the first call.
+
+    The dump is registered as a multiprocessing finalizer, which runs at the exit of both the main process and the
+    worker processes of process pools, where the atexit handlers are skipped.
+    """
+    global _RECORDERS_PID
+    with _RECORDERS_LOCK:
+        if _RECORDERS_PID != os.getpid():
+            # Recorders inherited from a forked parent belong to the parent
+            _RECORDERS.clear()
+            _RECORDERS_PID = os.getpid()
+            multiprocessing.util.Finalize(None, dump_profiles, exitpriority=100)
+        if name not in _RECORDERS:
+            _RECORDERS[name] = ProfileRecorder(name, resolve_profiler())
+        return _RECORDERS[name]
+
+
+@contextlib.contextmanager
+def profiling(name: str) -> typing.Iterator[None]:
+    """Profile the enclosed code of the current thread under the profile name, if profiling is turned on."""
+    # Profilers cannot be nested in a thread, so the calls profiled by an outer profiler are kept in its profile
+    # The state is kept with the process id, as a forked worker process inherits the state of the forking thread
+    if not profile_output() or getattr(_THREAD_STATE, "profiling_pid", None) == os.getpid():
+        yield
+        return
+    _THREAD_STATE.profiling_pid = os.getpid()
+    try:
+        with get_recorder(name).record():
+            yield
+    finally:
+        _THREAD_STATE.profiling_pid = None
+
+
+def profiled(name: str) -> typing.Callable:
+    """Decorate a worker function to be profiled under the profile name, if profiling is turned on."""
+
+    def decorator(func: typing.Callable) -> typing.Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> typing.Any:
+            with profiling(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,201 @@
+"""This module defines the timeline recording of executor runs in the Chrome Trace Event format
+
+A run records its timeline into the fsspec output path, which can be opened by Perfetto (ui.perfetto.dev) or
+chrome://tracing. Every worker thread or process is a lane of spans, with instant events marking scheduling moments,
+e.g. when a DAG node becomes ready. Spans are recorded by `timeline_span` and `traced`, which do nothing unless a
+timeline is being recorded, so they are safe to be left in worker code.
+
+Worker processes inherit the spool directory of the run by the `CI_CLI_TIMELINE_SPOOL` environment variable and
+append their events to their own spool files, which are merged into the timeline when the run finishes.
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import contextlib
+import functools
+import glob
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import typing
+
+TIMELINE_SPOOL_ENV = "CI_CLI_TIMELINE_SPOOL"
+TIMELINE_SPOOL_SUFFIX = ".jsonl"
+
+_logger = logging.getLogger("timeline")
+_RECORDER: typing.Optional["TimelineRecorder"] = None
+_RECORDER_LOCK = threading.Lock()
+
+
+def timestamp_us() -> int:
+    # The monotonic clock is shared by the processes of a host, so the lanes of worker processes line up
+    return time.monotonic_ns() // 1000
+
+
+class TimelineRecorder(object):
+    """The events of a process, kept in memory by the recording process and appended to a spool file by others."""
+
+    def __init__(self, spool_dir: str, process_name: str = None, in_memory: bool = False) -> None:
+        self.spool_dir = spool_dir
+        self.in_memory = in_memory
+        self.pid = os.getpid()
+        self.events: list[dict[str, typing.Any]] = []
+        self._named_threads: set[int] = set()
+        self._lock = threading.Lock()
+        self._spool_file = None
+        self.add_metadata("process_name", {"name": process_name or f"process-{self.pid}"}, tid=0)
+
+    @property
+    def spool_path(self) -> str:
+        return os.path.join(self.spool_dir, f"events-{self.pid}{TIMELINE_SPOOL_SUFFIX}")
+
+    def add_event(self, event: dict[str, typing.Any]) -> None:
+        with self._lock:
+            if event["tid"] not in self._named_threads and event["ph"] != "M":
+                self._named_threads.add(event["tid"])
+                self._append(
+                    {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": event["tid"], "args": {"name": threading.current_thread().name}}
+                )
+            self._append(event)
+
+    def _append(self, event: dict[str, typing.Any]) -> None:
+        if self.in_memory:
+            self.events.append(event)
+            return
+        if self._spool_file is None:
+            self._spool_file = open(self.spool_path, "a")
+        self._spool_file.write(json.dumps(event) + "\n")
+        self._spool_file.flush()
+
+    def add_metadata(self, name: str, args: dict[str, typing.Any], tid: int = None) -> None:
+        self.add_event({"name": name, "ph": "M", "pid": self.pid, "tid": threading.get_native_id() if tid is None else tid, "args": args})
+
+    def add_span(self, name: str, category: str, started_us: int, ended_us: int, args: dict[str, typing.Any] = None) -> None:
+        event = {"name": name, "cat": category, "ph": "X", "ts": started_us, "dur": ended_us - started_us, "pid": self.pid}
+        event.update({"tid": threading.get_native_id(), "args": args or {}})
+        self.add_event(event)
+
+    def add_instant(self, name: str, category: str, args: dict[str, typing.Any] = None) -> None:
+        event = {"name": name, "cat": category, "ph": "i", "s": "t", "ts": timestamp_us(), "pid": self.pid}
+        event.update({"tid": threading.get_native_id(), "args": args or {}})
+        self.add_event(event)
+
+    def collect(self) -> list[dict[str, typing.Any]]:
+        """Return the events of this process merged with the spooled events of worker processes."""
+        events = list(self.events)
+        for spool_path in sorted(glob.glob(os.path.join(self.spool_dir, f"*{TIMELINE_SPOOL_SUFFIX}"))):
+            with open(spool_path, "r") as f:
+                events.extend(json.loads(line) for line in f if line.strip())
+        return events
+
+
+def get_recorder() -> TimelineRecorder | None:
+    """Return the recorder of this process, which is created for worker processes of a recording run."""
+    global _RECORDER
+    recorder = _RECORDER
+    if recorder is not None and recorder.pid == os.getpid():
+        return recorder
+    spool_dir = os.environ.get(TIMELINE_SPOOL_ENV)
+    if not spool_dir:
+        return None
+    with _RECORDER_LOCK:
+        if _RECORDER is None or _RECORDER.pid != os.getpid():
+            _RECORDER = TimelineRecorder(spool_dir, f"worker-{os.getpid()}")
+        return _RECORDER
+
+
+@contextlib.contextmanager
+def recording_timeline(output_path: str | None, process_name: str = "main") -> typing.Iterator[TimelineRecorder | None]:
+    """Record the timeline of the enclosed run into the output path, nothing is recorded without an output path."""
+    global _RECORDER
+    if not output_path or get_recorder() is not None:
+        # A run nested in a recording run is recorded into the outer timeline
+        yield get_recorder()
+        return
+    if "://" not in output_path:
+        # Automations may change the working directory before the timeline is written
+        output_path = os.path.abspath(output_path)
+    spool_dir = tempfile.mkdtemp(prefix="timeline-")
+    os.environ[TIMELINE_SPOOL_ENV] = spool_dir
+    with _RECORDER_LOCK:
+        _RECORDER = TimelineRecorder(spool_dir, process_name, in_memory=True)
+    recorder = _RECORDER
+    try:
+        yield recorder
+    finally:
+        with _RECORDER_LOCK:
+            _RECORDER = None
+        os.environ.pop(TIMELINE_SPOOL_ENV, None)
+        try:
+            write_timeline(output_path, recorder.collect())
+        finally:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+def write_timeline(output_path: str, events: list[dict[str, typing.Any]]) -> None:
+    # Imported on writing to keep it off the startup of the commands
+    import fsspec
+
+    with fsspec.open(output_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    _logger.info(f"Timeline of {len(events)} events written to {output_path}")
+
+
+@contextlib.contextmanager
+def timeline_span(name: str, category: str = "", **args) -> typing.Iterator[None]:
+    """Record the enclosed code as a span on the lane of the current thread, if a timeline is being recorded."""
+    recorder = get_recorder()
+    if recorder is None:
+        yield
+        return
+    started_us = timestamp_us()
+    try:
+        yield
+    finally:
+        recorder.add_span(name, category, started_us, timestamp_us(), args)
+
+
+def timeline_instant(name: str, category: str = "", **args) -> None:
+    """Record an instant event on the lane of the current thread, if a timeline is being recorded."""
+    recorder = get_recorder()
+    if recorder is not None:
+        recorder.add_instant(name, category, args)
+
+
+def traced(name_func: typing.Callable[..., str], category: str = "") -> typing.Callable:
+    """Decorate a worker function to be recorded as a span named by `name_func` called with the same arguments."""
+
+    def decorator(func: typing.Callable) -> typing.Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> typing.Any:
+            if get_recorder() is None:
+                return func(*args, **kwargs)
+            with timeline_span(name_func(*args, **kwargs), category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def timeline_recorded(output_path_func: typing.Callable[..., str | None], process_name: str = "main") -> typing.Callable:
+    """Decorate a run to record its timeline into the output path returned by `output_path_func` of the same arguments."""
+
+    def decorator(func: typing.Callable) -> typing.Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> typing.Any:
+            with recording_timeline(output_path_func(*args, **kwargs), process_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
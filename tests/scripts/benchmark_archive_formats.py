@@ -0,0 +1,397 @@
+"""Benchmark the table data archive formats and compressions on tables of an archived schema
+
+Rows of a table schema are generated, or sampled from an archived AVRO data file, and written locally in every format
+and compression Bigquery exports and the archiver accepts as `table_data_archive_format` and
+`table_data_archive_compression`. For every combination it reports:
+  - size: the file size and its ratio to the uncompressed file of the same format
+  - encode / decode: the rows per second of writing and reading the file
+  - load proxy: the decode time divided by the slots able to read the file in parallel, since Bigquery splits AVRO blocks
+    and PARQUET row groups over `--load-slots` slots while a compressed CSV file is read by a single slot
+The best combination of every table is printed as the archive config mapping, ranked by `--rank-by`.
+AVRO requires `fastavro` installed (and `cramjam` for SNAPPY), PARQUET requires `pyarrow` installed, the combinations of
+missing packages are reported as skipped.
+
+Usage:
+  python tests/scripts/benchmark_archive_formats.py [--rows 100000] [--rank-by load]
+  python tests/scripts/benchmark_archive_formats.py --manifest gs://bucket/.../dataset.json --tables table_a,table_b
+  python tests/scripts/benchmark_archive_formats.py --manifest gs://bucket/.../table=table_a/table.json --sample-data gs://bucket/.../000000000000
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import argparse
+import base64
+import csv
+import datetime
+import decimal
+import gzip
+import json
+import os
+import random
+import statistics
+import string
+import tempfile
+import time
+import typing
+
+import fsspec
+
+from customizable_continuous_integration.automations.bigquery_archiver.entity.compact_schema import CompactSchemaField
+from customizable_continuous_integration.automations.bigquery_archiver.entity.dataset import BigqueryArchivedDatasetEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.serialization import detect_manifest_codec, read_entity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.table import BigqueryArchiveTableEntity
+
+# The compressions Bigquery exports for every format, `none` is the uncompressed baseline of the size ratio
+ARCHIVE_FORMAT_COMPRESSIONS = {
+    "avro": ("none", "deflate", "snappy"),
+    "parquet": ("none", "snappy", "gzip", "zstd"),
+    "csv": ("none", "gzip"),
+}
+SPLITTABLE_ARCHIVE_FORMATS = ("avro", "parquet")
+GZIP_MAGIC = b"\x1f\x8b"
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+DEFAULT_SCHEMA = (
+    CompactSchemaField("id", "INT64", "REQUIRED"),
+    CompactSchemaField("name", "STRING"),
+    CompactSchemaField("category", "STRING"),
+    CompactSchemaField("amount", "NUMERIC"),
+    CompactSchemaField("score", "FLOAT64"),
+    CompactSchemaField("is_active", "BOOL"),
+    CompactSchemaField("event_date", "DATE"),
+    CompactSchemaField("created_at", "TIMESTAMP"),
+    CompactSchemaField("updated_at", "DATETIME"),
+    CompactSchemaField("payload", "JSON"),
+)
+
+
+def _import_fastavro() -> typing.Any:
+    try:
+        import fastavro
+    except ImportError as e:
+        raise ImportError("Benchmarking AVRO requires the `fastavro` package installed") from e
+    return fastavro
+
+
+def _import_pyarrow_parquet() -> typing.Any:
+    try:
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Benchmarking PARQUET requires the `pyarrow` package installed") from e
+    return pyarrow.parquet
+
+
+class BenchmarkResult(typing.NamedTuple):
+    data_format: str
+    compression: str
+    size_bytes: int
+    size_ratio: float
+    encode_rows_per_second: float
+    decode_rows_per_second: float
+    load_proxy_seconds: float
+
+
+def is_nested(schema: typing.Sequence[CompactSchemaField]) -> bool:
+    return any(f.fields or f.mode == "REPEATED" for f in schema)
+
+
+def generate_value(field: CompactSchemaField, rng: random.Random, distinct_values: int) -> typing.Any:
+    """Generate a value of a field, strings are drawn from a pool of `distinct_values` to mimic repeated values."""
+    field_type = field.type.upper()
+    if field_type in ("RECORD", "STRUCT"):
+        return {f.name: generate_field_value(f, rng, distinct_values) for f in field.fields or ()}
+    if field_type in ("INT64", "INTEGER"):
+        return rng.randint(-(2**31), 2**31)
+    if field_type in ("FLOAT64", "FLOAT"):
+        return rng.random() * 10**6
+    if field_type == "NUMERIC":
+        return decimal.Decimal(rng.randint(0, 10**12)).scaleb(-9)
+    if field_type == "BIGNUMERIC":
+        return decimal.Decimal(rng.randint(0, 10**20)).scaleb(-38)
+    if field_type in ("BOOL", "BOOLEAN"):
+        return rng.random() < 0.5
+    if field_type == "DATE":
+        return datetime.date(2020, 1, 1) + datetime.timedelta(days=rng.randint(0, 2000))
+    if field_type == "TIMESTAMP":
+        return EPOCH + datetime.timedelta(seconds=rng.randint(1_500_000_000, 1_800_000_000), microseconds=rng.randint(0, 999999))
+    if field_type == "DATETIME":
+        return datetime.datetime(2020, 1, 1) + datetime.timedelta(seconds=rng.randint(0, 200_000_000))
+    if field_type == "TIME":
+        return datetime.time(rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59))
+    if field_type == "BYTES":
+        return rng.randbytes(rng.randint(8, 32))
+    if field_type == "JSON":
+        return json.dumps({"key": rng.randint(0, distinct_values), "tags": [f"tag_{rng.randint(0, 9)}"]})
+    pooled = random.Random(rng.randint(0, distinct_values))
+    return "".join(pooled.choices(string.ascii_lowercase + " ", k=pooled.randint(4, 24)))
+
+
+def generate_field_value(field: CompactSchemaField, rng: random.Random, distinct_values: int, null_ratio: float = 0.05) -> typing.Any:
+    if field.mode == "REPEATED":
+        return [generate_value(field, rng, distinct_values) for _ in range(rng.randint(0, 3))]
+    if field.mode != "REQUIRED" and rng.random() < null_ratio:
+        return None
+    return generate_value(field, rng, distinct_values)
+
+
+def generate_rows(schema: typing.Sequence[CompactSchemaField], rows: int, distinct_values: int, seed: int) -> list[dict[str, typing.Any]]:
+    rng = random.Random(seed)
+    return [{f.name: generate_field_value(f, rng, distinct_values) for f in schema} for _ in range(rows)]
+
+
+def sample_rows(data_path: str, rows: int) -> list[dict[str, typing.Any]]:
+    """Sample the leading rows of an archived AVRO data file."""
+    fastavro = _import_fastavro()
+    sampled = []
+    with fsspec.open(data_path, "rb") as f:
+        for record in fastavro.reader(f):
+            sampled.append(record)
+            if len(sampled) >= rows:
+                break
+    return sampled
+
+
+def avro_type(field: CompactSchemaField) -> typing.Any:
+    """Map a field to the AVRO type of a Bigquery export with `use_avro_logical_types`."""
+    field_type = field.type.upper()
+    if field_type in ("RECORD", "STRUCT"):
+        value_type = {"type": "record", "name": f"{field.name}_record", "fields": [{"name": f.name, "type": avro_type(f)} for f in field.fields]}
+    else:
+        value_type = {
+            "INT64": "long",
+            "INTEGER": "long",
+            "FLOAT64": "double",
+            "FLOAT": "double",
+            "BOOL": "boolean",
+            "BOOLEAN": "boolean",
+            "BYTES": "bytes",
+            "NUMERIC": {"type": "bytes", "logicalType": "decimal", "precision": 38, "scale": 9},
+            "BIGNUMERIC": {"type": "bytes", "logicalType": "decimal", "precision": 77, "scale": 38},
+            "DATE": {"type": "int", "logicalType": "date"},
+            "TIME": {"type": "long", "logicalType": "time-micros"},
+            "TIMESTAMP": {"type": "long", "logicalType": "timestamp-micros"},
+            "DATETIME": {"type": "string", "logicalType": "datetime"},
+        }.get(field_type, "string")
+    if field.mode == "REPEATED":
+        return {"type": "array", "items": value_type}
+    if field.mode == "REQUIRED":
+        return value_type
+    return ["null", value_type]
+
+
+def avro_value(field: CompactSchemaField, value: typing.Any) -> typing.Any:
+    if value is None:
+        return None
+    if field.mode == "REPEATED":
+        return [avro_value(field._replace(mode="REQUIRED"), v) for v in value]
+    if field.fields:
+        return {f.name: avro_value(f, value.get(f.name)) for f in field.fields}
+    if isinstance(value, datetime.datetime) and field.type.upper() == "DATETIME":
+        return value.isoformat()
+    return value
+
+
+def arrow_type(field: CompactSchemaField) -> typing.Any:
+    import pyarrow
+
+    field_type = field.type.upper()
+    if field_type in ("RECORD", "STRUCT"):
+        value_type = pyarrow.struct([pyarrow.field(f.name, arrow_type(f)) for f in field.fields])
+    else:
+        value_type = {
+            "INT64": pyarrow.int64(),
+            "INTEGER": pyarrow.int64(),
+            "FLOAT64": pyarrow.float64(),
+            "FLOAT": pyarrow.float64(),
+            "BOOL": pyarrow.bool_(),
+            "BOOLEAN": pyarrow.bool_(),
+            "BYTES": pyarrow.binary(),
+            "NUMERIC": pyarrow.decimal128(38, 9),
+            "BIGNUMERIC": pyarrow.decimal256(76, 38),
+            "DATE": pyarrow.date32(),
+            "TIME": pyarrow.time64("us"),
+            "TIMESTAMP": pyarrow.timestamp("us", tz="UTC"),
+            "DATETIME": pyarrow.timestamp("us"),
+        }.get(field_type, pyarrow.string())
+    return pyarrow.list_(value_type) if field.mode == "REPEATED" else value_type
+
+
+def arrow_value(field: CompactSchemaField, value: typing.Any) -> typing.Any:
+    if value is None:
+        return None
+    if field.mode == "REPEATED":
+        return [arrow_value(field._replace(mode="REQUIRED"), v) for v in value]
+    if field.fields:
+        return {f.name: arrow_value(f, value.get(f.name)) for f in field.fields}
+    if isinstance(value, str) and field.type.upper() == "DATETIME":
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+
+def csv_value(field: CompactSchemaField, value: typing.Any) -> str:
+    """Render a value as Bigquery renders it in CSV exports."""
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f UTC")
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def write_avro(path: str, schema: typing.Sequence[CompactSchemaField], rows: list[dict], compression: str) -> None:
+    fastavro = _import_fastavro()
+    avro_schema = {"type": "record", "name": "Root", "fields": [{"name": f.name, "type": avro_type(f)} for f in schema]}
+    records = ({f.name: avro_value(f, r.get(f.name)) for f in schema} for r in rows)
+    with open(path, "wb") as f:
+        fastavro.writer(f, fastavro.parse_schema(avro_schema), records, codec="null" if compression == "none" else compression)
+
+
+def read_avro(path: str) -> int:
+    fastavro = _import_fastavro()
+    with open(path, "rb") as f:
+        return sum(1 for _ in fastavro.reader(f))
+
+
+def write_parquet(path: str, schema: typing.Sequence[CompactSchemaField], rows: list[dict], compression: str) -> None:
+    pq = _import_pyarrow_parquet()
+    import pyarrow
+
+    arrow_schema = pyarrow.schema([pyarrow.field(f.name, arrow_type(f), nullable=f.mode != "REQUIRED") for f in schema])
+    table = pyarrow.Table.from_pylist([{f.name: arrow_value(f, r.get(f.name)) for f in schema} for r in rows], schema=arrow_schema)
+    pq.write_table(table, path, compression=compression)
+
+
+def read_parquet(path: str) -> int:
+    return _import_pyarrow_parquet().read_table(path).num_rows
+
+
+def write_csv(path: str, schema: typing.Sequence[CompactSchemaField], rows: list[dict], compression: str) -> None:
+    if is_nested(schema):
+        raise ValueError("Bigquery does not export nested or repeated columns to CSV")
+    opener = gzip.open if compression == "gzip" else open
+    with opener(path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([f.name for f in schema])
+        writer.writerows([csv_value(f, r.get(f.name)) for f in schema] for r in rows)
+
+
+def read_csv(path: str) -> int:
+    with open(path, "rb") as f:
+        opener = gzip.open if f.read(2) == GZIP_MAGIC else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+ARCHIVE_FORMAT_CODECS = {"avro": (write_avro, read_avro), "parquet": (write_parquet, read_parquet), "csv": (write_csv, read_csv)}
+
+
+def timed(func: typing.Callable[[], typing.Any], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+def benchmark_table(
+    schema: typing.Sequence[CompactSchemaField], rows: list[dict], work_dir: str, repeat: int, load_slots: int
+) -> tuple[list[BenchmarkResult], list[str]]:
+    """Benchmark every format and compression of a table, return the results and the skipped combinations."""
+    results, skipped = [], []
+    for data_format, compressions in ARCHIVE_FORMAT_COMPRESSIONS.items():
+        writer, reader = ARCHIVE_FORMAT_CODECS[data_format]
+        baseline_bytes = None
+        for compression in compressions:
+            path = os.path.join(work_dir, f"data.{data_format}.{compression}")
+            try:
+                encode_seconds = timed(lambda: writer(path, schema, rows, compression), repeat)
+            except (ImportError, ValueError) as e:
+                skipped.append(f"{data_format}/{compression}: {e}")
+                continue
+            decode_seconds = timed(lambda: reader(path), repeat)
+            size_bytes = os.path.getsize(path)
+            baseline_bytes = baseline_bytes or size_bytes
+            slots = load_slots if data_format in SPLITTABLE_ARCHIVE_FORMATS or compression == "none" else 1
+            results.append(
+                BenchmarkResult(
+                    data_format,
+                    compression,
+                    size_bytes,
+                    size_bytes / baseline_bytes,
+                    len(rows) / max(encode_seconds, 1e-9),
+                    len(rows) / max(decode_seconds, 1e-9),
+                    decode_seconds / slots,
+                )
+            )
+            os.remove(path)
+    return results, skipped
+
+
+def load_table_schemas(manifest_path: str, table_names: list[str]) -> dict[str, tuple[CompactSchemaField, ...]]:
+    """Load the archived schemas of tables from a dataset manifest or a table manifest."""
+    codec = detect_manifest_codec(manifest_path)
+    if os.path.basename(manifest_path).startswith("dataset."):
+        dataset = read_entity(BigqueryArchivedDatasetEntity, manifest_path, codec)
+        return {t.identity: t.schema_fields for t in dataset.tables if not table_names or t.identity in table_names}
+    table = read_entity(BigqueryArchiveTableEntity, manifest_path, codec)
+    return {table.identity: table.schema_fields}
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser(add_help=True)
+    args_parser.add_argument("--manifest", default="", help="A dataset or table manifest of the archive, a sample schema when absent")
+    args_parser.add_argument("--tables", default="", help="Comma separated tables of a dataset manifest, all tables when absent")
+    args_parser.add_argument("--sample-data", default="", help="An archived AVRO data file to sample rows from, for a single table")
+    args_parser.add_argument("--rows", type=int, default=100000)
+    args_parser.add_argument("--distinct-values", type=int, default=1000, help="The cardinality of generated strings")
+    args_parser.add_argument("--repeat", type=int, default=3)
+    args_parser.add_argument("--load-slots", type=int, default=8, help="The slots reading a splittable file in the load proxy")
+    args_parser.add_argument("--rank-by", choices=("size", "load", "encode"), default="size")
+    args_parser.add_argument("--seed", type=int, default=0)
+    args = args_parser.parse_args()
+
+    table_schemas = {"sample_table": DEFAULT_SCHEMA}
+    if args.manifest:
+        table_schemas = load_table_schemas(args.manifest, [t for t in args.tables.split(",") if t])
+    if args.sample_data and len(table_schemas) != 1:
+        raise ValueError("Sampling rows from a data file requires a single table")
+    rank_keys = {
+        "size": lambda r: r.size_bytes,
+        "load": lambda r: r.load_proxy_seconds,
+        "encode": lambda r: -r.encode_rows_per_second,
+    }
+    format_mapping, compression_mapping = {}, {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for table_name, schema in table_schemas.items():
+            rows = sample_rows(args.sample_data, args.rows) if args.sample_data else generate_rows(schema, args.rows, args.distinct_values, args.seed)
+            print(f"\n{table_name}: {len(rows)} rows of {len(schema)} columns")
+            print(f"{'format':<10}{'compression':<14}{'size(MB)':>10}{'ratio':>8}{'encode(rows/s)':>16}{'decode(rows/s)':>16}{'load proxy(s)':>15}")
+            results, skipped = benchmark_table(schema, rows, work_dir, args.repeat, args.load_slots)
+            for r in sorted(results, key=rank_keys[args.rank_by]):
+                print(
+                    f"{r.data_format:<10}{r.compression:<14}{r.size_bytes / 2**20:>10.2f}{r.size_ratio:>8.2f}"
+                    f"{r.encode_rows_per_second:>16.0f}{r.decode_rows_per_second:>16.0f}{r.load_proxy_seconds:>15.3f}"
+                )
+            for s in skipped:
+                print(f"skipped {s}")
+            # The uncompressed baselines are not selectable by the archive config
+            candidates = [r for r in results if r.compression != "none"]
+            if candidates:
+                best = min(candidates, key=rank_keys[args.rank_by])
+                format_mapping[table_name], compression_mapping[table_name] = best.data_format, best.compression
+    print(f"\nBest by {args.rank_by} as the archive config mappings:")
+    print(json.dumps({"table_data_archive_format_mapping": format_mapping, "table_data_archive_compression_mapping": compression_mapping}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark the startup time of ci_cli sub-commands and fail on regressions
+
+Every sub-command is retrieved from the CLI registry in fresh interpreters, which is the import cost paid by `ci_cli`
+before the command runs. The check fails when a sub-command imports a heavy dependency it does not own, or when its
+median startup time exceeds the baseline by more than the tolerance.
+
+Usage:
+  python tests/scripts/benchmark_cli_startup.py [--repeat 5] [--baseline startup_baseline.json] [--tolerance 0.5]
+  python tests/scripts/benchmark_cli_startup.py --baseline startup_baseline.json --update-baseline
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+  19/10/2026   Ryan, Gao       Add verify-bigquery command
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("dbt", "google.cloud.bigquery", "gcsfs", "sqlglot", "github", "pre_commit", "virtualenv", "pip")
+# The heavy modules each sub-command is allowed to import, the help command is the registry lookup of an unknown command
+ALLOWED_HEAVY_MODULES = {
+    "help": (),
+    "run-shell": ("pre_commit",),
+    "write-protection": ("pre_commit", "github"),
+    "integration-test": ("pre_commit", "virtualenv", "pip"),
+    "archive-bigquery": ("google.cloud.bigquery", "gcsfs", "sqlglot"),
+    "restore-bigquery": ("google.cloud.bigquery", "gcsfs", "sqlglot"),
+    "retain-bigquery": ("google.cloud.bigquery", "gcsfs", "sqlglot"),
+    "verify-bigquery": ("google.cloud.bigquery", "gcsfs", "sqlglot"),
+}
+RETRIEVE_COMMAND_SCRIPT = """
+import json, sys
+from customizable_continuous_integration.automations.commands.constants import INTEGRATION_CLI_COMMANDS_REGISTRY
+name = sys.argv[1]
+if name in INTEGRATION_CLI_COMMANDS_REGISTRY:
+    INTEGRATION_CLI_COMMANDS_REGISTRY[name]
+print(json.dumps(sorted(m for m in json.loads(sys.argv[2]) if m in sys.modules)))
+"""
+
+
+def measure_command(command_name: str, repeat: int) -> tuple[float, list[str]]:
+    """Return the median seconds of retrieving a command in fresh interpreters and the heavy modules it imported."""
+    durations, imported = [], []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", RETRIEVE_COMMAND_SCRIPT, command_name, json.dumps(HEAVY_MODULES)], capture_output=True, text=True, check=True
+        )
+        durations.append(time.perf_counter() - started_at)
+        imported = json.loads(proc.stdout.strip().splitlines()[-1])
+    return statistics.median(durations), imported
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--repeat", type=int, default=5)
+    args_parser.add_argument("--baseline", default="", help="JSON file of the baseline median seconds per sub-command")
+    args_parser.add_argument("--tolerance", type=float, default=0.5, help="allowed ratio above the baseline")
+    args_parser.add_argument("--update-baseline", action="store_true")
+    args = args_parser.parse_args()
+
+    baseline = {}
+    if args.baseline and os.path.isfile(args.baseline) and not args.update_baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    results, failures = {}, []
+    print(f"{'sub-command':<20} {'median':>9} {'baseline':>9}  heavy modules")
+    for command_name, allowed in ALLOWED_HEAVY_MODULES.items():
+        median, imported = measure_command(command_name, args.repeat)
+        results[command_name] = median
+        baseline_median = baseline.get(command_name)
+        print(f"{command_name:<20} {median:>8.3f}s {baseline_median or 0.0:>8.3f}s  {','.join(imported) or '-'}")
+        unexpected = [m for m in imported if m not in allowed]
+        if unexpected:
+            failures.append(f"{command_name} imports {unexpected}")
+        if baseline_median and median > baseline_median * (1 + args.tolerance):
+            failures.append(f"{command_name} starts in {median:.3f}s above the baseline {baseline_median:.3f}s")
+
+    if args.update_baseline and args.baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Updated the baseline {args.baseline}")
+    if failures:
+        print("Startup regressions:\n  " + "\n  ".join(failures))
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark the compact schema representation of archived entities against pydantic schema field models
+
+Every step is measured for the legacy `list[BigquerySchemaFieldEntity]` schema and the compact schema:
+  - fetch: build the entity schemas from the Bigquery schema fields
+  - load: validate the table entities from their json manifests
+  - restore: convert the entity schemas into Bigquery schema fields for load jobs
+The time is measured without tracing memory, then the peak and the retained memory held by the results are traced.
+By default tables share their columns, `--distinct-schemas` gives every table its own column descriptions.
+
+Usage:
+  python tests/scripts/benchmark_compact_schema.py [--tables 100] [--columns 1000] [--distinct-schemas]
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import argparse
+import datetime
+import gc
+import time
+import tracemalloc
+import typing
+
+import google.cloud.bigquery
+
+from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigquerySchemaFieldEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.bigquery_metadata import BigqueryTableMetadata
+from customizable_continuous_integration.automations.bigquery_archiver.entity.compact_schema import to_bigquery_schema_field, to_compact_schema
+from customizable_continuous_integration.automations.bigquery_archiver.entity.table import BigqueryArchiveTableEntity
+
+SCHEMA_FIELD_TYPES = ("STRING", "INT64", "FLOAT64", "TIMESTAMP", "DATETIME", "BOOL")
+
+
+class LegacyArchiveTableEntity(BigqueryArchiveTableEntity):
+    schema_fields: list[BigquerySchemaFieldEntity] = []
+
+
+def build_bigquery_schemas(tables: int, columns: int, distinct: bool) -> list[list[google.cloud.bigquery.SchemaField]]:
+    return [
+        [
+            google.cloud.bigquery.SchemaField(
+                f"column_{c}",
+                SCHEMA_FIELD_TYPES[c % len(SCHEMA_FIELD_TYPES)],
+                description=f"description of column {c}" + (f" of table {t}" if distinct else ""),
+            )
+            for c in range(columns)
+        ]
+        for t in range(tables)
+    ]
+
+
+def measure(func: typing.Callable[[], typing.Any]) -> tuple[typing.Any, float, int, int]:
+    """Return the result, the seconds, the peak and the retained memory in bytes of a function."""
+    gc.collect()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    to_bigquery_schema_field.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak, retained
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser(add_help=True)
+    args_parser.add_argument("--tables", type=int, default=100)
+    args_parser.add_argument("--columns", type=int, default=1000)
+    args_parser.add_argument("--distinct-schemas", action="store_true")
+    args = args_parser.parse_args()
+
+    bigquery_schemas = build_bigquery_schemas(args.tables, args.columns, args.distinct_schemas)
+    archived_datetime = datetime.datetime.now(tz=datetime.timezone.utc)
+
+    def build_entities(entity_cls: type[BigqueryArchiveTableEntity], schemas: list) -> list[BigqueryArchiveTableEntity]:
+        return [
+            entity_cls(
+                bigquery_metadata=BigqueryTableMetadata(project_id="bench-project", dataset="bench_dataset", identity=f"table_{t}"),
+                gcs_prefix="memory://bench",
+                archived_datetime=archived_datetime,
+                schema_fields=schema,
+            )
+            for t, schema in enumerate(schemas)
+        ]
+
+    print(f"{args.tables * args.columns} columns in {args.tables} tables")
+    print(f"{'representation':<16}{'step':<10}{'time(s)':>10}{'peak(MB)':>12}{'retained(MB)':>14}")
+    for name, entity_cls, convert in (
+        ("legacy", LegacyArchiveTableEntity, lambda schema: [BigquerySchemaFieldEntity.from_dict(f.to_api_repr()) for f in schema]),
+        ("compact", BigqueryArchiveTableEntity, to_compact_schema),
+    ):
+        schemas, elapsed, peak, retained = measure(lambda: [convert(s) for s in bigquery_schemas])
+        print(f"{name:<16}{'fetch':<10}{elapsed:>10.3f}{peak / 2**20:>12.2f}{retained / 2**20:>14.2f}")
+        manifests = [e.model_dump_json() for e in build_entities(entity_cls, schemas)]
+        del schemas
+        entities, elapsed, peak, retained = measure(lambda: [entity_cls.model_validate_json(m) for m in manifests])
+        print(f"{name:<16}{'load':<10}{elapsed:>10.3f}{peak / 2**20:>12.2f}{retained / 2**20:>14.2f}")
+        _, elapsed, peak, retained = measure(lambda: [[f.to_bigquery_schema_field() for f in e.schema_fields] for e in entities])
+        print(f"{name:<16}{'restore':<10}{elapsed:>10.3f}{peak / 2**20:>12.2f}{retained / 2**20:>14.2f}")
+        del entities, manifests
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark the bigquery archiver dataset manifest serialization paths
+
+Usage:
+  python tests/scripts/benchmark_manifest_serialization.py [--tables 200] [--columns 250]
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import typing
+
+from customizable_continuous_integration.automations.bigquery_archiver.entity.base import BigquerySchemaFieldEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.bigquery_metadata import (
+    BigqueryDatasetMetadata,
+    BigqueryTableMetadata,
+)
+from customizable_continuous_integration.automations.bigquery_archiver.entity.dataset import BigqueryArchivedDatasetEntity
+from customizable_continuous_integration.automations.bigquery_archiver.entity.serialization import (
+    MANIFEST_CODEC_SUFFIXES,
+    read_entity,
+    write_entity,
+)
+from customizable_continuous_integration.automations.bigquery_archiver.entity.table import BigqueryArchiveTableEntity
+
+
+def build_dataset(tables: int, columns: int) -> BigqueryArchivedDatasetEntity:
+    archived_datetime = datetime.datetime.now(tz=datetime.timezone.utc)
+    dataset = BigqueryArchivedDatasetEntity(
+        bigquery_metadata=BigqueryDatasetMetadata(project_id="bench-project", dataset="bench_dataset", identity="bench_dataset"),
+        gcs_prefix="memory://bench",
+        archived_datetime=archived_datetime,
+    )
+    for t in range(tables):
+        dataset.tables.append(
+            BigqueryArchiveTableEntity(
+                bigquery_metadata=BigqueryTableMetadata(project_id="bench-project", dataset="bench_dataset", identity=f"table_{t}"),
+                gcs_prefix=dataset.generate_sub_serialization_prefix("table"),
+                archived_datetime=archived_datetime,
+                schema_fields=[
+                    BigquerySchemaFieldEntity(name=f"column_{c}", type="STRING", description=f"description of column {c}") for c in range(columns)
+                ],
+            )
+        )
+    return dataset
+
+
+def measure(func: typing.Callable[[], typing.Any]) -> tuple[float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def legacy_load(path: str) -> BigqueryArchivedDatasetEntity:
+    with open(path, "r") as f:
+        return BigqueryArchivedDatasetEntity.model_validate(json.load(f))
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser(add_help=True)
+    args_parser.add_argument("--tables", type=int, default=200)
+    args_parser.add_argument("--columns", type=int, default=250)
+    args = args_parser.parse_args()
+
+    dataset = build_dataset(args.tables, args.columns)
+    work_dir = tempfile.mkdtemp()
+    manifest_path = os.path.join(work_dir, "dataset.json")
+    print(f"{'path':<24}{'size(MB)':>12}{'load(s)':>12}{'peak(MB)':>12}")
+
+    legacy_path = os.path.join(work_dir, "legacy", "dataset.json")
+    os.makedirs(os.path.dirname(legacy_path))
+    with open(legacy_path, "w") as f:
+        f.write(dataset.model_dump_json(indent=2))
+    elapsed, peak = measure(lambda: legacy_load(legacy_path))
+    print(f"{'legacy json.load':<24}{os.path.getsize(legacy_path) / 2**20:>12.2f}{elapsed:>12.3f}{peak / 2**20:>12.2f}")
+
+    for codec in MANIFEST_CODEC_SUFFIXES:
+        try:
+            written_path = write_entity(dataset, manifest_path, codec)
+        except ImportError as e:
+            print(f"{codec:<24}skipped: {e}")
+            continue
+        elapsed, peak = measure(lambda c=codec: read_entity(BigqueryArchivedDatasetEntity, manifest_path, c))
+        print(f"{codec:<24}{os.path.getsize(written_path) / 2**20:>12.2f}{elapsed:>12.3f}{peak / 2**20:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Check the cached collaborator lookups against a local stand-in of the Github collaborators API
+
+A `ThreadingHTTPServer` serves paginated `/repos/<owner>/<repo>/collaborators` pages with `Link` and `ETag` headers and
+answers `304 Not Modified` with the same `Link` header to matching `If-None-Match` headers. The check asserts the
+pagination, the requests saved by cache hits and ETag revalidations, and the permission filtering, and fails with a
+non-zero exit code otherwise.
+
+Usage:
+  python tests/scripts/check_collaborator_lookup.py [--collaborators 250]
+
+Author:
+  Ryan,Gao (ryangao-au@outlook.com)
+Revision History:
+  Date         Author		   Comments
+------------------------------------------------------------------------------
+  19/10/2026   Ryan, Gao       Initial creation
+"""
+
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import tempfile
+import threading
+import urllib.parse
+
+from customizable_continuous_integration.common_libs.github_apis.collaborators import DEFAULT_COLLABORATOR_PAGE_SIZE, CachedCollaboratorLookup
+
+REPOSITORY_NAME = "owner/repo"
+PERMISSIONS = ("pull", "triage", "push", "maintain", "admin")
+
+
+class CollaboratorsStandIn(http.server.ThreadingHTTPServer):
+    """Serve the collaborators of a repository, each login granted the permission of its index in `PERMISSIONS`."""
+
+    def __init__(self, collaborators: int) -> None:
+        super().__init__(("127.0.0.1", 0), CollaboratorsHandler)
+        self.collaborators = [{"login": f"user{i:05d}", "role_name": PERMISSIONS[i % len(PERMISSIONS)]} for i in range(collaborators)]
+        self.requests: list[tuple[str, int]] = []
+        self.requests_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def filtered(self, permission: str) -> list[dict]:
+        # A permission filter returns the collaborators granted at least the permission, as the Github API does
+        if not permission:
+            return self.collaborators
+        return [c for c in self.collaborators if PERMISSIONS.index(c["role_name"]) >= PERMISSIONS.index(permission)]
+
+    def reset_requests(self) -> list[tuple[str, int]]:
+        with self.requests_lock:
+            requests, self.requests = self.requests, []
+        return requests
+
+
+class CollaboratorsHandler(http.server.BaseHTTPRequestHandler):
+    server: CollaboratorsStandIn
+
+    def do_GET(self) -> None:
+        url = urllib.parse.urlparse(self.path)
+        if url.path != f"/repos/{REPOSITORY_NAME}/collaborators":
+            self.send_error(404)
+            return
+        query = dict(urllib.parse.parse_qsl(url.query))
+        permission, page, per_page = query.get("permission", ""), int(query.get("page", 1)), int(query.get("per_page", 30))
+        with self.server.requests_lock:
+            self.server.requests.append((permission, page))
+        collaborators = self.server.filtered(permission)
+        body = json.dumps(collaborators[(page - 1) * per_page : page * per_page]).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()}"'
+        not_modified = self.headers.get("If-None-Match") == etag
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        last_page = max((len(collaborators) + per_page - 1) // per_page, 1)
+        if page < last_page:
+            page_url = f"{self.server.base_url}{url.path}?per_page={per_page}&permission={permission}"
+            self.send_header("Link", f'<{page_url}&page={page + 1}>; rel="next", <{page_url}&page={last_page}>; rel="last"')
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def check(failures: list[str], condition: bool, message: str) -> None:
+    print(f"  {'OK  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failures.append(message)
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--collaborators", type=int, default=250)
+    args = args_parser.parse_args()
+
+    server = CollaboratorsStandIn(args.collaborators)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    failures = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, "collaborators.json")
+        expected_pages = max((args.collaborators + DEFAULT_COLLABORATOR_PAGE_SIZE - 1) // DEFAULT_COLLABORATOR_PAGE_SIZE, 1)
+        lookup = CachedCollaboratorLookup("token", cache_path=cache_path, ttl_seconds=300, base_url=server.base_url)
+
+        print(f"Pagination of {args.collaborators} collaborators:")
+        logins = lookup.get_logins(REPOSITORY_NAME)
+        requests = server.reset_requests()
+        check(failures, logins == [c["login"] for c in server.collaborators], "all collaborators are returned in order")
+        check(failures, sorted(p for _, p in requests) == list(range(1, expected_pages + 1)), f"pages 1 to {expected_pages} are requested once each")
+
+        print("Cache hits within the TTL:")
+        check(failures, lookup.get_logins(REPOSITORY_NAME) == logins, "the cached collaborators are returned")
+        check(failures, not server.reset_requests(), "no request is made")
+
+        print("Revalidation after the TTL:")
+        expired_lookup = CachedCollaboratorLookup("token", cache_path=cache_path, ttl_seconds=0, base_url=server.base_url)
+        check(failures, expired_lookup.get_logins(REPOSITORY_NAME) == logins, "the revalidated collaborators are returned")
+        # A single full page has no `Link` header, so the page after it is read once in case collaborators were appended
+        read_on = 1 if expected_pages == 1 and args.collaborators == DEFAULT_COLLABORATOR_PAGE_SIZE else 0
+        check(failures, len(server.reset_requests()) == expected_pages + read_on, "every cached page is revalidated once")
+
+        print("Permission filtering:")
+        admins = lookup.get_logins(REPOSITORY_NAME, "admin")
+        server.reset_requests()
+        check(failures, admins == [c["login"] for c in server.filtered("admin")], "only admin collaborators are returned")
+        check(failures, lookup.get_logins(REPOSITORY_NAME) == logins, "the unfiltered collaborators are cached apart")
+        check(failures, lookup.get_logins(REPOSITORY_NAME, "admin") == admins, "the admin collaborators are cached")
+        check(failures, not server.reset_requests(), "no request is made for both cached permissions")
+    server.shutdown()
+    if failures:
+        print("Collaborator lookup failures:\n  " + "\n  ".join(failures))
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()